@@ -0,0 +1,135 @@
+import os
+
+# Admin endpoints accept this token as "Authorization: Bearer <token>" or
+# X-Admin-Token; they are disabled while it is unset
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+# Master data (locations, slots, desk types) snapshot
+MASTER_DATA_TTL_SECONDS = int(os.getenv('MASTER_DATA_TTL_SECONDS', 300))
+MASTER_DATA_RETRY_SECONDS = int(os.getenv('MASTER_DATA_RETRY_SECONDS', 30))
+MASTER_DATA_PRELOAD = os.getenv('MASTER_DATA_PRELOAD', 'true').lower() == 'true'
+
+# Database timeouts, so a slow or unreachable Postgres can't stall a worker indefinitely
+DB_CONNECT_TIMEOUT_SECONDS = int(os.getenv('DB_CONNECT_TIMEOUT_SECONDS', 5))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 10000))
+
+# Last-good results served for read endpoints while the database is failing
+STALE_CACHE_MAX_ENTRIES = int(os.getenv('STALE_CACHE_MAX_ENTRIES', 1024))
+STALE_CACHE_MAX_AGE_SECONDS = int(os.getenv('STALE_CACHE_MAX_AGE_SECONDS', 3600))
+STALE_CACHE_RETRY_SECONDS = int(os.getenv('STALE_CACHE_RETRY_SECONDS', 5))
+
+# Per-request deadline, propagated into Postgres statement_timeout
+REQUEST_TIMEOUT_MS = int(os.getenv('REQUEST_TIMEOUT_MS', 15000))
+
+# Circuit breaker around database calls
+DB_BREAKER_WINDOW_SECONDS = int(os.getenv('DB_BREAKER_WINDOW_SECONDS', 30))
+DB_BREAKER_MIN_REQUESTS = int(os.getenv('DB_BREAKER_MIN_REQUESTS', 10))
+DB_BREAKER_FAILURE_RATIO = float(os.getenv('DB_BREAKER_FAILURE_RATIO', 0.5))
+DB_BREAKER_OPEN_SECONDS = int(os.getenv('DB_BREAKER_OPEN_SECONDS', 15))
+
+# Read replica routing
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', 5))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', 2))
+REPLICA_PIN_MAX_USERS = int(os.getenv('REPLICA_PIN_MAX_USERS', 10000))
+
+# Connection pool, one per database server
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_WAIT_SECONDS = float(os.getenv('DB_POOL_WAIT_SECONDS', 5))
+DB_POOL_MAX_LIFETIME_SECONDS = int(os.getenv('DB_POOL_MAX_LIFETIME_SECONDS', 1800))
+
+# Every Nth execution of a read-only prepared statement is first planned
+# under EXPLAIN, to split its time into planning and execution (0 = off)
+PREPARED_STATEMENT_EXPLAIN_EVERY = int(os.getenv('PREPARED_STATEMENT_EXPLAIN_EVERY', 100))
+
+# User booking history pagination and streaming
+USER_BOOKINGS_PAGE_SIZE = int(os.getenv('USER_BOOKINGS_PAGE_SIZE', 50))
+USER_BOOKINGS_MAX_PAGE_SIZE = int(os.getenv('USER_BOOKINGS_MAX_PAGE_SIZE', 200))
+USER_BOOKINGS_STREAM_BATCH_SIZE = int(os.getenv('USER_BOOKINGS_STREAM_BATCH_SIZE', 500))
+
+# Most (desk, slot, date) keys one batch hold-status request may ask about
+HOLD_STATUS_BATCH_MAX = int(os.getenv('HOLD_STATUS_BATCH_MAX', 1000))
+
+# Session tokens: login returns one valid for SESSION_TOKEN_TTL_SECONDS, sent
+# back as "Authorization: Bearer <token>". Give every worker the same
+# SESSION_SECRET_KEY; while it is unset each process signs with a random key.
+SESSION_SECRET_KEY = os.getenv('SESSION_SECRET_KEY', '')
+SESSION_TOKEN_TTL_SECONDS = int(os.getenv('SESSION_TOKEN_TTL_SECONDS', 43200))
+
+# Per-process cache of signed-in users' profiles; changes made through
+# another worker show up here after PROFILE_CACHE_TTL_SECONDS at most
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', 10000))
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv('PROFILE_CACHE_TTL_SECONDS', 300))
+
+# Bulk user import (POST /api/admin/users/import): largest CSV upload
+# accepted, CSV sent per COPY (each blocks the worker while it runs, a few
+# milliseconds at this size), and most emails or rows listed per problem
+# in its report
+USER_IMPORT_MAX_BYTES = int(os.getenv('USER_IMPORT_MAX_BYTES', 50 * 1024 * 1024))
+USER_IMPORT_BATCH_BYTES = int(os.getenv('USER_IMPORT_BATCH_BYTES', 256 * 1024))
+USER_IMPORT_REPORT_LIMIT = int(os.getenv('USER_IMPORT_REPORT_LIMIT', 100))
+
+# Password hashing (argon2id) runs on at most PASSWORD_HASH_WORKERS native
+# threads (eventlet's tpool, EVENTLET_THREADPOOL_SIZE threads, 20 by
+# default); once PASSWORD_HASH_QUEUE_DEPTH more are waiting, logins and
+# signups get 503 until the backlog clears.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE_DEPTH = int(os.getenv('PASSWORD_HASH_QUEUE_DEPTH', 32))
+
+# Booking exports: rows fetched per server-side cursor round trip and rows
+# buffered before a chunk is written to the client
+BOOKING_EXPORT_FETCH_SIZE = int(os.getenv('BOOKING_EXPORT_FETCH_SIZE', 2000))
+BOOKING_EXPORT_CHUNK_ROWS = int(os.getenv('BOOKING_EXPORT_CHUNK_ROWS', 500))
+
+# Occupancy analytics: rollup rows fetched per batch and the longest
+# date range a single report may cover
+ANALYTICS_FETCH_ROWS = int(os.getenv('ANALYTICS_FETCH_ROWS', 50000))
+ANALYTICS_MAX_RANGE_DAYS = int(os.getenv('ANALYTICS_MAX_RANGE_DAYS', 366))
+
+# Monthly booking_transactions partitions: months created ahead of the
+# current one, months kept attached before archiving, and how often the
+# app checks for missing future partitions (0 = only via the CLI)
+BOOKING_PARTITION_MONTHS_AHEAD = int(os.getenv('BOOKING_PARTITION_MONTHS_AHEAD', 3))
+BOOKING_PARTITION_RETAIN_MONTHS = int(os.getenv('BOOKING_PARTITION_RETAIN_MONTHS', 24))
+BOOKING_PARTITION_CHECK_SECONDS = int(os.getenv('BOOKING_PARTITION_CHECK_SECONDS', 21600))
+
+# Request timing: Server-Timing headers plus Prometheus histograms on /metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+# Slow-query log: statements slower than the threshold are kept in a ring
+# buffer with their EXPLAIN plan, captured at most once per interval for
+# each query fingerprint (threshold 0 = off). The plan is captured inline,
+# so only SLOW_QUERY_EXPLAIN_ANALYZE=true runs a slow read a second time
+# to add actual rows and timings
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 250))
+SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', 300))
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', 'false').lower() == 'true'
+QUERY_STATS_MAX_FINGERPRINTS = int(os.getenv('QUERY_STATS_MAX_FINGERPRINTS', 500))
+
+# On-demand sampling profiler (GET /api/admin/profile): longest run allowed
+# and the default time between stack samples
+PROFILER_MAX_SECONDS = int(os.getenv('PROFILER_MAX_SECONDS', 60))
+PROFILER_INTERVAL_MS = int(os.getenv('PROFILER_INTERVAL_MS', 10))
+
+# Real-time desk updates: seconds between pushes, and where socket
+# subscriptions live. 'local' keeps them in this process, which then
+# pushes to its own clients. 'postgres' shares them between workers and
+# hosts through sena.socket_subscriptions and elects a single producer;
+# it needs SOCKETIO_MESSAGE_QUEUE (e.g. redis://host:6379/0, with the redis
+# package installed) so the producer's emits reach every worker's clients.
+DESK_UPDATE_INTERVAL_SECONDS = int(os.getenv('DESK_UPDATE_INTERVAL_SECONDS', 10))
+REALTIME_BACKEND = os.getenv('REALTIME_BACKEND', 'local')
+SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+SOCKET_NODE_TIMEOUT_SECONDS = int(os.getenv('SOCKET_NODE_TIMEOUT_SECONDS', 30))
+
+# Socket outbound queues: a client whose transport holds more than
+# SOCKET_MAX_QUEUED_PACKETS packets is only sent its newest desk_update once
+# it drains (checked every SOCKET_OUTBOX_RETRY_SECONDS); a client backed up
+# for over SOCKET_SLOW_CLIENT_SECONDS is disconnected.
+SOCKET_MAX_QUEUED_PACKETS = int(os.getenv('SOCKET_MAX_QUEUED_PACKETS', 2))
+SOCKET_SLOW_CLIENT_SECONDS = int(os.getenv('SOCKET_SLOW_CLIENT_SECONDS', 30))
+SOCKET_OUTBOX_RETRY_SECONDS = float(os.getenv('SOCKET_OUTBOX_RETRY_SECONDS', 1))
+
+# Concurrency model: 'eventlet' (production) monkey-patches the standard
+# library and makes psycopg2 wait cooperatively; 'threading' uses OS threads
+ASYNC_MODE = os.getenv('ASYNC_MODE', 'eventlet')
@@ -0,0 +1,138 @@
+"""
+Rebuild sena.desk_slot_day_status from sena.booking_transactions.
+
+Run after creating the rollup (migration 0003_desk_slot_day_status), or with
+--verify to compare it with the transactions:
+
+    python -m app.maintenance.backfill_desk_slot_day_status [--from-date D] [--to-date D] [--chunk-days N] [--verify]
+"""
+from typing import Optional, Tuple
+from app.utils.db_utils import get_db_connection
+from app.config.database import DB_CONFIG
+from datetime import date, datetime, timedelta
+import argparse
+import sys
+import time
+
+# Expected counts per key, from the transactions themselves
+EXPECTED_STATUS_SQL = """
+    SELECT booking_date, desk_id, slot_id,
+           COUNT(*) FILTER (WHERE status = 'booked') AS booked_count,
+           COUNT(*) FILTER (WHERE status = 'held') AS held_count
+    FROM sena.booking_transactions
+    WHERE booking_date BETWEEN %s AND %s
+    AND status IN ('booked', 'held')
+    AND desk_id IS NOT NULL AND slot_id IS NOT NULL
+    GROUP BY booking_date, desk_id, slot_id
+"""
+
+def _date_bounds(cursor, from_date: Optional[date], to_date: Optional[date]) -> Tuple[Optional[date], Optional[date]]:
+    if from_date and to_date:
+        return from_date, to_date
+    cursor.execute("SELECT MIN(booking_date), MAX(booking_date) FROM sena.booking_transactions")
+    first, last = cursor.fetchone()
+    return from_date or first, to_date or last
+
+def backfill(from_date: Optional[date] = None, to_date: Optional[date] = None, chunk_days: int = 31) -> int:
+    """
+    Rebuild the rollup chunk by chunk. Each chunk takes a SHARE lock on
+    booking_transactions so no write (and its trigger) interleaves with the
+    rebuild; writers wait for one chunk at most.
+    Returns: Number of rollup rows written
+    """
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor()
+        from_date, to_date = _date_bounds(cursor, from_date, to_date)
+        conn.commit()
+        if from_date is None:
+            print("No booking transactions to backfill")
+            return 0
+
+        written = 0
+        chunk_start = from_date
+        while chunk_start <= to_date:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), to_date)
+            started = time.perf_counter()
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            cursor.execute("LOCK TABLE sena.booking_transactions IN SHARE MODE")
+            cursor.execute(
+                "DELETE FROM sena.desk_slot_day_status WHERE booking_date BETWEEN %s AND %s",
+                (chunk_start, chunk_end)
+            )
+            cursor.execute(f"""
+                INSERT INTO sena.desk_slot_day_status (booking_date, desk_id, slot_id, booked_count, held_count)
+                {EXPECTED_STATUS_SQL}
+            """, (chunk_start, chunk_end))
+            written += cursor.rowcount
+            conn.commit()
+            print(f"{chunk_start} .. {chunk_end}: {cursor.rowcount} rows in {time.perf_counter() - started:.2f}s")
+            chunk_start = chunk_end + timedelta(days=1)
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def verify(from_date: Optional[date] = None, to_date: Optional[date] = None) -> int:
+    """
+    Compare the rollup with counts computed from the transactions.
+    Returns: Number of keys that differ
+    """
+    conn = get_db_connection(DB_CONFIG, read_only=True)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor()
+        from_date, to_date = _date_bounds(cursor, from_date, to_date)
+        if from_date is None:
+            return 0
+        cursor.execute("SET LOCAL statement_timeout = 0")
+        cursor.execute(f"""
+            SELECT
+                COALESCE(e.booking_date, s.booking_date),
+                COALESCE(e.desk_id, s.desk_id),
+                COALESCE(e.slot_id, s.slot_id),
+                e.booked_count, e.held_count, s.booked_count, s.held_count
+            FROM ({EXPECTED_STATUS_SQL}) e
+            FULL JOIN (
+                SELECT * FROM sena.desk_slot_day_status WHERE booking_date BETWEEN %s AND %s
+            ) s USING (booking_date, desk_id, slot_id)
+            WHERE e.booked_count IS DISTINCT FROM s.booked_count
+            OR e.held_count IS DISTINCT FROM s.held_count
+        """, (from_date, to_date, from_date, to_date))
+        mismatches = cursor.fetchall()
+        for row in mismatches[:20]:
+            print(f"{row[0]} desk {row[1]} slot {row[2]}: expected booked={row[3]} held={row[4]}, "
+                  f"rollup has booked={row[5]} held={row[6]}")
+        return len(mismatches)
+    finally:
+        conn.close()
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill or verify sena.desk_slot_day_status")
+    parser.add_argument('--from-date', type=_parse_date, help="First booking date (default: earliest)")
+    parser.add_argument('--to-date', type=_parse_date, help="Last booking date (default: latest)")
+    parser.add_argument('--chunk-days', type=int, default=31, help="Booking dates rebuilt per transaction")
+    parser.add_argument('--verify', action='store_true', help="Only compare the rollup with the transactions")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        mismatches = verify(args.from_date, args.to_date)
+        print(f"{mismatches} mismatched keys")
+        return 1 if mismatches else 0
+
+    written = backfill(args.from_date, args.to_date, max(args.chunk_days, 1))
+    print(f"Backfilled {written} rows")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Manage the monthly partitions of sena.booking_transactions
+(see migration 0004_booking_transactions_partitioning).
+
+Creates partitions for the coming months and, with --archive, detaches
+partitions older than the retention window into the sena_archive schema:
+
+    python -m app.maintenance.partitions [--months-ahead N] [--archive] [--retain-months N]
+"""
+from typing import Dict, List, Optional
+from app.utils.db_utils import get_db_connection
+from app.config.database import DB_CONFIG
+from app.config.settings import (
+    BOOKING_PARTITION_MONTHS_AHEAD, BOOKING_PARTITION_RETAIN_MONTHS, BOOKING_PARTITION_CHECK_SECONDS
+)
+from datetime import date
+import argparse
+import re
+import sys
+import threading
+import time
+
+ARCHIVE_SCHEMA = 'sena_archive'
+PARTITION_NAME = re.compile(r'^booking_transactions_p(\d{4})_(\d{2})$')
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = to_regclass('sena.booking_transactions')
+        )
+    """)
+    return cursor.fetchone()[0]
+
+def monthly_partitions(cursor) -> Dict[str, date]:
+    """Attached monthly partitions by name, with the month each one holds"""
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'sena.booking_transactions'::regclass
+    """)
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+def ensure_future_partitions(cursor, months_ahead: int = BOOKING_PARTITION_MONTHS_AHEAD,
+                             today: Optional[date] = None) -> List[str]:
+    """
+    Create the partitions from the current month through months_ahead months later
+    Returns: Names of the partitions created
+    """
+    this_month = (today or date.today()).replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        cursor.execute("SELECT sena.create_booking_transactions_partition(%s)", (add_months(this_month, offset),))
+        name = cursor.fetchone()[0]
+        if name:
+            created.append(name)
+    return created
+
+def archive_old_partitions(cursor, retain_months: int = BOOKING_PARTITION_RETAIN_MONTHS,
+                           today: Optional[date] = None) -> List[str]:
+    """
+    Detach partitions for months before the retention window and move them
+    to the archive schema, where they can be dumped and dropped. Their
+    desk_slot_day_status rows are kept.
+    Returns: Names of the partitions archived
+    """
+    cutoff = add_months((today or date.today()).replace(day=1), -retain_months)
+    archived = []
+    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+    for name, month in sorted(monthly_partitions(cursor).items(), key=lambda item: item[1]):
+        if month >= cutoff:
+            continue
+        cursor.execute(f"ALTER TABLE sena.booking_transactions DETACH PARTITION sena.{name}")
+        cursor.execute(f"ALTER TABLE sena.{name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        archived.append(name)
+    return archived
+
+def run_maintenance(months_ahead: int = BOOKING_PARTITION_MONTHS_AHEAD, archive: bool = False,
+                    retain_months: int = BOOKING_PARTITION_RETAIN_MONTHS) -> Dict[str, List[str]]:
+    """
+    Create missing future partitions and optionally archive old ones. Only
+    one process does this at a time; others return without changes.
+    Returns: Dict of created and archived partition names
+    """
+    result = {"created": [], "archived": []}
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor()
+        if not is_partitioned(cursor):
+            return result
+        cursor.execute("SELECT pg_try_advisory_xact_lock(hashtext('sena.booking_transactions partitions'))")
+        if not cursor.fetchone()[0]:
+            return result
+
+        result["created"] = ensure_future_partitions(cursor, months_ahead)
+        if archive:
+            result["archived"] = archive_old_partitions(cursor, retain_months)
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def start_partition_maintenance() -> None:
+    """Keep future partitions in place from a background thread"""
+    if BOOKING_PARTITION_CHECK_SECONDS <= 0:
+        return
+
+    def maintain():
+        while True:
+            try:
+                created = run_maintenance()["created"]
+                if created:
+                    print(f"[Partitions] Created {', '.join(created)}")
+            except Exception as e:
+                print(f"[Partitions ERROR] Failed to create booking partitions: {str(e)}")
+            time.sleep(BOOKING_PARTITION_CHECK_SECONDS)
+
+    thread = threading.Thread(target=maintain)
+    thread.daemon = True
+    thread.start()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage sena.booking_transactions partitions")
+    parser.add_argument('--months-ahead', type=int, default=BOOKING_PARTITION_MONTHS_AHEAD)
+    parser.add_argument('--archive', action='store_true', help="Detach partitions older than --retain-months")
+    parser.add_argument('--retain-months', type=int, default=BOOKING_PARTITION_RETAIN_MONTHS)
+    args = parser.parse_args(argv)
+
+    result = run_maintenance(args.months_ahead, args.archive, args.retain_months)
+    print(f"Created: {', '.join(result['created']) or 'none'}")
+    print(f"Archived: {', '.join(result['archived']) or 'none'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+from app.migrations.runner import main
+import sys
+
+sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Versioned migrations for the sena schema.
+
+Each versions/NNNN_name.sql file runs once, in version order, in its own
+transaction, and is recorded in sena.schema_migrations with a checksum of
+its text. Migrations only create what is missing, so a database that
+predates them is adopted by running them:
+
+    python -m app.migrations [--target N] [--status]
+"""
+from typing import Dict, List, NamedTuple, Optional
+from app.utils.db_utils import get_db_connection
+from app.config.database import DB_CONFIG
+from pathlib import Path
+import argparse
+import hashlib
+import re
+import time
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / 'versions'
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+HISTORY_SQL = """
+    CREATE SCHEMA IF NOT EXISTS sena;
+    CREATE TABLE IF NOT EXISTS sena.schema_migrations (
+        version int PRIMARY KEY,
+        name text NOT NULL,
+        checksum text NOT NULL,
+        applied_at timestamptz NOT NULL DEFAULT now()
+    )
+"""
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files in version order"""
+    migrations = []
+    for path in sorted(directory.glob('*.sql')):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file names must look like 0001_name.sql: {path.name}")
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append(Migration(int(match.group(1)), match.group(2), path, checksum))
+
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Two migration files share a version")
+    return migrations
+
+def applied_migrations(cursor) -> Dict[int, str]:
+    """Checksums of the applied migrations by version"""
+    cursor.execute(HISTORY_SQL)
+    cursor.execute("SELECT version, checksum FROM sena.schema_migrations")
+    return dict(cursor.fetchall())
+
+def pending_migrations(cursor, migrations: List[Migration], target: Optional[int] = None) -> List[Migration]:
+    """
+    Migrations not applied yet, up to target
+    Raises: ValueError if an applied migration's file has changed since
+    """
+    applied = applied_migrations(cursor)
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            raise ValueError(f"{migration.path.name} changed after it was applied; add a new migration instead")
+    return [
+        migration for migration in migrations
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+def apply_migration(cursor, migration: Migration) -> None:
+    cursor.execute(migration.path.read_text())
+    cursor.execute(
+        "INSERT INTO sena.schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum)
+    )
+
+def apply_pending(cursor, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations on cursor without committing, e.g. inside a
+    test transaction that is rolled back
+    Returns: The migrations applied
+    """
+    pending = pending_migrations(cursor, load_migrations(), target)
+    for migration in pending:
+        apply_migration(cursor, migration)
+    return pending
+
+def migrate(target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations, committing after each one. A session advisory
+    lock keeps two deploys from migrating at once.
+    Returns: The migrations applied
+    """
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(hashtext('sena schema migrations'))")
+        try:
+            pending = pending_migrations(cursor, load_migrations(), target)
+            conn.commit()
+            for migration in pending:
+                started = time.perf_counter()
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                apply_migration(cursor, migration)
+                conn.commit()
+                print(f"Applied {migration.path.name} in {time.perf_counter() - started:.2f}s")
+            return pending
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(hashtext('sena schema migrations'))")
+            conn.commit()
+    finally:
+        conn.close()
+
+def status() -> List[str]:
+    """One line per migration file saying whether it has been applied"""
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        applied = applied_migrations(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+    lines = []
+    for migration in load_migrations():
+        if migration.version not in applied:
+            state = 'pending'
+        elif applied[migration.version] != migration.checksum:
+            state = 'applied, file changed since'
+        else:
+            state = 'applied'
+        lines.append(f"{migration.path.name}: {state}")
+    return lines
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply the sena schema migrations")
+    parser.add_argument('--target', type=int, help="Stop after this version")
+    parser.add_argument('--status', action='store_true', help="List migrations without applying them")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        print("\n".join(status()))
+        return 0
+
+    applied = migrate(args.target)
+    if not applied:
+        print("Schema is up to date")
+    return 0
@@ -0,0 +1,78 @@
+-- Tables the application reads and writes. Everything is IF NOT EXISTS so
+-- a database created before the migrations existed is adopted as is.
+CREATE SCHEMA IF NOT EXISTS sena;
+
+CREATE TABLE IF NOT EXISTS sena.locations (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    name text NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sena.buildings (
+    id serial PRIMARY KEY,
+    location_id uuid REFERENCES sena.locations (id),
+    name text,
+    address text,
+    floor_count int,
+    amenities jsonb,
+    operating_hours jsonb
+);
+
+CREATE TABLE IF NOT EXISTS sena.desk_type_master (
+    id serial PRIMARY KEY,
+    type text,
+    capacity int
+);
+
+CREATE TABLE IF NOT EXISTS sena.slot_master (
+    id serial PRIMARY KEY,
+    slot_type text,
+    start_time time,
+    end_time time,
+    time_zone text,
+    is_active boolean DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sena.desks (
+    id serial PRIMARY KEY,
+    name text,
+    floor_number int,
+    capacity int,
+    description text,
+    status text DEFAULT 'available',
+    rating numeric(3, 2),
+    desk_type_id int REFERENCES sena.desk_type_master (id),
+    building_id int REFERENCES sena.buildings (id),
+    location_id uuid REFERENCES sena.locations (id)
+);
+
+CREATE TABLE IF NOT EXISTS sena.desk_pricing (
+    id serial PRIMARY KEY,
+    desk_type_id int REFERENCES sena.desk_type_master (id),
+    slot_id int REFERENCES sena.slot_master (id),
+    price numeric(10, 2),
+    is_active boolean DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sena.users (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    email text NOT NULL,
+    first_name text,
+    last_name text,
+    phone text,
+    password text,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now(),
+    is_active boolean DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sena.booking_transactions (
+    id serial PRIMARY KEY,
+    user_id uuid REFERENCES sena.users (id),
+    desk_id int REFERENCES sena.desks (id),
+    slot_id int REFERENCES sena.slot_master (id),
+    status text,
+    booking_details jsonb,
+    booking_date date,
+    created_at timestamptz DEFAULT now(),
+    updated_at timestamptz DEFAULT now()
+);
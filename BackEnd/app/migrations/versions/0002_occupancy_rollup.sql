@@ -0,0 +1,20 @@
+-- Per day, desk and slot booking counts behind the occupancy reports.
+-- Rows for a day are rebuilt from sena.booking_transactions until the day
+-- has been refreshed after it ended; from then on they are served as is.
+CREATE TABLE IF NOT EXISTS sena.occupancy_daily_rollup (
+    booking_date date NOT NULL,
+    desk_id int NOT NULL,
+    slot_id int NOT NULL,
+    booked_count int NOT NULL DEFAULT 0,
+    held_count int NOT NULL DEFAULT 0,
+    PRIMARY KEY (booking_date, desk_id, slot_id)
+);
+
+CREATE TABLE IF NOT EXISTS sena.occupancy_rollup_days (
+    booking_date date PRIMARY KEY,
+    refreshed_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Refreshing a day selects its transactions by booking_date
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_booking_date
+    ON sena.booking_transactions (booking_date);
@@ -0,0 +1,110 @@
+-- Booked/held counts per (booking_date, desk_id, slot_id), kept in step
+-- with sena.booking_transactions by the statement-level triggers below so
+-- availability is a primary-key lookup instead of a scan of the day's
+-- transactions. Keys with no booked or held transactions have no row.
+-- Populate existing data with: python -m app.maintenance.backfill_desk_slot_day_status
+CREATE TABLE IF NOT EXISTS sena.desk_slot_day_status (
+    booking_date date NOT NULL,
+    desk_id int NOT NULL,
+    slot_id int NOT NULL,
+    booked_count int NOT NULL DEFAULT 0,
+    held_count int NOT NULL DEFAULT 0,
+    PRIMARY KEY (booking_date, desk_id, slot_id)
+);
+
+-- Adds the per-key deltas of a statement's transition tables. Keys are
+-- applied in order so concurrent statements lock rows in the same order.
+CREATE OR REPLACE FUNCTION sena.sync_desk_slot_day_status() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    dates date[];
+    desks int[];
+    slots int[];
+    booked int[];
+    held int[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(booking_date ORDER BY booking_date, desk_id, slot_id), array_agg(desk_id ORDER BY booking_date, desk_id, slot_id),
+               array_agg(slot_id ORDER BY booking_date, desk_id, slot_id), array_agg(b ORDER BY booking_date, desk_id, slot_id),
+               array_agg(h ORDER BY booking_date, desk_id, slot_id)
+        INTO dates, desks, slots, booked, held
+        FROM (
+            SELECT booking_date, desk_id, slot_id,
+                   COUNT(*) FILTER (WHERE status = 'booked')::int AS b,
+                   COUNT(*) FILTER (WHERE status = 'held')::int AS h
+            FROM new_rows
+            WHERE status IN ('booked', 'held')
+            AND booking_date IS NOT NULL AND desk_id IS NOT NULL AND slot_id IS NOT NULL
+            GROUP BY booking_date, desk_id, slot_id
+        ) delta;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(booking_date ORDER BY booking_date, desk_id, slot_id), array_agg(desk_id ORDER BY booking_date, desk_id, slot_id),
+               array_agg(slot_id ORDER BY booking_date, desk_id, slot_id), array_agg(b ORDER BY booking_date, desk_id, slot_id),
+               array_agg(h ORDER BY booking_date, desk_id, slot_id)
+        INTO dates, desks, slots, booked, held
+        FROM (
+            SELECT booking_date, desk_id, slot_id,
+                   -COUNT(*) FILTER (WHERE status = 'booked')::int AS b,
+                   -COUNT(*) FILTER (WHERE status = 'held')::int AS h
+            FROM old_rows
+            WHERE status IN ('booked', 'held')
+            AND booking_date IS NOT NULL AND desk_id IS NOT NULL AND slot_id IS NOT NULL
+            GROUP BY booking_date, desk_id, slot_id
+        ) delta;
+    ELSE
+        SELECT array_agg(booking_date ORDER BY booking_date, desk_id, slot_id), array_agg(desk_id ORDER BY booking_date, desk_id, slot_id),
+               array_agg(slot_id ORDER BY booking_date, desk_id, slot_id), array_agg(b ORDER BY booking_date, desk_id, slot_id),
+               array_agg(h ORDER BY booking_date, desk_id, slot_id)
+        INTO dates, desks, slots, booked, held
+        FROM (
+            SELECT booking_date, desk_id, slot_id, SUM(b)::int AS b, SUM(h)::int AS h
+            FROM (
+                SELECT booking_date, desk_id, slot_id, (status = 'booked')::int AS b, (status = 'held')::int AS h
+                FROM new_rows WHERE status IN ('booked', 'held')
+                UNION ALL
+                SELECT booking_date, desk_id, slot_id, -(status = 'booked')::int, -(status = 'held')::int
+                FROM old_rows WHERE status IN ('booked', 'held')
+            ) changes
+            WHERE booking_date IS NOT NULL AND desk_id IS NOT NULL AND slot_id IS NOT NULL
+            GROUP BY booking_date, desk_id, slot_id
+            HAVING SUM(b) <> 0 OR SUM(h) <> 0
+        ) delta;
+    END IF;
+
+    IF dates IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO sena.desk_slot_day_status AS s (booking_date, desk_id, slot_id, booked_count, held_count)
+    SELECT * FROM unnest(dates, desks, slots, booked, held)
+    ON CONFLICT (booking_date, desk_id, slot_id) DO UPDATE
+    SET booked_count = s.booked_count + EXCLUDED.booked_count,
+        held_count = s.held_count + EXCLUDED.held_count;
+
+    DELETE FROM sena.desk_slot_day_status s
+    USING unnest(dates, desks, slots) AS d(booking_date, desk_id, slot_id)
+    WHERE s.booking_date = d.booking_date AND s.desk_id = d.desk_id AND s.slot_id = d.slot_id
+    AND s.booked_count <= 0 AND s.held_count <= 0;
+
+    RETURN NULL;
+END;
+$$;
+
+-- Transition tables need one trigger per event
+DROP TRIGGER IF EXISTS desk_slot_day_status_insert ON sena.booking_transactions;
+CREATE TRIGGER desk_slot_day_status_insert
+    AFTER INSERT ON sena.booking_transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
+
+DROP TRIGGER IF EXISTS desk_slot_day_status_update ON sena.booking_transactions;
+CREATE TRIGGER desk_slot_day_status_update
+    AFTER UPDATE ON sena.booking_transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
+
+DROP TRIGGER IF EXISTS desk_slot_day_status_delete ON sena.booking_transactions;
+CREATE TRIGGER desk_slot_day_status_delete
+    AFTER DELETE ON sena.booking_transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
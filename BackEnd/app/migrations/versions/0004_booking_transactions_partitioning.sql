@@ -0,0 +1,115 @@
+-- Convert sena.booking_transactions into a table range-partitioned by month
+-- on booking_date. Rows with no booking_date, or a date no partition covers
+-- yet, go to booking_transactions_default. Writes are blocked while the
+-- rows are copied; the original table is kept as
+-- booking_transactions_unpartitioned until it is dropped by hand (it is
+-- dropped here when it was empty, as on a new database).
+--
+-- Afterwards `python -m app.maintenance.partitions` creates future months
+-- and archives old ones.
+
+-- Creates the partition for the month containing `month`, moving that
+-- month's rows out of the default partition first. Rows move partition to
+-- partition, so the desk_slot_day_status triggers on the parent don't fire.
+-- Returns the new partition's name, or NULL if it already existed.
+CREATE OR REPLACE FUNCTION sena.create_booking_transactions_partition(month date) RETURNS text
+LANGUAGE plpgsql AS $$
+DECLARE
+    first_day date := date_trunc('month', month)::date;
+    next_month date := (date_trunc('month', month) + interval '1 month')::date;
+    partition_name text := 'booking_transactions_p' || to_char(first_day, 'YYYY_MM');
+BEGIN
+    IF to_regclass('sena.' || partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    CREATE TEMP TABLE booking_transactions_moving ON COMMIT DROP AS
+    WITH moved AS (
+        DELETE FROM sena.booking_transactions_default
+        WHERE booking_date >= first_day AND booking_date < next_month
+        RETURNING *
+    )
+    SELECT * FROM moved;
+
+    EXECUTE format(
+        'CREATE TABLE sena.%I PARTITION OF sena.booking_transactions FOR VALUES FROM (%L) TO (%L)',
+        partition_name, first_day, next_month
+    );
+    EXECUTE format('INSERT INTO sena.%I SELECT * FROM booking_transactions_moving', partition_name);
+    DROP TABLE booking_transactions_moving;
+    RETURN partition_name;
+END;
+$$;
+
+DO $$
+DECLARE
+    month date;
+    last_month date;
+    foreign_key record;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'sena.booking_transactions'::regclass
+    ) THEN
+        RAISE NOTICE 'sena.booking_transactions is already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE sena.booking_transactions IN EXCLUSIVE MODE;
+    ALTER TABLE sena.booking_transactions RENAME TO booking_transactions_unpartitioned;
+    ALTER INDEX IF EXISTS sena.idx_booking_transactions_booking_date
+        RENAME TO idx_booking_transactions_unpartitioned_booking_date;
+    DROP TRIGGER IF EXISTS desk_slot_day_status_insert ON sena.booking_transactions_unpartitioned;
+    DROP TRIGGER IF EXISTS desk_slot_day_status_update ON sena.booking_transactions_unpartitioned;
+    DROP TRIGGER IF EXISTS desk_slot_day_status_delete ON sena.booking_transactions_unpartitioned;
+
+    -- Same columns, defaults (including the id sequence) and checks
+    CREATE TABLE sena.booking_transactions (
+        LIKE sena.booking_transactions_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+    ) PARTITION BY RANGE (booking_date);
+    ALTER SEQUENCE IF EXISTS sena.booking_transactions_id_seq OWNED BY sena.booking_transactions.id;
+
+    -- A primary key would have to include booking_date, which may be NULL;
+    -- ids stay unique through the sequence
+    CREATE INDEX idx_booking_transactions_id ON sena.booking_transactions (id);
+    CREATE INDEX idx_booking_transactions_booking_date ON sena.booking_transactions (booking_date);
+
+    -- Foreign keys of the original table
+    FOR foreign_key IN
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = 'sena.booking_transactions_unpartitioned'::regclass AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE sena.booking_transactions ADD CONSTRAINT %I %s',
+                       foreign_key.conname, foreign_key.definition);
+    END LOOP;
+
+    CREATE TABLE sena.booking_transactions_default PARTITION OF sena.booking_transactions DEFAULT;
+
+    SELECT date_trunc('month', MIN(booking_date))::date, date_trunc('month', MAX(booking_date))::date
+    INTO month, last_month
+    FROM sena.booking_transactions_unpartitioned;
+    WHILE month <= last_month LOOP
+        PERFORM sena.create_booking_transactions_partition(month);
+        month := (month + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO sena.booking_transactions SELECT * FROM sena.booking_transactions_unpartitioned;
+    IF NOT EXISTS (SELECT 1 FROM sena.booking_transactions_unpartitioned) THEN
+        DROP TABLE sena.booking_transactions_unpartitioned;
+    END IF;
+
+    -- The rollup already counts the copied rows, so its triggers go on last
+    CREATE TRIGGER desk_slot_day_status_insert
+        AFTER INSERT ON sena.booking_transactions
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
+    CREATE TRIGGER desk_slot_day_status_update
+        AFTER UPDATE ON sena.booking_transactions
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
+    CREATE TRIGGER desk_slot_day_status_delete
+        AFTER DELETE ON sena.booking_transactions
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION sena.sync_desk_slot_day_status();
+END;
+$$;
@@ -0,0 +1,22 @@
+-- Indexes behind the hot queries; tests/test_query_plans.py checks the
+-- planner picks them at realistic volumes. Indexes on the partitioned
+-- booking_transactions are created on every partition, and new monthly
+-- partitions get them automatically.
+
+-- Hold conflict checks and holds by desk and slot
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_date_desk_slot_status
+    ON sena.booking_transactions (booking_date, desk_id, slot_id, status);
+
+-- Booking history, newest first; id breaks ties for the keyset pages
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_user_updated
+    ON sena.booking_transactions (user_id, updated_at, id);
+
+-- Login, signup and profile lookups
+CREATE INDEX IF NOT EXISTS idx_users_email ON sena.users (email);
+
+-- Availability filtered by location and desk type
+CREATE INDEX IF NOT EXISTS idx_desks_location_desk_type ON sena.desks (location_id, desk_type_id);
+
+-- Active price per desk type and slot
+CREATE INDEX IF NOT EXISTS idx_desk_pricing_active
+    ON sena.desk_pricing (desk_type_id, slot_id) WHERE is_active;
@@ -0,0 +1,26 @@
+-- At most one booked or held transaction per desk, slot and day. Concurrent
+-- holds can all pass the conflict check before any of them inserts; with
+-- this index the inserts after the first wait for it to commit and then
+-- fail, and DeskHold.put_desk_on_hold answers them as a conflict.
+DO $$
+DECLARE
+    duplicate record;
+BEGIN
+    SELECT booking_date, desk_id, slot_id, COUNT(*) AS transactions INTO duplicate
+    FROM sena.booking_transactions
+    WHERE status IN ('booked', 'held')
+    GROUP BY booking_date, desk_id, slot_id
+    HAVING COUNT(*) > 1
+    LIMIT 1;
+
+    IF FOUND THEN
+        RAISE EXCEPTION 'desk % slot % on % has % booked or held transactions',
+            duplicate.desk_id, duplicate.slot_id, duplicate.booking_date, duplicate.transactions
+            USING HINT = 'Cancel the extra transactions for each such slot, then run the migrations again';
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_booking_transactions_active_slot
+    ON sena.booking_transactions (booking_date, desk_id, slot_id)
+    WHERE status IN ('booked', 'held');
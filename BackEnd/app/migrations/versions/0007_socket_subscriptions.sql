@@ -0,0 +1,19 @@
+-- Socket.IO subscriptions shared by every worker and host when
+-- REALTIME_BACKEND=postgres. Each process heartbeats its node row;
+-- deleting a node that stopped heartbeating drops its subscriptions. The
+-- state is rebuilt by the heartbeats, so the tables are unlogged.
+CREATE UNLOGGED TABLE IF NOT EXISTS sena.socket_nodes (
+    node_id text PRIMARY KEY,
+    heartbeat_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE UNLOGGED TABLE IF NOT EXISTS sena.socket_subscriptions (
+    client_id text PRIMARY KEY,
+    node_id text NOT NULL REFERENCES sena.socket_nodes (node_id) ON DELETE CASCADE,
+    room text NOT NULL,
+    filters jsonb NOT NULL,
+    subscribed_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_socket_subscriptions_node ON sena.socket_subscriptions (node_id);
+CREATE INDEX IF NOT EXISTS idx_socket_subscriptions_room ON sena.socket_subscriptions (room);
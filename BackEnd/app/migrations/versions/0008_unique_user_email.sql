@@ -0,0 +1,24 @@
+-- One account per email. Signup relies on it to insert in one statement
+-- (INSERT ... ON CONFLICT (email) DO NOTHING), so two concurrent signups
+-- for the same email can't both succeed; the bulk user import merges the
+-- same way. It replaces the plain email index from 0005.
+DO $$
+DECLARE
+    duplicate record;
+BEGIN
+    SELECT email, COUNT(*) AS accounts INTO duplicate
+    FROM sena.users
+    GROUP BY email
+    HAVING COUNT(*) > 1
+    LIMIT 1;
+
+    IF FOUND THEN
+        RAISE EXCEPTION '% has % accounts', duplicate.email, duplicate.accounts
+            USING HINT = 'Merge or delete the extra accounts for each such email, then run the migrations again';
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_users_email ON sena.users (email);
+
+DROP INDEX IF EXISTS sena.idx_users_email;
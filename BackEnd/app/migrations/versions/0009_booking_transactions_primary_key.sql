@@ -0,0 +1,39 @@
+-- Give the partitioned sena.booking_transactions a primary key again. A
+-- key on a partitioned table has to include the partition column, so
+-- booking_date becomes NOT NULL and the key is (id, booking_date). Lookups
+-- by id pass the booking date too, so Postgres reads one partition instead
+-- of probing the id index of every month. It replaces the plain, per
+-- partition id index from 0004.
+DO $$
+DECLARE
+    undated record;
+BEGIN
+    SELECT COUNT(*) AS transactions, MIN(id) AS first_id INTO undated
+    FROM sena.booking_transactions
+    WHERE booking_date IS NULL;
+
+    IF undated.transactions > 0 THEN
+        RAISE EXCEPTION '% booking transactions have no booking_date, the first is id %',
+            undated.transactions, undated.first_id
+            USING HINT = 'Set booking_date on those transactions, or delete them, then run the migrations again';
+    END IF;
+END;
+$$;
+
+ALTER TABLE sena.booking_transactions ALTER COLUMN booking_date SET NOT NULL;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'sena.booking_transactions'::regclass AND contype = 'p'
+    ) THEN
+        -- booking_transactions_pkey may still name the key of
+        -- booking_transactions_unpartitioned
+        ALTER TABLE sena.booking_transactions
+            ADD CONSTRAINT pk_booking_transactions PRIMARY KEY (id, booking_date);
+    END IF;
+END;
+$$;
+
+DROP INDEX IF EXISTS sena.idx_booking_transactions_id;
@@ -0,0 +1,145 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from app.utils.db_utils import get_db_connection
+from app.utils.metrics import timed
+from app.config.database import DB_CONFIG
+from app.config.settings import BOOKING_EXPORT_FETCH_SIZE, BOOKING_EXPORT_CHUNK_ROWS
+from datetime import date, datetime, time
+from decimal import Decimal
+import csv
+import io
+import json
+import uuid
+
+# Column order of the export; booking_details is flattened into plain columns
+EXPORT_COLUMNS = [
+    'booking_id', 'user_id', 'desk_id', 'slot_id', 'status', 'booking_date',
+    'created_at', 'updated_at', 'location_id', 'location_name',
+    'user_name', 'user_email', 'user_phone',
+    'desk_name', 'desk_floor_number', 'building_name', 'building_address',
+    'slot_type', 'slot_start_time', 'slot_end_time', 'slot_time_zone',
+    'desk_type', 'price'
+]
+
+# Ordered by primary key so the cursor walks the index instead of sorting
+# the whole range before the first row is sent
+EXPORT_SQL = """
+    SELECT
+        bt.id,
+        bt.user_id,
+        bt.desk_id,
+        bt.slot_id,
+        bt.status,
+        bt.booking_date,
+        bt.created_at,
+        bt.updated_at,
+        d.location_id,
+        l.name,
+        bt.booking_details->'user_details'->>'name',
+        bt.booking_details->'user_details'->>'email',
+        bt.booking_details->'user_details'->>'phone',
+        bt.booking_details->'desk_details'->>'name',
+        (bt.booking_details->'desk_details'->>'floor_number')::int,
+        bt.booking_details->'building_information'->>'name',
+        bt.booking_details->'building_information'->>'address',
+        bt.booking_details->'slot_details'->>'type',
+        bt.booking_details->'slot_details'->>'start_time',
+        bt.booking_details->'slot_details'->>'end_time',
+        bt.booking_details->'slot_details'->>'time_zone',
+        bt.booking_details->'desk_type'->>'type',
+        (bt.booking_details->'pricing'->>'price')::numeric
+    FROM sena.booking_transactions bt
+    LEFT JOIN sena.desks d ON d.id = bt.desk_id
+    LEFT JOIN sena.locations l ON l.id = d.location_id
+    WHERE (%s::date IS NULL OR bt.booking_date >= %s::date)
+    AND (%s::date IS NULL OR bt.booking_date <= %s::date)
+    AND (%s::uuid IS NULL OR d.location_id = %s::uuid)
+    AND (%s::text[] IS NULL OR bt.status = ANY(%s::text[]))
+    ORDER BY bt.id
+"""
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+def _plain(value):
+    """Convert a column value to something csv and json can write"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+class BookingExport:
+    @staticmethod
+    def _csv_chunks(rows) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for count, row in enumerate(rows, 1):
+            writer.writerow([_plain(value) for value in row])
+            if count % BOOKING_EXPORT_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    @staticmethod
+    def _ndjson_chunks(rows) -> Iterator[str]:
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row)))) + '\n')
+            if len(chunk) >= BOOKING_EXPORT_CHUNK_ROWS:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+    @staticmethod
+    @timed
+    def stream_bookings(export_format: str, from_date: Optional[str] = None, to_date: Optional[str] = None,
+                        location_id: Optional[str] = None, statuses: Optional[List[str]] = None) -> Tuple[Union[Iterator[str], Dict], int]:
+        """
+        Stream booking transactions as CSV or NDJSON from a server-side cursor.
+        Rows are only fetched as the client reads, so memory stays bounded by
+        one fetch batch however many rows match.
+        Args:
+            export_format: 'csv' or 'ndjson'
+            from_date: Only export bookings on or after this booking date (YYYY-MM-DD)
+            to_date: Only export bookings on or before this booking date (YYYY-MM-DD)
+            location_id: Only export bookings for desks at this location
+            statuses: Only export bookings with these statuses
+        Returns: Tuple of (iterator of text chunks or error dict, status_code)
+        """
+        if export_format not in EXPORT_FORMATS:
+            return {"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}, 400
+
+        conn = get_db_connection(DB_CONFIG, read_only=True)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            db_cursor = conn.cursor(name=f"booking_export_{uuid.uuid4().hex}")
+            db_cursor.itersize = BOOKING_EXPORT_FETCH_SIZE
+            db_cursor.execute(EXPORT_SQL, (
+                from_date, from_date, to_date, to_date,
+                location_id, location_id, statuses or None, statuses or None
+            ))
+        except Exception as e:
+            conn.close()
+            print(f"[BookingExport ERROR] Failed to start export: {str(e)}")
+            return {"error": f"Failed to export bookings: {str(e)}"}, 500
+
+        chunks = BookingExport._csv_chunks if export_format == 'csv' else BookingExport._ndjson_chunks
+
+        def generate():
+            try:
+                yield from chunks(db_cursor)
+            except Exception as e:
+                # Re-raised so the server drops the connection and the client
+                # sees an incomplete transfer rather than a short, valid file
+                print(f"[BookingExport ERROR] Export aborted: {str(e)}")
+                raise
+            finally:
+                conn.close()
+
+        return generate(), 200
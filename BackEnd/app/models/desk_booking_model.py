@@ -1,14 +1,17 @@
 from typing import Dict, Tuple
-from app.utils.db_utils import get_db_connection
+from app.utils.db_utils import get_db_connection, replica_router
+from app.utils.metrics import timed
 from app.config.database import DB_CONFIG
 
 class DeskBooking:
     @staticmethod
-    def book_from_hold(booking_id: int) -> Tuple[Dict, int]:
+    @timed
+    def book_from_hold(booking_id: int, booking_date: str) -> Tuple[Dict, int]:
         """
         Book a desk that is currently on hold by updating the booking transaction status
         Args:
             booking_id: ID of the booking transaction
+            booking_date: Date of the booking (YYYY-MM-DD), so only its partition is read
         Returns: Tuple of (response_dict, status_code)
         """
         conn = get_db_connection(DB_CONFIG)
@@ -22,8 +25,8 @@ class DeskBooking:
             cursor.execute("""
                 SELECT user_id, desk_id, slot_id, status, booking_details
                 FROM sena.booking_transactions 
-                WHERE id = %s
-            """, (booking_id,))
+                WHERE id = %s AND booking_date = %s
+            """, (booking_id, booking_date))
             
             booking = cursor.fetchone()
             if not booking:
@@ -40,12 +43,13 @@ class DeskBooking:
             cursor.execute("""
                 UPDATE sena.booking_transactions 
                 SET status = 'booked'
-                WHERE id = %s
+                WHERE id = %s AND booking_date = %s
                 RETURNING id, user_id, desk_id, slot_id, status, booking_details
-            """, (booking_id,))
+            """, (booking_id, booking_date))
             
             conn.commit()
             result = cursor.fetchone()
+            replica_router.note_write(result[1])
             
             return {
                 "message": "Desk booked successfully",
@@ -1,10 +1,96 @@
-from typing import Dict, Tuple
-from app.utils.db_utils import get_db_connection
+from typing import Dict, List, Optional, Tuple
+from app.utils.db_utils import get_db_connection, replica_router
+from app.utils.metrics import timed
+from app.utils.prepared_statements import PreparedStatement
 from app.config.database import DB_CONFIG
 import json
+import psycopg2.errors
+
+HOLD_CONFLICT_STATEMENT = PreparedStatement('hold_conflict', ['int', 'int', 'date'], """
+    SELECT status 
+    FROM sena.booking_transactions 
+    WHERE desk_id = $1 AND slot_id = $2 
+    AND booking_date = $3
+    AND status IN ('booked', 'held')
+""")
+
+HOLD_CONFLICT_ERROR = "Desk is already booked or held for this slot and date"
+
+# Holds from today on; the date bound lets Postgres skip past partitions
+HOLD_STATUS_SQL = """
+    SELECT bt.id, bt.user_id, bt.status, u.email, bt.booking_date
+    FROM sena.booking_transactions bt
+    JOIN sena.users u ON bt.user_id = u.id
+    WHERE bt.desk_id = %s AND bt.slot_id = %s 
+    AND bt.status = 'held'
+    AND bt.booking_date >= CURRENT_DATE
+"""
+
+# Status of many (desk, slot, date) keys at once, from the trigger-maintained
+# desk_slot_day_status rollup by primary key
+HOLD_STATUS_BATCH_STATEMENT = PreparedStatement('hold_status_batch', ['int[]', 'int[]', 'date[]'], """
+    SELECT k.desk_id, k.slot_id, k.booking_date,
+        CASE
+            WHEN st.booked_count > 0 THEN 'booked'
+            WHEN st.held_count > 0 THEN 'held'
+            ELSE 'available'
+        END
+    FROM unnest($1, $2, $3) AS k(desk_id, slot_id, booking_date)
+    LEFT JOIN sena.desk_slot_day_status st
+        ON st.booking_date = k.booking_date AND st.desk_id = k.desk_id AND st.slot_id = k.slot_id
+""")
+
+# Snapshot of user, desk, building, slot and pricing stored with the booking
+BOOKING_DETAILS_STATEMENT = PreparedStatement('booking_details', ['text', 'int', 'uuid', 'int'], """
+    SELECT json_build_object(
+        'user_details', json_build_object(
+            'name', COALESCE(u.first_name, 'XXXXXXX'),
+            'email', COALESCE(u.email, 'XXXXXXX'),
+            'phone', COALESCE(u.phone, 'XXXXXXX'),
+            'Description', d.description,
+            'Capacity', d.capacity,
+            'floor_number', d.floor_number
+        ),
+        'desk_details', json_build_object(
+            'name', d.name,
+            'description', d.description,
+            'capacity', d.capacity,
+            'floor_number', d.floor_number
+        ),
+        'building_information', json_build_object(
+            'name', b.name,
+            'address', b.address,
+            'floor_count', b.floor_count,
+            'amenities', b.amenities,
+            'operating_hours', b.operating_hours
+        ),
+        'slot_details', json_build_object(
+            'type', sm.slot_type,
+            'start_time', sm.start_time,
+            'end_time', sm.end_time,
+            'time_zone', sm.time_zone,
+            'date', $1
+        ),
+        'desk_type', json_build_object(
+            'type', dtm.type,
+            'capacity', dtm.capacity
+        ),
+        'pricing', json_build_object(
+            'price', dp.price
+        )
+    ) AS booking_json
+    FROM sena.desks AS d
+    LEFT JOIN sena.buildings AS b ON b.id = d.building_id
+    LEFT JOIN sena.slot_master AS sm ON sm.id = $2
+    LEFT JOIN sena.desk_type_master AS dtm ON dtm.id = d.desk_type_id
+    LEFT JOIN sena.desk_pricing AS dp ON dp.slot_id = sm.id AND dp.desk_type_id = dtm.id
+    LEFT JOIN sena.users as u on u.id = $3
+    WHERE d.id = $4
+""")
 
 class DeskHold:
     @staticmethod
+    @timed
     def put_desk_on_hold(user_id: str, desk_id: int, slot_id: int, booking_date: str) -> Tuple[Dict, int]:
         """
         Put a desk on hold for a specific user and slot
@@ -23,67 +109,16 @@ class DeskHold:
             cursor = conn.cursor()
             
             # Check if desk is already booked or held for the slot and date
-            cursor.execute("""
-                SELECT status 
-                FROM sena.booking_transactions 
-                WHERE desk_id = %s AND slot_id = %s 
-                AND booking_date = %s
-                AND status IN ('booked', 'held')
-            """, (desk_id, slot_id, booking_date))
+            HOLD_CONFLICT_STATEMENT.execute(cursor, (desk_id, slot_id, booking_date))
             
             existing_booking = cursor.fetchone()
             if existing_booking:
                 return {
-                    "error": "Desk is already booked or held for this slot and date"
+                    "error": HOLD_CONFLICT_ERROR
                 }, 400
 
             # Get booking details JSON
-            cursor.execute("""
-                SELECT json_build_object(
-                    'user_details', json_build_object(
-                        'name', COALESCE(u.first_name, 'XXXXXXX'),
-                        'email', COALESCE(u.email, 'XXXXXXX'),
-                        'phone', COALESCE(u.phone, 'XXXXXXX'),
-                        'Description', d.description,
-                        'Capacity', d.capacity,
-                        'floor_number', d.floor_number
-                    ),
-                    'desk_details', json_build_object(
-                        'name', d.name,
-                        'description', d.description,
-                        'capacity', d.capacity,
-                        'floor_number', d.floor_number
-                    ),
-                    'building_information', json_build_object(
-                        'name', b.name,
-                        'address', b.address,
-                        'floor_count', b.floor_count,
-                        'amenities', b.amenities,
-                        'operating_hours', b.operating_hours
-                    ),
-                    'slot_details', json_build_object(
-                        'type', sm.slot_type,
-                        'start_time', sm.start_time,
-                        'end_time', sm.end_time,
-                        'time_zone', sm.time_zone,
-                        'date', %s
-                    ),
-                    'desk_type', json_build_object(
-                        'type', dtm.type,
-                        'capacity', dtm.capacity
-                    ),
-                    'pricing', json_build_object(
-                        'price', dp.price
-                    )
-                ) AS booking_json
-                FROM sena.desks AS d
-                LEFT JOIN sena.buildings AS b ON b.id = d.building_id
-                LEFT JOIN sena.slot_master AS sm ON sm.id = %s
-                LEFT JOIN sena.desk_type_master AS dtm ON dtm.id = d.desk_type_id
-                LEFT JOIN sena.desk_pricing AS dp ON dp.slot_id = sm.id AND dp.desk_type_id = dtm.id
-                LEFT JOIN sena.users as u on u.id = %s
-                WHERE d.id = %s
-            """, (booking_date, slot_id, user_id, desk_id))
+            BOOKING_DETAILS_STATEMENT.execute(cursor, (booking_date, slot_id, user_id, desk_id))
             
             booking_details = cursor.fetchone()[0]
             
@@ -99,6 +134,7 @@ class DeskHold:
             """, (user_id, desk_id, slot_id, booking_details_json, booking_date))
             
             conn.commit()
+            replica_router.note_write(user_id)
             result = cursor.fetchone()
             
             return {
@@ -109,10 +145,16 @@ class DeskHold:
                     "desk_id": result[2],
                     "slot_id": result[3],
                     "status": result[4],
-                    "booking_date": result[5]
+                    "booking_date": result[5].isoformat()
                 }
             }, 201
 
+        except psycopg2.errors.UniqueViolation:
+            # Another hold for the slot committed after the conflict check
+            conn.rollback()
+            return {
+                "error": HOLD_CONFLICT_ERROR
+            }, 400
         except Exception as e:
             conn.rollback()
             return {"error": str(e)}, 500
@@ -120,28 +162,23 @@ class DeskHold:
             conn.close()
 
     @staticmethod
-    def get_desk_hold_status(desk_id: int, slot_id: int) -> Tuple[Dict, int]:
+    @timed
+    def get_desk_hold_status(desk_id: int, slot_id: int, user_id: Optional[str] = None) -> Tuple[Dict, int]:
         """
         Check if a desk is on hold for a specific slot
         Args:
             desk_id: ID of the desk
             slot_id: ID of the slot
+            user_id: UUID of the requesting user, so they read their own holds
         Returns: Tuple of (response_dict, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
         if not conn:
             return {"error": "Database connection failed"}, 500
 
         try:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT bt.id, bt.user_id, bt.status, u.email, bt.booking_date
-                FROM sena.booking_transactions bt
-                JOIN sena.users u ON bt.user_id = u.id
-                WHERE bt.desk_id = %s AND bt.slot_id = %s 
-                AND bt.status = 'held'
-                AND bt.booking_date >= CURRENT_DATE
-            """, (desk_id, slot_id))
+            cursor.execute(HOLD_STATUS_SQL, (desk_id, slot_id))
             
             hold_info = cursor.fetchone()
             
@@ -168,11 +205,47 @@ class DeskHold:
             conn.close()
 
     @staticmethod
-    def delete_held_booking(booking_id: int) -> Tuple[Dict, int]:
+    @timed
+    def get_hold_statuses(slots: List[Tuple[int, int, str]], user_id: Optional[str] = None) -> Tuple[Dict, int]:
+        """
+        Check many desk slots on their booking dates with one query
+        Args:
+            slots: (desk_id, slot_id, booking_date) tuples, dates as YYYY-MM-DD
+            user_id: UUID of the requesting user, so they read their own holds
+        Returns: Tuple of ({"statuses": {"desk_id:slot_id:booking_date": status}}, status_code)
+        """
+        keys = list(dict.fromkeys(slots))
+        if not keys:
+            return {"statuses": {}}, 200
+
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            cursor = conn.cursor()
+            desk_ids, slot_ids, booking_dates = (list(column) for column in zip(*keys))
+            HOLD_STATUS_BATCH_STATEMENT.execute(cursor, (desk_ids, slot_ids, booking_dates))
+            return {
+                "statuses": {
+                    f"{desk_id}:{slot_id}:{booking_date.isoformat()}": status
+                    for desk_id, slot_id, booking_date, status in cursor.fetchall()
+                }
+            }, 200
+
+        except Exception as e:
+            return {"error": str(e)}, 500
+        finally:
+            conn.close()
+
+    @staticmethod
+    @timed
+    def delete_held_booking(booking_id: int, booking_date: str) -> Tuple[Dict, int]:
         """
         Delete a held booking transaction by its ID
         Args:
             booking_id: ID of the booking transaction to delete
+            booking_date: Date of the booking (YYYY-MM-DD), so only its partition is read
         Returns: Tuple of (response_dict, status_code)
         """
         conn = get_db_connection(DB_CONFIG)
@@ -186,8 +259,8 @@ class DeskHold:
             cursor.execute("""
                 SELECT id 
                 FROM sena.booking_transactions 
-                WHERE id = %s AND status = 'held'
-            """, (booking_id,))
+                WHERE id = %s AND booking_date = %s AND status = 'held'
+            """, (booking_id, booking_date))
             
             if not cursor.fetchone():
                 return {
@@ -197,12 +270,14 @@ class DeskHold:
             # Delete the booking
             cursor.execute("""
                 DELETE FROM sena.booking_transactions
-                WHERE id = %s AND status = 'held'
-                RETURNING id
-            """, (booking_id,))
+                WHERE id = %s AND booking_date = %s AND status = 'held'
+                RETURNING id, user_id
+            """, (booking_id, booking_date))
             
             deleted_id = cursor.fetchone()
             conn.commit()
+            if deleted_id:
+                replica_router.note_write(deleted_id[1])
             
             if deleted_id:
                 return {
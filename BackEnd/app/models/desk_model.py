@@ -1,6 +1,11 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional, Union
 from app.utils.db_utils import get_db_connection
+from app.utils.metrics import record, record_call, timed, timer
+from app.utils.prepared_statements import PreparedStatement
 from app.config.database import DB_CONFIG
+from app.config.settings import USER_BOOKINGS_STREAM_BATCH_SIZE
+from datetime import datetime
+import base64
 import json
 import uuid
 import time
@@ -12,9 +17,163 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+# Availability for one date. Slot status comes from the trigger-maintained
+# desk_slot_day_status rollup by primary key. Each combination of filters
+# ($1 locations, $2 desk types, $3 slots) is its own statement that leaves
+# the missing ones out: after five executions Postgres may switch to a
+# generic plan, and "$1 IS NULL OR d.location_id = ANY($1)" can't be an
+# index condition in one. Unused parameters are passed as NULL.
+_DESK_AVAILABILITY_SQL = """
+    WITH desk_base AS (
+        SELECT 
+            d.id AS desk_id,
+            d.name AS desk_name,
+            d.floor_number,
+            d.capacity,
+            d.description,
+            d.status AS desk_status,
+            d.rating,
+            d.desk_type_id,
+            b.name AS building_name,
+            b.address AS building_address,
+            b.amenities,
+            b.operating_hours,
+            l.name AS city
+        FROM sena.desks d
+        INNER JOIN sena.buildings b ON b.id = d.building_id
+        INNER JOIN sena.locations l ON l.id = d.location_id
+        WHERE {location_filter}
+        AND {desk_type_filter}
+    ),
+    active_slots AS (
+        SELECT 
+            sm.id AS slot_id,
+            sm.slot_type,
+            sm.start_time,
+            sm.end_time,
+            sm.time_zone
+        FROM sena.slot_master sm
+        WHERE sm.is_active = true
+        AND {slot_filter}
+    ),
+    desk_pricing_active AS (
+        SELECT 
+            dp.desk_type_id,
+            dp.slot_id,
+            dp.price
+        FROM sena.desk_pricing dp
+        WHERE dp.is_active = true
+    )
+    SELECT 
+        db.desk_id,
+        db.desk_name,
+        db.floor_number,
+        db.capacity,
+        db.description,
+        db.desk_status,
+        db.rating,
+        db.building_name,
+        db.building_address,
+        db.amenities,
+        db.operating_hours,
+        db.city,
+        JSON_AGG(
+            JSON_BUILD_OBJECT(
+                'slot_id', aslt.slot_id,
+                'slot_type', aslt.slot_type,
+                'start_time', aslt.start_time,
+                'end_time', aslt.end_time,
+                'time_zone', aslt.time_zone,
+                'status', CASE
+                    WHEN st.booked_count > 0 THEN 'booked'
+                    WHEN st.held_count > 0 THEN 'held'
+                    ELSE 'available'
+                END,
+                'price', COALESCE(dpa.price, 0)
+            ) ORDER BY dpa.price ASC NULLS LAST
+        ) AS slots,
+        db.desk_type_id
+    FROM desk_base db
+    CROSS JOIN active_slots aslt
+    LEFT JOIN sena.desk_slot_day_status st
+        ON st.booking_date = $4 AND st.desk_id = db.desk_id AND st.slot_id = aslt.slot_id
+    LEFT JOIN desk_pricing_active dpa ON dpa.desk_type_id = db.desk_type_id AND dpa.slot_id = aslt.slot_id
+    GROUP BY 
+        db.desk_id, db.desk_name, db.floor_number, db.capacity, 
+        db.description, db.desk_status, db.rating, db.building_name,
+        db.building_address, db.amenities, db.operating_hours, db.city,
+        db.desk_type_id
+    ORDER BY 
+        COALESCE(db.rating, 0) DESC,
+        (SELECT MIN(dpa2.price) FROM desk_pricing_active dpa2 WHERE dpa2.desk_type_id = db.desk_type_id) ASC NULLS LAST
+"""
+
+DESK_AVAILABILITY_STATEMENTS: Dict[Tuple[bool, bool, bool], PreparedStatement] = {
+    (locations, desk_types, slots): PreparedStatement(
+        'desk_availability' + ('_locations' if locations else '') + ('_desk_types' if desk_types else '')
+        + ('_slots' if slots else ''),
+        ['uuid[]', 'int[]', 'int[]', 'date'],
+        _DESK_AVAILABILITY_SQL.format(
+            location_filter='d.location_id = ANY($1)' if locations else 'true',
+            desk_type_filter='d.desk_type_id = ANY($2)' if desk_types else 'true',
+            slot_filter='sm.id = ANY($3)' if slots else 'true'
+        )
+    )
+    for locations in (False, True) for desk_types in (False, True) for slots in (False, True)
+}
+
+def desk_availability_statement(location_ids: Optional[List[str]], desk_type_ids: Optional[List[int]],
+                                slot_ids: Optional[List[int]]) -> PreparedStatement:
+    """The availability statement for the filters that are set"""
+    return DESK_AVAILABILITY_STATEMENTS[(bool(location_ids), bool(desk_type_ids), bool(slot_ids))]
+
+USER_BOOKINGS_STATEMENT = PreparedStatement('user_bookings', ['uuid'], """
+    SELECT 
+        id,
+        booking_details,
+        updated_at,
+        status
+    FROM sena.booking_transactions
+    WHERE user_id = $1
+    ORDER BY updated_at DESC
+""")
+
+# Keyset pages of a user's history, newest first. The first page and the
+# following ones are separate statements so the (updated_at, id) bound is
+# always an index condition. $2 statuses and $3/$4 booking date range are
+# optional (NULL matches everything).
+_USER_BOOKINGS_PAGE_SQL = """
+    SELECT 
+        id,
+        booking_details,
+        updated_at,
+        status
+    FROM sena.booking_transactions
+    WHERE user_id = $1
+    AND ($2 IS NULL OR status = ANY($2))
+    AND ($3 IS NULL OR booking_date >= $3)
+    AND ($4 IS NULL OR booking_date <= $4)
+    {keyset}
+    ORDER BY updated_at DESC, id DESC
+    LIMIT $5
+"""
+
+USER_BOOKINGS_FIRST_PAGE_STATEMENT = PreparedStatement(
+    'user_bookings_first_page',
+    ['uuid', 'text[]', 'date', 'date', 'int'],
+    _USER_BOOKINGS_PAGE_SQL.format(keyset="")
+)
+
+USER_BOOKINGS_NEXT_PAGE_STATEMENT = PreparedStatement(
+    'user_bookings_next_page',
+    ['uuid', 'text[]', 'date', 'date', 'int', 'timestamptz', 'int'],
+    _USER_BOOKINGS_PAGE_SQL.format(keyset="AND (updated_at, id) < ($6, $7)")
+)
+
 class DeskData:
     @staticmethod
-    def get_desk_availability(location_ids: Optional[List[str]] = None, desk_type_ids: Optional[List[str]] = None, slot_type_ids: Optional[List[str]] = None, booking_date: Optional[str] = None) -> Tuple[Dict, int]:
+    @timed
+    def get_desk_availability(location_ids: Optional[List[str]] = None, desk_type_ids: Optional[List[str]] = None, slot_type_ids: Optional[List[str]] = None, booking_date: Optional[str] = None, user_id: Optional[str] = None) -> Tuple[Dict, int]:
         """
         Get desk availability data with slots and pricing, with optional filters.
         Args:
@@ -22,157 +181,39 @@ class DeskData:
             desk_type_ids (Optional[List[str]]): List of desk type IDs to filter by.
             slot_type_ids (Optional[List[str]]): List of slot type IDs to filter by.
             booking_date (Optional[str]): The date to check availability for (YYYY-MM-DD).
+            user_id (Optional[str]): UUID of the requesting user, so they read their own holds.
         Returns: Tuple of (desk_data_dict, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
         if not conn:
             return {"error": "Database connection failed"}, 500
 
         try:
             cursor = conn.cursor()
-            query_params = []
-            
-            # Build WHERE conditions more efficiently
-            where_conditions = []
-            
-            if location_ids:
-                filtered_location_ids = [loc_id for loc_id in location_ids if loc_id]
-                if filtered_location_ids:
-                    where_conditions.append("d.location_id = ANY(%s::uuid[])")
-                    query_params.append(filtered_location_ids)
-            
-            if desk_type_ids:
-                filtered_desk_type_ids = []
-                for dt_id in desk_type_ids:
-                    if dt_id:
-                        try:
-                            filtered_desk_type_ids.append(int(dt_id))
-                        except ValueError:
-                            continue
-                if filtered_desk_type_ids:
-                    where_conditions.append("d.desk_type_id = ANY(%s)")
-                    query_params.append(filtered_desk_type_ids)
-
-            # Build the main WHERE clause
-            main_where = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
-
-            # Handle slot type filtering separately
-            slot_type_where = ""
-            if slot_type_ids:
-                filtered_slot_type_ids = []
-                for st_id in slot_type_ids:
-                    if st_id:
-                        try:
-                            filtered_slot_type_ids.append(int(st_id))
-                        except ValueError:
-                            continue
-                if filtered_slot_type_ids:
-                    slot_type_where = "AND sm.id = ANY(%s)"
-                    query_params.append(filtered_slot_type_ids)
-
-            # Use current date if booking_date not provided
-            target_date = booking_date or time.strftime('%Y-%m-%d')
-            query_params.append(target_date)
-
-            # Optimized query with better structure and indexing considerations
-            sql_query = f"""
-                WITH desk_base AS (
-                    SELECT 
-                        d.id AS desk_id,
-                        d.name AS desk_name,
-                        d.floor_number,
-                        d.capacity,
-                        d.description,
-                        d.status AS desk_status,
-                        d.rating,
-                        d.desk_type_id,
-                        b.name AS building_name,
-                        b.address AS building_address,
-                        b.amenities,
-                        b.operating_hours,
-                        l.name AS city
-                    FROM sena.desks d
-                    INNER JOIN sena.buildings b ON b.id = d.building_id
-                    INNER JOIN sena.locations l ON l.id = d.location_id
-                    {main_where}
-                ),
-                active_slots AS (
-                    SELECT 
-                        sm.id AS slot_id,
-                        sm.slot_type,
-                        sm.start_time,
-                        sm.end_time,
-                        sm.time_zone
-                    FROM sena.slot_master sm
-                    WHERE sm.is_active = true
-                    {slot_type_where}
-                ),
-                booking_status AS (
-                    SELECT 
-                        bt.desk_id,
-                        bt.slot_id,
-                        CASE 
-                            WHEN COUNT(CASE WHEN bt.status = 'booked' THEN 1 END) > 0 THEN 'booked'
-                            WHEN COUNT(CASE WHEN bt.status = 'held' THEN 1 END) > 0 THEN 'held'
-                            ELSE 'available'
-                        END AS slot_status
-                    FROM sena.booking_transactions bt
-                    WHERE bt.booking_date = %s
-                    GROUP BY bt.desk_id, bt.slot_id
-                ),
-                desk_pricing_active AS (
-                    SELECT 
-                        dp.desk_type_id,
-                        dp.slot_id,
-                        dp.price
-                    FROM sena.desk_pricing dp
-                    WHERE dp.is_active = true
-                )
-                SELECT 
-                    db.desk_id,
-                    db.desk_name,
-                    db.floor_number,
-                    db.capacity,
-                    db.description,
-                    db.desk_status,
-                    db.rating,
-                    db.building_name,
-                    db.building_address,
-                    db.amenities,
-                    db.operating_hours,
-                    db.city,
-                    JSON_AGG(
-                        JSON_BUILD_OBJECT(
-                            'slot_id', aslt.slot_id,
-                            'slot_type', aslt.slot_type,
-                            'start_time', aslt.start_time,
-                            'end_time', aslt.end_time,
-                            'time_zone', aslt.time_zone,
-                            'status', COALESCE(bs.slot_status, 'available'),
-                            'price', COALESCE(dpa.price, 0)
-                        ) ORDER BY dpa.price ASC NULLS LAST
-                    ) AS slots
-                FROM desk_base db
-                CROSS JOIN active_slots aslt
-                LEFT JOIN booking_status bs ON bs.desk_id = db.desk_id AND bs.slot_id = aslt.slot_id
-                LEFT JOIN desk_pricing_active dpa ON dpa.desk_type_id = db.desk_type_id AND dpa.slot_id = aslt.slot_id
-                GROUP BY 
-                    db.desk_id, db.desk_name, db.floor_number, db.capacity, 
-                    db.description, db.desk_status, db.rating, db.building_name,
-                    db.building_address, db.amenities, db.operating_hours, db.city,
-                    db.desk_type_id
-                ORDER BY 
-                    COALESCE(db.rating, 0) DESC,
-                    (SELECT MIN(dpa2.price) FROM desk_pricing_active dpa2 WHERE dpa2.desk_type_id = db.desk_type_id) ASC NULLS LAST;
-            """
-
-            cursor.execute(sql_query, tuple(query_params))
-            results = cursor.fetchall()
+
+            # Filters that are missing or empty are passed as NULL and pick
+            # the statement that doesn't filter on them
+            location_filter = [loc_id for loc_id in location_ids or [] if loc_id] or None
+            desk_type_filter = DeskData._int_filter(desk_type_ids)
+            slot_type_filter = DeskData._int_filter(slot_type_ids)
+
+            statement = desk_availability_statement(location_filter, desk_type_filter, slot_type_filter)
+            statement.execute(cursor, (
+                location_filter,
+                desk_type_filter,
+                slot_type_filter,
+                booking_date or time.strftime('%Y-%m-%d')
+            ))
+            # Decoding the JSON slot column happens here, not in the query
+            with timer('fetch_rows'):
+                results = cursor.fetchall()
             
             if not results:
                 return {"desks": []}, 200
 
             # Process results more efficiently
+            shape_started = time.perf_counter()
+            slot_rules_seconds = 0.0
             desks_data = []
             for row in results:
                 desk_data = {
@@ -188,7 +229,8 @@ class DeskData:
                     'amenities': row[9],
                     'operating_hours': row[10],
                     'city': row[11],
-                    'slots': row[12] if row[12] else []
+                    'slots': row[12] if row[12] else [],
+                    'desk_type_id': row[13]
                 }
                 
                 # Convert Decimal values in slots to float
@@ -198,9 +240,13 @@ class DeskData:
                             slot['price'] = float(slot['price'])
                 
                 # Apply slot availability rules efficiently
+                rules_started = time.perf_counter()
                 DeskData._apply_slot_rules(desk_data)
+                slot_rules_seconds += time.perf_counter() - rules_started
                 desks_data.append(desk_data)
 
+            record('shape_rows', time.perf_counter() - shape_started - slot_rules_seconds)
+            record('slot_rules', slot_rules_seconds)
             return {"desks": desks_data}, 200
 
         except Exception as e:
@@ -209,6 +255,18 @@ class DeskData:
         finally:
             conn.close()
 
+    @staticmethod
+    def _int_filter(values: Optional[List[str]]) -> Optional[List[int]]:
+        """Keep the values that parse as integers; None if nothing is left"""
+        filtered = []
+        for value in values or []:
+            if value:
+                try:
+                    filtered.append(int(value))
+                except ValueError:
+                    continue
+        return filtered or None
+
     @staticmethod
     def _apply_slot_rules(desk_data):
         """Apply slot availability rules more efficiently"""
@@ -255,46 +313,7 @@ class DeskData:
             desk_data['desk_status'] = 'available'
 
     @staticmethod
-    def hold_desk_slot(user_id: str, desk_id: int, slot_id: int) -> Tuple[Dict, int]:
-        """
-        Puts a desk slot on hold in the booking_transactions table.
-        Args:
-            user_id (str): UUID of the user.
-            desk_id (int): ID of the desk.
-            slot_id (int): ID of the slot.
-        Returns: Tuple of (response_dict, status_code)
-        """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
-            return {"error": "Database connection failed"}, 500
-
-        try:
-            cursor = conn.cursor()
-            status = "held" # Default status for holding
-
-            # Assuming the booking_transactions table has: id (SERIAL), user_id, desk_id, slot_id, status
-            # We omit 'id' in the INSERT statement as it's SERIAL and auto-generated
-            insert_query = """
-                INSERT INTO sena.booking_transactions(
-                    user_id, desk_id, slot_id, status)
-                VALUES (%s, %s, %s, %s);
-            """
-            cursor.execute(insert_query, (user_id, desk_id, slot_id, status))
-            conn.commit()
-            
-            # If you need the generated ID, you can fetch it after commit
-            # For SERIAL, use: new_id = cursor.fetchone()[0] after RETURNING id; in the query
-            
-            return {"message": "Desk slot held successfully"}, 201
-
-        except Exception as e:
-            conn.rollback()
-            print(f"[ERROR] Failed to hold desk slot: {str(e)}")
-            return {"error": f"Failed to hold desk slot: {str(e)}"}, 500
-        finally:
-            conn.close()
-
-    @staticmethod
+    @timed
     def get_user_bookings(user_id: str) -> Tuple[Dict, int]:
         """
         Get all bookings for a specific user
@@ -302,23 +321,14 @@ class DeskData:
             user_id: UUID of the user
         Returns: Tuple of (response_dict, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
         if not conn:
             return {"error": "Database connection failed"}, 500
 
         try:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                SELECT 
-                    id,
-                    booking_details,
-                    updated_at,
-                    status
-                FROM sena.booking_transactions
-                WHERE user_id = %s
-                ORDER BY updated_at DESC
-            """, (user_id,))
+            USER_BOOKINGS_STATEMENT.execute(cursor, (user_id,))
             
             bookings = cursor.fetchall()
             
@@ -341,4 +351,138 @@ class DeskData:
             print(f"[DeskData ERROR] Failed to fetch user bookings: {str(e)}")
             return {"error": f"Failed to fetch user bookings: {str(e)}"}, 500
         finally:
-            conn.close() 
\ No newline at end of file
+            conn.close()
+
+    @staticmethod
+    def _booking_row(booking) -> Dict:
+        return {
+            "booking_id": booking[0],
+            "booking_details": booking[1],
+            "updated_at": booking[2].isoformat() if booking[2] else None,
+            "status": booking[3]
+        }
+
+    @staticmethod
+    def encode_bookings_cursor(updated_at: datetime, booking_id: int) -> str:
+        """Opaque cursor pointing just after the given (updated_at, id)"""
+        raw = json.dumps([updated_at.isoformat(), booking_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_bookings_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Raises ValueError for a malformed cursor"""
+        try:
+            updated_at, booking_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return datetime.fromisoformat(updated_at), int(booking_id)
+        except Exception as e:
+            raise ValueError("Invalid cursor") from e
+
+    @staticmethod
+    @timed
+    def get_user_bookings_page(user_id: str, limit: int, cursor: Optional[str] = None, statuses: Optional[List[str]] = None, from_date: Optional[str] = None, to_date: Optional[str] = None) -> Tuple[Dict, int]:
+        """
+        Get one page of a user's bookings, newest first, using keyset pagination on (updated_at, id)
+        Args:
+            user_id: UUID of the user
+            limit: Maximum number of bookings to return
+            cursor: next_cursor from the previous page, None for the first page
+            statuses: Only return bookings with these statuses
+            from_date: Only return bookings on or after this booking date (YYYY-MM-DD)
+            to_date: Only return bookings on or before this booking date (YYYY-MM-DD)
+        Returns: Tuple of (response_dict with bookings and next_cursor, status_code)
+        """
+        try:
+            after = DeskData.decode_bookings_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            db_cursor = conn.cursor()
+            # One extra row tells us whether there is another page
+            params = (user_id, statuses or None, from_date, to_date, limit + 1)
+            if after is None:
+                USER_BOOKINGS_FIRST_PAGE_STATEMENT.execute(db_cursor, params)
+            else:
+                USER_BOOKINGS_NEXT_PAGE_STATEMENT.execute(db_cursor, params + after)
+            bookings = db_cursor.fetchall()
+
+            next_cursor = None
+            if len(bookings) > limit:
+                bookings = bookings[:limit]
+                next_cursor = DeskData.encode_bookings_cursor(bookings[-1][2], bookings[-1][0])
+
+            return {
+                "bookings": [DeskData._booking_row(booking) for booking in bookings],
+                "next_cursor": next_cursor
+            }, 200
+
+        except Exception as e:
+            print(f"[DeskData ERROR] Failed to fetch user bookings page: {str(e)}")
+            return {"error": f"Failed to fetch user bookings: {str(e)}"}, 500
+        finally:
+            conn.close()
+
+    @staticmethod
+    def stream_user_bookings(user_id: str, statuses: Optional[List[str]] = None, from_date: Optional[str] = None, to_date: Optional[str] = None) -> Tuple[Union[Iterator[str], Dict], int]:
+        """
+        Stream a user's whole booking history as a JSON document, reading it
+        through a server-side cursor so memory stays flat however long it is
+        Args:
+            user_id: UUID of the user
+            statuses: Only return bookings with these statuses
+            from_date: Only return bookings on or after this booking date (YYYY-MM-DD)
+            to_date: Only return bookings on or before this booking date (YYYY-MM-DD)
+        Returns: Tuple of (iterator of JSON text chunks or error dict, status_code)
+        """
+        # Timed by hand until the stream ends; @timed would stop when the generator is returned
+        start = time.perf_counter()
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            db_cursor = conn.cursor(name=f"user_bookings_{uuid.uuid4().hex}")
+            db_cursor.itersize = USER_BOOKINGS_STREAM_BATCH_SIZE
+            db_cursor.execute("""
+                SELECT 
+                    id,
+                    booking_details,
+                    updated_at,
+                    status
+                FROM sena.booking_transactions
+                WHERE user_id = %s
+                AND (%s::text[] IS NULL OR status = ANY(%s::text[]))
+                AND (%s::date IS NULL OR booking_date >= %s::date)
+                AND (%s::date IS NULL OR booking_date <= %s::date)
+                ORDER BY updated_at DESC, id DESC
+            """, (user_id, statuses or None, statuses or None, from_date, from_date, to_date, to_date))
+        except Exception as e:
+            conn.close()
+            print(f"[DeskData ERROR] Failed to stream user bookings: {str(e)}")
+            return {"error": f"Failed to fetch user bookings: {str(e)}"}, 500
+
+        def generate():
+            try:
+                chunk = ['{"bookings": [']
+                separator = ''
+                # Iterating a named cursor fetches itersize rows per round trip
+                for booking in db_cursor:
+                    chunk.append(separator + json.dumps(DeskData._booking_row(booking), cls=DecimalEncoder))
+                    separator = ', '
+                    if len(chunk) >= 100:
+                        yield ''.join(chunk)
+                        chunk = []
+                chunk.append(']}')
+                yield ''.join(chunk)
+            except Exception as e:
+                # Headers are already sent; the truncated document tells the client it failed
+                print(f"[DeskData ERROR] User bookings stream aborted: {str(e)}")
+            finally:
+                conn.close()
+                record_call('DeskData.stream_user_bookings', time.perf_counter() - start)
+
+        return generate(), 200
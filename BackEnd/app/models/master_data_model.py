@@ -1,70 +1,177 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from types import MappingProxyType
 from app.utils.db_utils import get_db_connection
+from app.utils.metrics import timed
 from app.config.database import DB_CONFIG
+from app.config.settings import MASTER_DATA_TTL_SECONDS, MASTER_DATA_RETRY_SECONDS
+import hashlib
+import json
+import threading
+import time
+
+class MasterDataSnapshot(NamedTuple):
+    """Immutable view of the master data tables at the time they were loaded"""
+    version: str
+    loaded_at: float
+    locations: Tuple[MappingProxyType, ...]
+    slots: Tuple[MappingProxyType, ...]
+    desk_types: Tuple[MappingProxyType, ...]
+
+    def as_dict(self) -> Dict:
+        return {
+            "locations": [dict(loc) for loc in self.locations],
+            "slots": [dict(slot) for slot in self.slots],
+            "desk_types": [dict(desk) for desk in self.desk_types]
+        }
 
 class MasterData:
+    _snapshot: Optional[MasterDataSnapshot] = None
+    _next_refresh_at: float = 0.0
+    _last_refresh_failed: bool = False
+    _refresh_lock = threading.Lock()
+
     @staticmethod
-    def get_locations() -> Tuple[List[Dict], int]:
+    def _load_snapshot() -> Optional[MasterDataSnapshot]:
         """
-        Get all locations
-        Returns: Tuple of (locations_list, status_code)
+        Load locations, slots and desk types with a single query
+        Returns: A new snapshot, or None if the database could not be read
         """
-        conn = get_db_connection(DB_CONFIG)
+        conn = get_db_connection(DB_CONFIG, read_only=True)
         if not conn:
-            return [], 500
+            return None
 
         try:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT l.id as location_id, l.name as location_name 
-                FROM sena.locations as l
+                SELECT
+                    (SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                        'location_id', l.id,
+                        'location_name', l.name
+                    ) ORDER BY l.name), '[]'::json)
+                    FROM sena.locations AS l),
+                    (SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                        'slot_id', s.id,
+                        'slot_type', s.slot_type,
+                        'start_time', TO_CHAR(s.start_time, 'HH24:MI:SS'),
+                        'end_time', TO_CHAR(s.end_time, 'HH24:MI:SS'),
+                        'time_zone', s.time_zone
+                    ) ORDER BY s.id), '[]'::json)
+                    FROM sena.slot_master AS s),
+                    (SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                        'desk_type_id', d.id,
+                        'type', d.type,
+                        'capacity', d.capacity
+                    ) ORDER BY d.id), '[]'::json)
+                    FROM sena.desk_type_master AS d)
             """)
-            
-            locations = cursor.fetchall()
-            return [
-                {
-                    "location_id": loc[0],
-                    "location_name": loc[1]
-                } for loc in locations
-            ], 200
+
+            locations, slots, desk_types = cursor.fetchone()
+
+            # Content hash so every worker reports the same version for the same data
+            version = hashlib.sha1(
+                json.dumps([locations, slots, desk_types], sort_keys=True).encode('utf-8')
+            ).hexdigest()[:16]
+
+            return MasterDataSnapshot(
+                version=version,
+                loaded_at=time.time(),
+                locations=tuple(MappingProxyType(loc) for loc in locations),
+                slots=tuple(MappingProxyType(slot) for slot in slots),
+                desk_types=tuple(MappingProxyType(desk) for desk in desk_types)
+            )
 
         except Exception as e:
-            return [], 500
+            print(f"[MasterData ERROR] Failed to load master data: {str(e)}")
+            return None
         finally:
             conn.close()
 
+    @staticmethod
+    def _refresh() -> Tuple[Optional[MasterDataSnapshot], int]:
+        """Load a new snapshot; callers must hold _refresh_lock"""
+        snapshot = MasterData._load_snapshot()
+        if snapshot is None:
+            MasterData._next_refresh_at = time.time() + MASTER_DATA_RETRY_SECONDS
+            MasterData._last_refresh_failed = True
+            return MasterData._snapshot, 500
+
+        MasterData._snapshot = snapshot
+        MasterData._last_refresh_failed = False
+        MasterData._next_refresh_at = snapshot.loaded_at + MASTER_DATA_TTL_SECONDS
+        return snapshot, 200
+
+    @staticmethod
+    @timed
+    def reload() -> Tuple[Optional[MasterDataSnapshot], int]:
+        """
+        Reload the master data snapshot from the database
+        Returns: Tuple of (snapshot, status_code). On failure the previous snapshot is kept
+        """
+        with MasterData._refresh_lock:
+            return MasterData._refresh()
+
+    @staticmethod
+    def _refresh_in_background() -> None:
+        """Start a refresh unless one is already running"""
+        if not MasterData._refresh_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                MasterData._refresh()
+            finally:
+                MasterData._refresh_lock.release()
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+    @staticmethod
+    def get_snapshot() -> Tuple[Optional[MasterDataSnapshot], int]:
+        """
+        Get the current master data snapshot, loading it on first use. Once it is
+        older than MASTER_DATA_TTL_SECONDS it keeps being served while a refresh
+        runs in the background.
+        Returns: Tuple of (snapshot, status_code)
+        """
+        snapshot = MasterData._snapshot
+        if snapshot is not None:
+            if time.time() >= MasterData._next_refresh_at:
+                MasterData._refresh_in_background()
+            return snapshot, 200
+
+        # Only the initial load is done inline
+        with MasterData._refresh_lock:
+            if MasterData._snapshot is not None:
+                return MasterData._snapshot, 200
+            return MasterData._refresh()
+
+    @staticmethod
+    def is_stale() -> bool:
+        """Whether the snapshot being served survived a failed refresh"""
+        return MasterData._last_refresh_failed and MasterData._snapshot is not None
+
+    @staticmethod
+    def get_locations() -> Tuple[List[Dict], int]:
+        """
+        Get all locations
+        Returns: Tuple of (locations_list, status_code)
+        """
+        snapshot, status_code = MasterData.get_snapshot()
+        if snapshot is None:
+            return [], status_code
+        return [dict(loc) for loc in snapshot.locations], 200
+
     @staticmethod
     def get_slots() -> Tuple[List[Dict], int]:
         """
         Get all slots
         Returns: Tuple of (slots_list, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
-            return [], 500
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT s.id as slot_id, s.slot_type, s.start_time, s.end_time, s.time_zone
-                FROM sena.slot_master as s
-            """)
-            
-            slots = cursor.fetchall()
-            return [
-                {
-                    "slot_id": slot[0],
-                    "slot_type": slot[1],
-                    "start_time": slot[2].strftime('%H:%M:%S') if slot[2] else None,
-                    "end_time": slot[3].strftime('%H:%M:%S') if slot[3] else None,
-                    "time_zone": slot[4]
-                } for slot in slots
-            ], 200
-
-        except Exception as e:
-            return [], 500
-        finally:
-            conn.close()
+        snapshot, status_code = MasterData.get_snapshot()
+        if snapshot is None:
+            return [], status_code
+        return [dict(slot) for slot in snapshot.slots], 200
 
     @staticmethod
     def get_desk_types() -> Tuple[List[Dict], int]:
@@ -72,30 +179,10 @@ class MasterData:
         Get all desk types
         Returns: Tuple of (desk_types_list, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
-            return [], 500
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT d.id as desk_type_id, d.type, d.capacity
-                FROM sena.desk_type_master as d
-            """)
-            
-            desk_types = cursor.fetchall()
-            return [
-                {
-                    "desk_type_id": desk[0],
-                    "type": desk[1],
-                    "capacity": desk[2]
-                } for desk in desk_types
-            ], 200
-
-        except Exception as e:
-            return [], 500
-        finally:
-            conn.close()
+        snapshot, status_code = MasterData.get_snapshot()
+        if snapshot is None:
+            return [], status_code
+        return [dict(desk) for desk in snapshot.desk_types], 200
 
     @staticmethod
     def get_all_master_data() -> Tuple[Dict, int]:
@@ -103,15 +190,10 @@ class MasterData:
         Get all master data (locations, slots, desk types)
         Returns: Tuple of (master_data_dict, status_code)
         """
-        locations, loc_status = MasterData.get_locations()
-        slots, slot_status = MasterData.get_slots()
-        desk_types, desk_status = MasterData.get_desk_types()
-
-        if any(status != 200 for status in [loc_status, slot_status, desk_status]):
+        snapshot, status_code = MasterData.get_snapshot()
+        if snapshot is None:
             return {"error": "Failed to fetch master data"}, 500
 
-        return {
-            "locations": locations,
-            "slots": slots,
-            "desk_types": desk_types
-        }, 200 
\ No newline at end of file
+        result = snapshot.as_dict()
+        result["version"] = snapshot.version
+        return result, 200
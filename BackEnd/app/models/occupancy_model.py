@@ -0,0 +1,304 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.utils.db_utils import get_db_connection
+from app.utils.metrics import timed
+from app.config.database import DB_CONFIG
+from app.config.settings import ANALYTICS_FETCH_ROWS, ANALYTICS_MAX_RANGE_DAYS
+from datetime import date, datetime
+import numpy as np
+import uuid
+
+GROUP_BY_OPTIONS = ('location', 'building', 'floor', 'desk_type', 'slot')
+PERIOD_OPTIONS = ('day', 'week', 'month')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Columns: id, location id, location, building id, building, floor, desk type id, desk type
+DESK_DIMENSIONS_SQL = """
+    SELECT
+        d.id,
+        d.location_id::text,
+        l.name,
+        d.building_id,
+        b.name,
+        d.floor_number,
+        d.desk_type_id,
+        dtm.type
+    FROM sena.desks d
+    LEFT JOIN sena.locations l ON l.id = d.location_id
+    LEFT JOIN sena.buildings b ON b.id = d.building_id
+    LEFT JOIN sena.desk_type_master dtm ON dtm.id = d.desk_type_id
+    ORDER BY d.id
+"""
+
+# Days in the range that were never rolled up, or were last rolled up
+# before they ended and may still change
+STALE_ROLLUP_DAYS_SQL = """
+    SELECT day::date
+    FROM generate_series(%s::date, %s::date, interval '1 day') AS day
+    LEFT JOIN sena.occupancy_rollup_days r ON r.booking_date = day::date
+    WHERE r.booking_date IS NULL OR r.refreshed_at < r.booking_date + 1
+"""
+
+def _ratio(numerator, denominator) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.round(np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0), 4)
+
+def _desk_groups(desks: Sequence[tuple], group_by: str) -> Tuple[np.ndarray, List[str], List[str]]:
+    """Group code of every desk plus the key and label of every group"""
+    if group_by == 'location':
+        pairs = [(desk[1], desk[2]) for desk in desks]
+    elif group_by == 'building':
+        pairs = [(desk[3], desk[4]) for desk in desks]
+    elif group_by == 'floor':
+        pairs = [(f"{desk[3]}:{desk[5]}", f"{desk[4]} / floor {desk[5]}") for desk in desks]
+    else:
+        pairs = [(desk[6], desk[7]) for desk in desks]
+
+    keys = ['unassigned' if key is None else str(key) for key, _ in pairs]
+    labels = {key: label for key, (_, label) in zip(keys, pairs)}
+    group_keys, codes = np.unique(np.array(keys, dtype=str), return_inverse=True)
+    return codes, [str(key) for key in group_keys], [labels[key] for key in group_keys]
+
+class OccupancyAnalytics:
+    @staticmethod
+    def summarize(from_date: date, to_date: date, today: date, desks: Sequence[tuple], slots: Sequence[tuple],
+                  rollup: np.ndarray, group_by: str = 'location', period: str = 'week') -> Dict:
+        """
+        Compute an occupancy report from rollup rows with vectorized group-bys.
+        A desk-day is occupied when any of its slots is booked; grouping by
+        slot counts booked desk-slot-days instead. Holds still open on days
+        that are over count as abandoned.
+        Args:
+            from_date: First day of the report
+            to_date: Last day of the report
+            today: Days before this one are over
+            desks: Rows of DESK_DIMENSIONS_SQL, ordered by desk id
+            slots: (slot_id, slot_type) rows ordered by slot id
+            rollup: int array of (day offset, desk_id, slot_id, booked_count, held_count) rows
+            group_by: One of GROUP_BY_OPTIONS
+            period: One of PERIOD_OPTIONS
+        Returns: Report dict
+        """
+        n_days = (to_date - from_date).days + 1
+        desk_ids = np.array([desk[0] for desk in desks], dtype=np.int64)
+        n_desks = len(desk_ids)
+        rollup = np.asarray(rollup, dtype=np.int64).reshape(-1, 5)
+
+        # Drop rows for desks that no longer exist
+        desk_index = np.searchsorted(desk_ids, rollup[:, 1])
+        known = desk_index < n_desks
+        known[known] = desk_ids[desk_index[known]] == rollup[known, 1]
+        rollup, desk_index = rollup[known], desk_index[known]
+        day_offset, slot_id, booked, held = rollup[:, 0], rollup[:, 2], rollup[:, 3], rollup[:, 4]
+
+        booked_rows = booked > 0
+        occupied = np.unique(day_offset[booked_rows] * max(n_desks, 1) + desk_index[booked_rows])
+        occupied_day, occupied_desk = np.divmod(occupied, max(n_desks, 1))
+        occupied_per_day = np.bincount(occupied_day, minlength=n_days)
+
+        past = day_offset < (today - from_date).days
+        abandoned = np.where(past, held, 0)
+        converted = np.where(past, booked, 0)
+
+        if group_by == 'slot':
+            group_ids = np.array([slot[0] for slot in slots], dtype=np.int64)
+            keys = [str(slot[0]) for slot in slots]
+            labels = [slot[1] for slot in slots]
+            row_group = np.searchsorted(group_ids, slot_id).clip(0, max(len(group_ids) - 1, 0))
+            n_groups = len(group_ids)
+            # Rows of slots that no longer exist don't count towards any slot
+            known_slot = group_ids[row_group] == slot_id if n_groups else np.zeros(len(slot_id), dtype=bool)
+            abandoned, converted = abandoned * known_slot, converted * known_slot
+            occupied_units = np.bincount(row_group[booked_rows & known_slot], minlength=n_groups)
+            group_desks = np.full(n_groups, n_desks)
+        else:
+            desk_group, keys, labels = _desk_groups(desks, group_by)
+            row_group = desk_group[desk_index]
+            n_groups = len(keys)
+            occupied_units = np.bincount(desk_group[occupied_desk], minlength=n_groups)
+            group_desks = np.bincount(desk_group, minlength=n_groups)
+
+        capacity = group_desks * n_days
+        group_abandoned = np.bincount(row_group, weights=abandoned, minlength=n_groups)
+        group_converted = np.bincount(row_group, weights=converted, minlength=n_groups)
+        utilization = _ratio(occupied_units, capacity)
+        abandonment = _ratio(group_abandoned, group_abandoned + group_converted)
+
+        # Calendar buckets: datetime64 days since 1970-01-01, a Thursday
+        days = np.arange(np.datetime64(from_date, 'D'), np.datetime64(to_date, 'D') + 1)
+        weekday = (days.astype(np.int64) + 3) % 7
+        if period == 'week':
+            bucket = days - weekday
+        elif period == 'month':
+            bucket = days.astype('datetime64[M]').astype('datetime64[D]')
+        else:
+            bucket = days
+        bucket_starts, day_bucket = np.unique(bucket, return_inverse=True)
+        bucket_occupied = np.bincount(day_bucket, weights=occupied_per_day, minlength=len(bucket_starts))
+        bucket_capacity = np.bincount(day_bucket, minlength=len(bucket_starts)) * n_desks
+        bucket_utilization = _ratio(bucket_occupied, bucket_capacity)
+
+        weekday_occupied = np.bincount(weekday, weights=occupied_per_day, minlength=7)
+        weekday_capacity = np.bincount(weekday, minlength=7) * n_desks
+        weekday_utilization = _ratio(weekday_occupied, weekday_capacity)
+
+        peak_day = None
+        if occupied_per_day.any():
+            peak = int(np.argmax(occupied_per_day))
+            peak_day = {
+                "date": str(days[peak]),
+                "occupied_desks": int(occupied_per_day[peak]),
+                "utilization": float(_ratio(occupied_per_day[peak], n_desks))
+            }
+
+        total_abandoned = int(abandoned.sum())
+        total_converted = int(converted.sum())
+        return {
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat(),
+            "group_by": group_by,
+            "period": period,
+            "desks": n_desks,
+            "desk_days": n_desks * n_days,
+            "occupied_desk_days": int(len(occupied)),
+            "utilization": float(_ratio(len(occupied), n_desks * n_days)),
+            "hold_abandonment_rate": float(_ratio(total_abandoned, total_abandoned + total_converted)),
+            "abandoned_holds": total_abandoned,
+            "peak_day": peak_day,
+            "groups": [
+                {
+                    "key": keys[i],
+                    "label": labels[i],
+                    "desks": int(group_desks[i]),
+                    "capacity": int(capacity[i]),
+                    "occupied": int(occupied_units[i]),
+                    "utilization": float(utilization[i]),
+                    "abandoned_holds": int(group_abandoned[i]),
+                    "hold_abandonment_rate": float(abandonment[i])
+                }
+                for i in range(n_groups)
+            ],
+            "periods": [
+                {
+                    "period_start": str(bucket_starts[i]),
+                    "occupied_desk_days": int(bucket_occupied[i]),
+                    "utilization": float(bucket_utilization[i])
+                }
+                for i in range(len(bucket_starts))
+            ],
+            "by_weekday": [
+                {"weekday": WEEKDAYS[i], "utilization": float(weekday_utilization[i])}
+                for i in range(7) if weekday_capacity[i]
+            ]
+        }
+
+    @staticmethod
+    def _refresh_rollup(cursor, from_date: date, to_date: date) -> int:
+        """
+        Rebuild the rollup rows of days in the range that may still change.
+        Returns: Number of days rebuilt
+        """
+        # Serialize refreshes so concurrent reports don't rebuild the same days
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('sena.occupancy_daily_rollup'))")
+        cursor.execute(STALE_ROLLUP_DAYS_SQL, (from_date, to_date))
+        stale_days = [row[0] for row in cursor.fetchall()]
+        if not stale_days:
+            return 0
+
+        cursor.execute("DELETE FROM sena.occupancy_daily_rollup WHERE booking_date = ANY(%s::date[])", (stale_days,))
+        cursor.execute("""
+            INSERT INTO sena.occupancy_daily_rollup (booking_date, desk_id, slot_id, booked_count, held_count)
+            SELECT
+                booking_date,
+                desk_id,
+                slot_id,
+                COUNT(*) FILTER (WHERE status = 'booked'),
+                COUNT(*) FILTER (WHERE status = 'held')
+            FROM sena.booking_transactions
+            WHERE booking_date = ANY(%s::date[])
+            AND desk_id IS NOT NULL AND slot_id IS NOT NULL
+            GROUP BY booking_date, desk_id, slot_id
+        """, (stale_days,))
+        cursor.execute("""
+            INSERT INTO sena.occupancy_rollup_days (booking_date, refreshed_at)
+            SELECT unnest(%s::date[]), now()
+            ON CONFLICT (booking_date) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+        """, (stale_days,))
+        return len(stale_days)
+
+    @staticmethod
+    def _load_rollup(conn, from_date: date, to_date: date) -> np.ndarray:
+        """Read the range's rollup rows in columnar batches from a server-side cursor"""
+        cursor = conn.cursor(name=f"occupancy_rollup_{uuid.uuid4().hex}")
+        cursor.execute("""
+            SELECT booking_date - %s::date, desk_id, slot_id, booked_count, held_count
+            FROM sena.occupancy_daily_rollup
+            WHERE booking_date BETWEEN %s AND %s
+        """, (from_date, from_date, to_date))
+        batches = []
+        while True:
+            rows = cursor.fetchmany(ANALYTICS_FETCH_ROWS)
+            if not rows:
+                break
+            batches.append(np.array(rows, dtype=np.int64))
+        cursor.close()
+        return np.concatenate(batches) if batches else np.empty((0, 5), dtype=np.int64)
+
+    @staticmethod
+    @timed
+    def get_occupancy_report(from_date: str, to_date: str, group_by: str = 'location', period: str = 'week',
+                             today: Optional[date] = None) -> Tuple[Dict, int]:
+        """
+        Occupancy report for a date range, served from the daily rollup.
+        Only days that may still change are rebuilt from booking_transactions.
+        No-show rates need check-in data, which isn't recorded, so open holds
+        on past days (hold abandonment) are reported instead.
+        Args:
+            from_date: First day (YYYY-MM-DD)
+            to_date: Last day (YYYY-MM-DD)
+            group_by: location, building, floor, desk_type or slot
+            period: day, week or month buckets for the time series
+            today: Override of the current date
+        Returns: Tuple of (report_dict, status_code)
+        """
+        try:
+            start = datetime.strptime(from_date, '%Y-%m-%d').date()
+            end = datetime.strptime(to_date, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return {"error": "from_date and to_date must be YYYY-MM-DD"}, 400
+        if end < start:
+            return {"error": "to_date must not be before from_date"}, 400
+        if (end - start).days + 1 > ANALYTICS_MAX_RANGE_DAYS:
+            return {"error": f"Reports cover at most {ANALYTICS_MAX_RANGE_DAYS} days"}, 400
+        if group_by not in GROUP_BY_OPTIONS:
+            return {"error": f"group_by must be one of {', '.join(GROUP_BY_OPTIONS)}"}, 400
+        if period not in PERIOD_OPTIONS:
+            return {"error": f"period must be one of {', '.join(PERIOD_OPTIONS)}"}, 400
+
+        # The rollup is written, so this runs on the primary
+        conn = get_db_connection(DB_CONFIG)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            cursor = conn.cursor()
+            refreshed_days = OccupancyAnalytics._refresh_rollup(cursor, start, end)
+            conn.commit()
+
+            cursor.execute(DESK_DIMENSIONS_SQL)
+            desks = cursor.fetchall()
+            cursor.execute("SELECT id, slot_type FROM sena.slot_master ORDER BY id")
+            slots = cursor.fetchall()
+            rollup = OccupancyAnalytics._load_rollup(conn, start, end)
+
+            report = OccupancyAnalytics.summarize(
+                start, end, today or date.today(), desks, slots, rollup, group_by=group_by, period=period
+            )
+            report["rollup_days_refreshed"] = refreshed_days
+            return report, 200
+        except Exception as e:
+            conn.rollback()
+            print(f"[OccupancyAnalytics ERROR] Failed to build occupancy report: {str(e)}")
+            return {"error": f"Failed to build occupancy report: {str(e)}"}, 500
+        finally:
+            conn.close()
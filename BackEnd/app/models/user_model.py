@@ -1,10 +1,56 @@
 from datetime import datetime
+import csv
+import io
+import re
+import time
 import uuid
-from typing import Dict, Optional, Tuple
-from app.utils.db_utils import get_db_connection
+import psycopg2
+import psycopg2.errors
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from app.utils.db_utils import get_db_connection, replica_router
+from app.utils.lru_cache import LRUCache
+from app.utils.metrics import timed
 from app.config.database import DB_CONFIG
+from app.config.settings import (
+    PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS, USER_IMPORT_BATCH_BYTES, USER_IMPORT_REPORT_LIMIT
+)
+
+USER_COLUMNS = "id, email, first_name, last_name, phone, created_at, updated_at, is_active"
+
+# What signup accepts as an email; the bulk import checks rows against it in SQL
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+# CSV columns User.bulk_import understands
+IMPORT_COLUMNS = ('email', 'first_name', 'last_name', 'phone')
+IMPORT_REQUIRED_COLUMNS = ('email', 'first_name', 'last_name')
+
+# Fields a user may change on their own profile
+PROFILE_FIELDS = ('first_name', 'last_name', 'phone')
+
+def _csv_batches(rows: Iterator[List[str]], batch_bytes: int) -> Iterator[Tuple[int, io.StringIO]]:
+    """Parsed CSV rows written back out as CSV in batches of about batch_bytes, with each batch's first row number"""
+    first_row, count = 1, 0
+    batch = io.StringIO()
+    writer = csv.writer(batch, lineterminator='\n')
+    for row in rows:
+        if not row:
+            continue
+        writer.writerow(row)
+        count += 1
+        if batch.tell() >= batch_bytes:
+            batch.seek(0)
+            yield first_row, batch
+            first_row = count + 1
+            batch = io.StringIO()
+            writer = csv.writer(batch, lineterminator='\n')
+    if batch.tell():
+        batch.seek(0)
+        yield first_row, batch
 
 class User:
+    # Profiles of signed-in users by ID; writes through User invalidate them
+    _profiles = LRUCache(PROFILE_CACHE_MAX_ENTRIES, PROFILE_CACHE_TTL_SECONDS)
+
     def __init__(
         self,
         email: str,
@@ -26,9 +72,17 @@ class User:
         self.is_active = is_active
 
     @staticmethod
-    def create_user(email: str, first_name: str, last_name: str, phone: Optional[str] = None) -> Tuple[Dict, int]:
+    @timed
+    def create_user(
+        email: str,
+        first_name: str,
+        last_name: str,
+        phone: Optional[str] = None,
+        password_hash: Optional[str] = None
+    ) -> Tuple[Dict, int]:
         """
-        Create a new user in the database
+        Create a new user in one statement; the unique email index turns a
+        second signup for the same email, even a concurrent one, into a 409
         Returns: Tuple of (result_dict, status_code)
         """
         conn = get_db_connection(DB_CONFIG)
@@ -37,46 +91,185 @@ class User:
 
         try:
             cursor = conn.cursor()
-            # Check if email already exists
-            cursor.execute("SELECT id FROM sena.users WHERE email = %s", (email,))
-            if cursor.fetchone():
+            cursor.execute(f"""
+                INSERT INTO sena.users (email, first_name, last_name, phone, password)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (email) DO NOTHING
+                RETURNING {USER_COLUMNS}
+            """, (email, first_name, last_name, phone, password_hash))
+
+            new_user = cursor.fetchone()
+            if not new_user:
+                conn.rollback()
                 return {"error": "Email already registered"}, 409
+            conn.commit()
+            replica_router.note_write(new_user[0], new_user[1])
+
+            return User._row_to_dict(new_user), 201
+
+        except Exception as e:
+            conn.rollback()
+            return {"error": f"Failed to create user: {str(e)}"}, 500
+        finally:
+            conn.close()
 
-            # Create new user
-            user = User(email=email, first_name=first_name, last_name=last_name, phone=phone)
+    @staticmethod
+    @timed
+    def bulk_import(csv_file: BinaryIO) -> Tuple[Dict, int]:
+        """
+        Import users from a CSV file with a header row naming IMPORT_COLUMNS
+        (phone optional). Rows are COPYed into a staging table, checked and
+        merged in a few statements: the first valid row for each new email
+        is imported, and the report lists rows with an invalid email or no
+        name, emails repeated in the file and emails already registered.
+        Imported users have no password. Rows are numbered from 1 after the
+        header, skipping blank lines. The COPY goes in batches of about
+        USER_IMPORT_BATCH_BYTES, so no one batch blocks the worker for long.
+        Returns: Tuple of (report_dict, status_code)
+        """
+        rows = csv.reader(io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline=''))
+        try:
+            columns = [column.strip().lower() for column in next(rows, [])]
+        except (csv.Error, UnicodeDecodeError) as e:
+            return {"error": f"Malformed CSV: {str(e)}"}, 400
+        missing = [column for column in IMPORT_REQUIRED_COLUMNS if column not in columns]
+        unknown = [column for column in columns if column not in IMPORT_COLUMNS]
+        if missing or unknown or len(set(columns)) != len(columns):
+            return {
+                "error": "The header row must name each of email, first_name and last_name once, and optionally phone",
+                "missing": missing,
+                "unknown": unknown
+            }, 400
+
+        conn = get_db_connection(DB_CONFIG)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO sena.users (id, email, first_name, last_name, phone)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id, email, first_name, last_name, phone, created_at, updated_at, is_active
-            """, (user.id, user.email, user.first_name, user.last_name, user.phone))
-            
-            new_user = cursor.fetchone()
+                CREATE TEMP TABLE user_import (
+                    row_number bigint GENERATED ALWAYS AS IDENTITY,
+                    email text,
+                    first_name text,
+                    last_name text,
+                    phone text,
+                    problem text
+                ) ON COMMIT DROP
+            """)
+            copy_sql = f"COPY user_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+            try:
+                for first_row, batch in _csv_batches(rows, USER_IMPORT_BATCH_BYTES):
+                    try:
+                        cursor.copy_expert(copy_sql, batch)
+                    except (psycopg2.DataError, psycopg2.errors.BadCopyFileFormat) as e:
+                        conn.rollback()
+                        line = re.search(r'line (\d+)', e.diag.context or '')
+                        row = f" at row {first_row + int(line.group(1)) - 1}" if line else ""
+                        return {"error": f"Malformed CSV{row}: {e.diag.message_primary or str(e)}"}, 400
+                    # COPY blocks the worker; let other requests run between batches
+                    time.sleep(0)
+            except (csv.Error, UnicodeDecodeError) as e:
+                conn.rollback()
+                return {"error": f"Malformed CSV: {str(e)}"}, 400
+
+            cursor.execute("""
+                UPDATE user_import SET
+                    email = btrim(email),
+                    first_name = nullif(btrim(first_name), ''),
+                    last_name = nullif(btrim(last_name), ''),
+                    phone = nullif(btrim(phone), ''),
+                    problem = CASE
+                        WHEN coalesce(btrim(email), '') !~ %s THEN 'invalid_email'
+                        WHEN nullif(btrim(first_name), '') IS NULL OR nullif(btrim(last_name), '') IS NULL THEN 'missing_name'
+                    END
+            """, (EMAIL_PATTERN,))
+
+            # The first valid row for each email is the candidate; the unique
+            # email index skips the ones already registered
+            cursor.execute("""
+                WITH candidates AS (
+                    SELECT DISTINCT ON (email) email, first_name, last_name, phone
+                    FROM user_import
+                    WHERE problem IS NULL
+                    ORDER BY email, row_number
+                ), inserted AS (
+                    INSERT INTO sena.users (email, first_name, last_name, phone)
+                    SELECT email, first_name, last_name, phone FROM candidates
+                    ON CONFLICT (email) DO NOTHING
+                    RETURNING email
+                ), registered AS (
+                    SELECT email FROM candidates
+                    WHERE email NOT IN (SELECT email FROM inserted)
+                )
+                SELECT (SELECT COUNT(*) FROM inserted),
+                       (SELECT COUNT(*) FROM registered),
+                       ARRAY(SELECT email FROM registered ORDER BY email LIMIT %s)
+            """, (USER_IMPORT_REPORT_LIMIT,))
+            imported, registered_count, registered = cursor.fetchone()
+
+            cursor.execute("""
+                SELECT email, rows, COUNT(*) OVER ()
+                FROM (
+                    SELECT email, array_agg(row_number ORDER BY row_number) AS rows, MIN(row_number) AS first_row
+                    FROM user_import
+                    WHERE problem IS NULL
+                    GROUP BY email
+                    HAVING COUNT(*) > 1
+                ) duplicates
+                ORDER BY first_row
+                LIMIT %s
+            """, (USER_IMPORT_REPORT_LIMIT,))
+            duplicates = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT problem, row_number, email, total
+                FROM (
+                    SELECT problem, row_number, email,
+                           COUNT(*) OVER (PARTITION BY problem) AS total,
+                           ROW_NUMBER() OVER (PARTITION BY problem ORDER BY row_number) AS nth
+                    FROM user_import
+                    WHERE problem IS NOT NULL
+                ) problems
+                WHERE nth <= %s
+                ORDER BY problem, row_number
+            """, (USER_IMPORT_REPORT_LIMIT,))
+            problems = {problem: {"count": 0, "rows": []} for problem in ('invalid_email', 'missing_name')}
+            for problem, row_number, email, total in cursor.fetchall():
+                problems[problem]["count"] = total
+                problems[problem]["rows"].append({"row": row_number, "email": email})
+
+            cursor.execute("SELECT COUNT(*) FROM user_import")
+            rows = cursor.fetchone()[0]
             conn.commit()
-            
+
             return {
-                "id": new_user[0],
-                "email": new_user[1],
-                "first_name": new_user[2],
-                "last_name": new_user[3],
-                "phone": new_user[4],
-                "created_at": new_user[5],
-                "updated_at": new_user[6],
-                "is_active": new_user[7]
-            }, 201
+                "rows": rows,
+                "imported": imported,
+                "already_registered": {"count": registered_count, "emails": registered},
+                "duplicates": {
+                    "count": duplicates[0][2] if duplicates else 0,
+                    "emails": [{"email": email, "rows": duplicate_rows} for email, duplicate_rows, _ in duplicates]
+                },
+                "invalid_emails": problems['invalid_email'],
+                "missing_names": problems['missing_name']
+            }, 200
 
         except Exception as e:
             conn.rollback()
-            return {"error": f"Failed to create user: {str(e)}"}, 500
+            print(f"[User ERROR] Bulk import failed: {str(e)}")
+            return {"error": f"Failed to import users: {str(e)}"}, 500
         finally:
             conn.close()
 
     @staticmethod
+    @timed
     def get_user_by_email(email: str) -> Tuple[Optional[Dict], int]:
         """
         Retrieve a user by email
         Returns: Tuple of (user_dict or None, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=email)
         if not conn:
             return None, 500
 
@@ -107,3 +300,93 @@ class User:
             return None, 500
         finally:
             conn.close()
+
+    @staticmethod
+    def _row_to_dict(user) -> Dict:
+        return {
+            "id": user[0],
+            "email": user[1],
+            "first_name": user[2],
+            "last_name": user[3],
+            "phone": user[4],
+            "created_at": user[5],
+            "updated_at": user[6],
+            "is_active": user[7]
+        }
+
+    @staticmethod
+    def remember_profile(user: Dict) -> None:
+        """Cache a profile just read, e.g. at login"""
+        User._profiles.put(str(user["id"]), user)
+
+    @staticmethod
+    @timed
+    def get_profile(user_id: str) -> Tuple[Optional[Dict], int]:
+        """
+        Retrieve a user by ID, from the profile cache when possible
+        Returns: Tuple of (user_dict or None, status_code)
+        """
+        user_id = str(user_id)
+        cached = User._profiles.get(user_id)
+        if cached is not None:
+            return cached, 200
+
+        conn = get_db_connection(DB_CONFIG, read_only=True, user_key=user_id)
+        if not conn:
+            return None, 500
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {USER_COLUMNS} FROM sena.users WHERE id = %s", (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                return None, 404
+
+            profile = User._row_to_dict(user)
+            User._profiles.put(user_id, profile)
+            return profile, 200
+
+        except Exception as e:
+            print(f"[User ERROR] Failed to fetch profile {user_id}: {str(e)}")
+            return None, 500
+        finally:
+            conn.close()
+
+    @staticmethod
+    @timed
+    def update_profile(user_id: str, changes: Dict) -> Tuple[Dict, int]:
+        """
+        Update the PROFILE_FIELDS present in changes
+        Returns: Tuple of (user_dict or error_dict, status_code)
+        """
+        changes = {field: changes[field] for field in PROFILE_FIELDS if field in changes}
+        if not changes:
+            return {"error": f"Nothing to update; allowed fields: {', '.join(PROFILE_FIELDS)}"}, 400
+
+        conn = get_db_connection(DB_CONFIG)
+        if not conn:
+            return {"error": "Database connection failed"}, 500
+
+        try:
+            cursor = conn.cursor()
+            assignments = ", ".join(f"{field} = %s" for field in changes)
+            cursor.execute(f"""
+                UPDATE sena.users SET {assignments}, updated_at = now()
+                WHERE id = %s
+                RETURNING {USER_COLUMNS}
+            """, (*changes.values(), str(user_id)))
+            user = cursor.fetchone()
+            if not user:
+                conn.rollback()
+                return {"error": "User not found"}, 404
+            conn.commit()
+            replica_router.note_write(user[0], user[1])
+
+            User._profiles.invalidate(str(user_id))
+            return User._row_to_dict(user), 200
+
+        except Exception as e:
+            conn.rollback()
+            return {"error": f"Failed to update user: {str(e)}"}, 500
+        finally:
+            conn.close()
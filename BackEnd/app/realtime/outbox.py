@@ -0,0 +1,168 @@
+"""
+Bounded, coalescing delivery of desk updates to socket clients.
+
+Socket.IO hands every emit straight to the client's transport queue, which
+grows without limit while the client can't keep up. Here a client whose
+transport already holds more than SOCKET_MAX_QUEUED_PACKETS packets isn't
+sent anything more: its newest desk_update is held instead, replacing any
+older one, and goes out once the transport drains. A client still backed
+up after SOCKET_SLOW_CLIENT_SECONDS is disconnected; the frontend
+reconnects and gets fresh data. Emitting never waits on a client, so
+fan-out time doesn't depend on the slowest one.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from engineio import packet as eio_packet
+from socketio import packet
+from app.config.settings import SOCKET_MAX_QUEUED_PACKETS, SOCKET_SLOW_CLIENT_SECONDS
+import socketio
+import threading
+import time
+
+# Events where only the newest payload matters
+COALESCED_EVENTS = ('desk_update',)
+
+class Outbox:
+    """
+    Per-client held events: at most one per coalesced event, so memory per
+    client is bounded whatever the update rate
+    """
+
+    def __init__(self, queue_depth: Callable[[str], int], send: Callable[[str, List], None],
+                 max_queued_packets: int = SOCKET_MAX_QUEUED_PACKETS,
+                 slow_client_seconds: float = SOCKET_SLOW_CLIENT_SECONDS):
+        self._queue_depth = queue_depth
+        self._send = send
+        self.max_queued_packets = max_queued_packets
+        self.slow_client_seconds = slow_client_seconds
+        self._held: Dict[str, Dict[str, Tuple[str, List]]] = {}  # sid -> event -> (eio_sid, packets)
+        self._backed_up_since: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.dropped = 0
+
+    def _keeps_up(self, eio_sid: str) -> bool:
+        return self._queue_depth(eio_sid) <= self.max_queued_packets
+
+    def offer(self, sid: str, eio_sid: str, event: str, packets: List) -> bool:
+        """
+        Send the event now if the client keeps up, else hold it as the
+        client's newest one
+        Returns: Whether it was sent
+        """
+        with self._lock:
+            held = self._held.get(sid)
+            if held is None and self._keeps_up(eio_sid):
+                self._send(eio_sid, packets)
+                return True
+            if held is None:
+                held = self._held[sid] = {}
+                self._backed_up_since.setdefault(sid, time.monotonic())
+            if event in held:
+                self.coalesced += 1
+            held[event] = (eio_sid, packets)
+            return False
+
+    def retry(self) -> List[str]:
+        """
+        Send held events to clients that have drained
+        Returns: sids of clients backed up for too long, to be disconnected
+        """
+        now = time.monotonic()
+        too_slow = []
+        with self._lock:
+            for sid, held in list(self._held.items()):
+                eio_sid = next(iter(held.values()))[0]
+                if self._keeps_up(eio_sid):
+                    for eio_sid, packets in held.values():
+                        self._send(eio_sid, packets)
+                    del self._held[sid]
+                    self._backed_up_since.pop(sid, None)
+                elif now - self._backed_up_since[sid] > self.slow_client_seconds:
+                    too_slow.append(sid)
+        self.dropped += len(too_slow)
+        return too_slow
+
+    def forget(self, sid: str) -> None:
+        with self._lock:
+            self._held.pop(sid, None)
+            self._backed_up_since.pop(sid, None)
+
+    def held_count(self) -> int:
+        with self._lock:
+            return len(self._held)
+
+class CoalescingManager(socketio.Manager):
+    """
+    Client manager that delivers this process's share of coalesced events
+    through an Outbox. Mixed in after a message queue manager it sees the
+    emits coming off the queue, so it works on every worker.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outbox = Outbox(self._queue_depth, self._send_packets)
+
+    def _queue_depth(self, eio_sid: str) -> int:
+        # The test client and already-closed sockets have no transport queue
+        transport = self.server.eio.sockets.get(eio_sid)
+        return transport.queue.qsize() if transport is not None else 0
+
+    def _send_packets(self, eio_sid: str, packets: List) -> None:
+        for eio_pkt in packets:
+            self.server._send_eio_packet(eio_sid, eio_pkt)
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        room = to or room
+        if event not in COALESCED_EVENTS or callback or namespace not in self.rooms:
+            return super().emit(event, data, namespace, room=room, skip_sid=skip_sid,
+                                callback=callback, **kwargs)
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+        # Encoded once and shared by every client holding it
+        data = list(data) if isinstance(data, tuple) else ([data] if data is not None else [])
+        encoded = self.server.packet_class(packet.EVENT, namespace=namespace, data=[event] + data).encode()
+        packets = [eio_packet.Packet(eio_packet.MESSAGE, p)
+                   for p in (encoded if isinstance(encoded, list) else [encoded])]
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid not in skip_sid:
+                self.outbox.offer(sid, eio_sid, event, packets)
+
+    def disconnect(self, sid, namespace, **kwargs):
+        self.outbox.forget(sid)
+        return super().disconnect(sid, namespace, **kwargs)
+
+    def retry_held(self) -> int:
+        """
+        Send held events to clients that have drained and disconnect the
+        ones backed up for too long
+        Returns: Number of clients disconnected
+        """
+        too_slow = self.outbox.retry()
+        for sid in too_slow:
+            print(f"[Outbox] Disconnecting socket client {sid}: backed up for over "
+                  f"{self.outbox.slow_client_seconds}s")
+            try:
+                self.server.disconnect(sid, ignore_queue=True)
+            except Exception as e:
+                print(f"[Outbox ERROR] Failed to disconnect {sid}: {str(e)}")
+                self.outbox.forget(sid)
+        return len(too_slow)
+
+def create_client_manager(message_queue: Optional[str]) -> CoalescingManager:
+    """
+    Client manager for SOCKETIO_MESSAGE_QUEUE, picked the way Flask-SocketIO
+    picks it, with coalesced delivery on top
+    """
+    if not message_queue:
+        return CoalescingManager()
+    if message_queue.startswith(('redis://', 'rediss://')):
+        queue_class = socketio.RedisManager
+    elif message_queue.startswith('kafka://'):
+        queue_class = socketio.KafkaManager
+    elif message_queue.startswith('zmq'):
+        queue_class = socketio.ZmqManager
+    else:
+        queue_class = socketio.KombuManager
+    # The queue manager publishes; emits it receives go through CoalescingManager.emit
+    manager_class = type(f"Coalescing{queue_class.__name__}", (queue_class, CoalescingManager), {})
+    return manager_class(message_queue, channel='flask-socketio')
@@ -0,0 +1,210 @@
+from typing import Dict, Optional, Tuple
+from app.utils.db_utils import get_db_connection
+from app.config.database import DB_CONFIG
+from app.config.settings import DB_CONNECT_TIMEOUT_SECONDS, SOCKET_NODE_TIMEOUT_SECONDS
+import hashlib
+import json
+import os
+import socket
+import threading
+import uuid
+import psycopg2
+
+FILTER_LISTS = ('location_ids', 'desk_type_ids', 'slot_type_ids')
+
+def canonical_filters(filters) -> Dict:
+    """
+    The filters a client sent, as sorted lists of strings plus the booking
+    date, so equivalent filters compare and hash equal
+    """
+    filters = filters if isinstance(filters, dict) else {}
+    canonical = {}
+    for name in FILTER_LISTS:
+        values = filters.get(name) or []
+        if isinstance(values, str):
+            values = values.split(',')
+        canonical[name] = sorted({str(value) for value in values if value})
+    canonical['booking_date'] = filters.get('booking_date') or None
+    return canonical
+
+def filter_room(filters: Dict) -> str:
+    """Socket.IO room shared by every client with these canonical filters"""
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:20]
+    return f"desks:{digest}"
+
+class LocalSubscriptions:
+    """
+    Socket subscriptions of this process only. The process is always the
+    producer and pushes updates to its own clients.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Tuple[str, Dict]] = {}  # client_id -> (room, filters)
+        self._lock = threading.Lock()
+
+    def subscribe(self, client_id: str, room: str, filters: Dict) -> None:
+        with self._lock:
+            self._clients[client_id] = (room, filters)
+
+    def unsubscribe(self, client_id: str) -> Optional[str]:
+        """Forget the client; returns the room it was in"""
+        with self._lock:
+            subscription = self._clients.pop(client_id, None)
+        return subscription[0] if subscription else None
+
+    def room_of(self, client_id: str) -> Optional[str]:
+        with self._lock:
+            subscription = self._clients.get(client_id)
+        return subscription[0] if subscription else None
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def active_rooms(self) -> Dict[str, Dict]:
+        """Filters of every room with at least one subscriber"""
+        with self._lock:
+            return {room: filters for room, filters in self._clients.values()}
+
+    def heartbeat(self) -> None:
+        pass
+
+    def is_producer(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        pass
+
+class PostgresSubscriptions(LocalSubscriptions):
+    """
+    Subscriptions shared by every worker and host through
+    sena.socket_subscriptions. Each process heartbeats its row in
+    sena.socket_nodes; subscriptions of nodes that stop heartbeating are
+    purged. The producer is whichever process holds a session advisory
+    lock, which Postgres frees when that process's connection goes away.
+    """
+    PRODUCER_LOCK = "hashtext('sena desk update producer')"
+
+    def __init__(self, node_id: Optional[str] = None, node_timeout_seconds: int = SOCKET_NODE_TIMEOUT_SECONDS):
+        super().__init__()
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.node_timeout_seconds = node_timeout_seconds
+        self._producer_conn = None
+
+    def _execute(self, statements) -> Optional[list]:
+        """Run (sql, params) pairs in one transaction; rows of the last, or None on failure"""
+        conn = get_db_connection(DB_CONFIG)
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            for sql, params in statements:
+                cursor.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else []
+            conn.commit()
+            return rows
+        except Exception as e:
+            conn.rollback()
+            print(f"[Subscriptions ERROR] {str(e)}")
+            return None
+        finally:
+            conn.close()
+
+    def _node_upsert(self):
+        # xmax is 0 only for a freshly inserted row
+        return ("""
+            INSERT INTO sena.socket_nodes (node_id, heartbeat_at) VALUES (%s, now())
+            ON CONFLICT (node_id) DO UPDATE SET heartbeat_at = now()
+            RETURNING xmax = 0
+        """, (self.node_id,))
+
+    @staticmethod
+    def _subscription_upsert(node_id: str, client_id: str, room: str, filters: Dict):
+        return ("""
+            INSERT INTO sena.socket_subscriptions (client_id, node_id, room, filters)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (client_id) DO UPDATE SET node_id = EXCLUDED.node_id,
+                room = EXCLUDED.room, filters = EXCLUDED.filters
+        """, (client_id, node_id, room, json.dumps(filters)))
+
+    def subscribe(self, client_id: str, room: str, filters: Dict) -> None:
+        super().subscribe(client_id, room, filters)
+        self._execute([self._node_upsert(), self._subscription_upsert(self.node_id, client_id, room, filters)])
+
+    def unsubscribe(self, client_id: str) -> Optional[str]:
+        room = super().unsubscribe(client_id)
+        self._execute([("DELETE FROM sena.socket_subscriptions WHERE client_id = %s", (client_id,))])
+        return room
+
+    def heartbeat(self) -> None:
+        """Keep this node alive; re-register its clients if it had been purged"""
+        rows = self._execute([self._node_upsert()])
+        if rows and rows[0][0]:
+            with self._lock:
+                clients = list(self._clients.items())
+            if clients:
+                self._execute([self._node_upsert()] + [
+                    self._subscription_upsert(self.node_id, client_id, room, filters)
+                    for client_id, (room, filters) in clients
+                ])
+
+    def active_rooms(self) -> Dict[str, Dict]:
+        rows = self._execute([
+            # Subscriptions go with their node
+            ("DELETE FROM sena.socket_nodes WHERE heartbeat_at < now() - make_interval(secs => %s)",
+             (self.node_timeout_seconds,)),
+            ("SELECT DISTINCT ON (room) room, filters FROM sena.socket_subscriptions ORDER BY room", None),
+        ])
+        if rows is None:
+            # Keep our own clients updated while the database is unavailable
+            return super().active_rooms()
+        return {room: filters for room, filters in rows}
+
+    def is_producer(self) -> bool:
+        """Whether this process holds the producer lock, trying to take it if not"""
+        conn = self._producer_conn
+        try:
+            if conn is None:
+                conn = psycopg2.connect(
+                    connect_timeout=DB_CONNECT_TIMEOUT_SECONDS,
+                    **{key: value for key, value in DB_CONFIG.items() if key != 'replicas'}
+                )
+                conn.autocommit = True
+                self._producer_conn = conn
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT pg_try_advisory_lock({self.PRODUCER_LOCK})")
+                if not cursor.fetchone()[0]:
+                    self._close_producer_conn()
+                    return False
+                print(f"[Subscriptions] {self.node_id} is the desk update producer")
+                return True
+            # The lock lasts as long as the session
+            conn.cursor().execute("SELECT 1")
+            return True
+        except Exception as e:
+            print(f"[Subscriptions ERROR] Producer election failed: {str(e)}")
+            self._close_producer_conn()
+            return False
+
+    def _close_producer_conn(self) -> None:
+        conn, self._producer_conn = self._producer_conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        """Drop this node's subscriptions and give up the producer lock"""
+        self._execute([("DELETE FROM sena.socket_nodes WHERE node_id = %s", (self.node_id,))])
+        self._close_producer_conn()
+
+def create_subscriptions(backend: str, message_queue: str) -> LocalSubscriptions:
+    """Subscription store for REALTIME_BACKEND"""
+    if backend == 'postgres':
+        if message_queue:
+            return PostgresSubscriptions()
+        print("[Subscriptions] REALTIME_BACKEND=postgres needs SOCKETIO_MESSAGE_QUEUE; keeping subscriptions local")
+    elif backend != 'local':
+        print(f"[Subscriptions] Unknown REALTIME_BACKEND {backend!r}; keeping subscriptions local")
+    return LocalSubscriptions()
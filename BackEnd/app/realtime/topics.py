@@ -0,0 +1,84 @@
+"""
+Desk availability for socket clients, computed per topic: one location, or
+every location, on one booking date. Clients whose filters overlap share
+topics, and their desk type and slot filters are applied to the topic's
+desks when sending, so the database work scales with the locations and
+dates being watched rather than with filter combinations.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+from app.models.desk_model import DeskData
+import time
+
+# (location_id or None for every location, booking_date)
+Topic = Tuple[Optional[str], str]
+
+def filter_topics(filters: Dict) -> List[Topic]:
+    """Topics covering a client's canonical filters"""
+    booking_date = filters.get('booking_date') or time.strftime('%Y-%m-%d')
+    return [(location_id, booking_date) for location_id in filters.get('location_ids') or [None]]
+
+def topic_availability(topic: Topic) -> Tuple[Dict, int]:
+    """
+    Every desk and slot of a topic
+    Returns: Tuple of (desk_data_dict, status_code)
+    """
+    location_id, booking_date = topic
+    return DeskData.get_desk_availability(
+        location_ids=[location_id] if location_id else None,
+        booking_date=booking_date
+    )
+
+def _id_set(values) -> Set[int]:
+    ids = set()
+    for value in values or []:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+def project(desks: List[Dict], filters: Dict) -> List[Dict]:
+    """
+    The desks and slots matching a client's desk type and slot filters.
+    Topic desks are shared between clients, so they are copied, not changed.
+    """
+    desk_type_ids = _id_set(filters.get('desk_type_ids'))
+    slot_ids = _id_set(filters.get('slot_type_ids'))
+    if not desk_type_ids and not slot_ids:
+        return desks
+
+    projected = []
+    for desk in desks:
+        if desk_type_ids and desk.get('desk_type_id') not in desk_type_ids:
+            continue
+        if slot_ids:
+            slots = [slot for slot in desk['slots'] if slot.get('slot_id') in slot_ids]
+            # Like the query, a desk without any of the slots isn't listed
+            if not slots:
+                continue
+            desk = {**desk, 'slots': slots}
+        projected.append(desk)
+    return projected
+
+def availability_for(filters: Dict, topics: Optional[Dict[Topic, Tuple[Dict, int]]] = None) -> Tuple[Dict, int]:
+    """
+    Desk availability for a client's canonical filters, built from its topics
+    Args:
+        filters (Dict): Canonical filters of the client.
+        topics (Optional[Dict]): Topic results shared between the clients of one push.
+    Returns: Tuple of (desk_data_dict, status_code)
+    """
+    topics = {} if topics is None else topics
+    client_topics = filter_topics(filters)
+    desks = []
+    for topic in client_topics:
+        if topic not in topics:
+            topics[topic] = topic_availability(topic)
+        topic_data, status_code = topics[topic]
+        if status_code != 200:
+            return topic_data, status_code
+        desks.extend(topic_data['desks'])
+    if len(client_topics) > 1:
+        # Each topic comes best rated first; keep that across locations
+        desks.sort(key=lambda desk: -(desk.get('rating') or 0))
+    return {"desks": project(desks, filters)}, 200
@@ -0,0 +1,160 @@
+from flask import Blueprint, Response, jsonify, request
+from app.models.booking_export_model import BookingExport
+from app.models.occupancy_model import OccupancyAnalytics
+from app.models.user_model import User
+from app.utils.admin_auth import admin_required
+from app.utils.query_log import query_log
+from app.utils.profiler import run_profile
+from app.config.settings import PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS, USER_IMPORT_MAX_BYTES
+from datetime import datetime
+import tempfile
+import uuid
+
+admin_bp = Blueprint('admin', __name__)
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Uploads up to this size stay in memory while spooled; larger ones go to disk
+IMPORT_SPOOL_MEMORY_BYTES = 1024 * 1024
+IMPORT_READ_CHUNK_BYTES = 64 * 1024
+
+@admin_bp.route('/api/admin/bookings/export', methods=['GET'])
+@admin_required
+def export_bookings():
+    """
+    Stream booking transactions, with booking details flattened, as CSV
+    (default) or NDJSON (format=ndjson). Optional filters: from_date,
+    to_date (YYYY-MM-DD), location_id and status (comma separated).
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_MIMETYPES:
+            return jsonify({"error": "format must be csv or ndjson"}), 400
+
+        from_date = request.args.get('from_date')
+        to_date = request.args.get('to_date')
+        location_id = request.args.get('location_id')
+        try:
+            for value in (from_date, to_date):
+                if value:
+                    datetime.strptime(value, '%Y-%m-%d')
+            if location_id:
+                uuid.UUID(location_id)
+        except ValueError:
+            return jsonify({"error": "Dates must be YYYY-MM-DD and location_id a UUID"}), 400
+        statuses = [status for status in request.args.get('status', '').split(',') if status] or None
+
+        stream, status_code = BookingExport.stream_bookings(
+            export_format, from_date=from_date, to_date=to_date, location_id=location_id, statuses=statuses
+        )
+        if status_code != 200:
+            return jsonify(stream), status_code
+
+        filename = f"bookings_{from_date or 'start'}_{to_date or 'end'}.{export_format}"
+        response = Response(stream, mimetype=EXPORT_MIMETYPES[export_format])
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # Stop proxies from buffering the whole export before passing it on
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        print(f"Error in export_bookings endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@admin_bp.route('/api/admin/analytics/occupancy', methods=['GET'])
+@admin_required
+def get_occupancy_report():
+    """
+    Occupancy report between from_date and to_date (YYYY-MM-DD), grouped by
+    location (default), building, floor, desk_type or slot, with a day, week
+    (default) or month time series, peak day and hold abandonment rates
+    """
+    try:
+        result, status_code = OccupancyAnalytics.get_occupancy_report(
+            request.args.get('from_date'),
+            request.args.get('to_date'),
+            group_by=request.args.get('group_by', 'location'),
+            period=request.args.get('period', 'week')
+        )
+        return jsonify(result), status_code
+    except Exception as e:
+        print(f"Error in get_occupancy_report endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@admin_bp.route('/api/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """
+    The latest statements slower than SLOW_QUERY_THRESHOLD_MS, newest first,
+    with parameter shapes and captured plans, plus the query fingerprints
+    with the most total time. Optional limit caps both lists.
+    """
+    limit = request.args.get('limit', 50, type=int)
+    if not limit or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    return jsonify({
+        "threshold_ms": query_log.threshold_ms,
+        "slow_queries": query_log.slow_queries(limit),
+        "fingerprints": query_log.top_fingerprints(limit)
+    }), 200
+
+@admin_bp.route('/api/admin/profile', methods=['GET'])
+@admin_required
+def get_profile():
+    """
+    Sample the stacks of every thread for `seconds` (default 10), every
+    `interval_ms`. format=collapsed returns flamegraph-ready collapsed
+    stacks as text; otherwise JSON also lists samples per route handler,
+    model method and other app function.
+    """
+    seconds = request.args.get('seconds', 10, type=float)
+    interval_ms = request.args.get('interval_ms', PROFILER_INTERVAL_MS, type=float)
+    if not seconds or not 0 < seconds <= PROFILER_MAX_SECONDS:
+        return jsonify({"error": f"seconds must be between 0 and {PROFILER_MAX_SECONDS}"}), 400
+    if not interval_ms or not 1 <= interval_ms <= 1000:
+        return jsonify({"error": "interval_ms must be between 1 and 1000"}), 400
+
+    profiler = run_profile(seconds, interval_ms / 1000)
+    if profiler is None:
+        return jsonify({"error": "A profile is already running"}), 409
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype='text/plain')
+    return jsonify({
+        "seconds": round(profiler.duration_seconds, 3),
+        "interval_ms": interval_ms,
+        "samples": profiler.samples,
+        "functions": profiler.functions(),
+        "collapsed": profiler.collapsed()
+    }), 200
+
+@admin_bp.route('/api/admin/users/import', methods=['POST'])
+@admin_required
+def import_users():
+    """
+    Import users from a CSV request body (Content-Type: text/csv) whose
+    header row names email, first_name, last_name and optionally phone.
+    The body is read in full before the import starts, so a slow upload
+    never holds a database connection. Returns the import report.
+    """
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES) as upload:
+            received = 0
+            while True:
+                chunk = request.stream.read(IMPORT_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > USER_IMPORT_MAX_BYTES:
+                    return jsonify({"error": f"The CSV may be at most {USER_IMPORT_MAX_BYTES} bytes"}), 413
+                upload.write(chunk)
+            if not received:
+                return jsonify({"error": "The request body must be a CSV file"}), 400
+            upload.seek(0)
+
+            result, status_code = User.bulk_import(upload)
+        return jsonify(result), status_code
+    except Exception as e:
+        print(f"Error in import_users endpoint: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
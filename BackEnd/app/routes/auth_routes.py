@@ -1,10 +1,43 @@
 from flask import Blueprint, request, jsonify
 from app.models.user_model import User
 from app.utils.db_utils import get_db_connection
+from app.utils.passwords import PasswordHasherBusy, check_password
+from app.utils.prepared_statements import PreparedStatement
+from app.utils.sessions import current_user, issue_token
 from app.config.database import DB_CONFIG
+from app.config.settings import SESSION_TOKEN_TTL_SECONDS
 
 auth_bp = Blueprint('auth', __name__)
 
+_SESSION_ERRORS = {
+    401: 'Valid session token required',
+    403: 'User is inactive',
+}
+
+LOGIN_STATEMENT = PreparedStatement('login', ['text'], """
+    SELECT id, email, first_name, last_name, phone, created_at, updated_at, is_active, password
+    FROM sena.users
+    WHERE email = $1
+""")
+
+# Only replaces the password that was checked, in case it changed meanwhile
+UPGRADE_PASSWORD_SQL = "UPDATE sena.users SET password = %s WHERE id = %s AND password = %s"
+
+def _store_password_hash(user_id, checked_password: str, new_hash: str) -> None:
+    """Replace a plaintext or outdated password hash after a successful login"""
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        print(f"[Auth ERROR] Could not upgrade the password of {user_id}: no database connection")
+        return
+    try:
+        conn.cursor().execute(UPGRADE_PASSWORD_SQL, (new_hash, user_id, checked_password))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"[Auth ERROR] Could not upgrade the password of {user_id}: {str(e)}")
+    finally:
+        conn.close()
+
 @auth_bp.route('/api/auth/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -20,42 +53,59 @@ def login():
 
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, email, first_name, last_name, phone, created_at, updated_at, is_active
-            FROM sena.users
-            WHERE email = %s AND password = %s
-        """, (email, password))
-        
+        LOGIN_STATEMENT.execute(cursor, (email,))
         user = cursor.fetchone()
-        if not user:
-            return jsonify({'error': 'Invalid credentials'}), 401
-
-        return jsonify({
-            'message': 'Login successful',
-            'user': {
-                'id': user[0],
-                'email': user[1],
-                'first_name': user[2],
-                'last_name': user[3],
-                'phone': user[4],
-                'created_at': user[5],
-                'updated_at': user[6],
-                'is_active': user[7]
-            }
-        }), 200
-
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
     finally:
+        # The password check is slow; don't hold a connection through it
         conn.close()
 
+    try:
+        matches, new_hash = check_password(password, user[8] if user else None)
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many sign-ins in progress, try again shortly'}), 503, {'Retry-After': '1'}
+    if not matches:
+        return jsonify({'error': 'Invalid credentials'}), 401
+    if new_hash:
+        _store_password_hash(user[0], user[8], new_hash)
+
+    profile = {
+        'id': user[0],
+        'email': user[1],
+        'first_name': user[2],
+        'last_name': user[3],
+        'phone': user[4],
+        'created_at': user[5],
+        'updated_at': user[6],
+        'is_active': user[7]
+    }
+    User.remember_profile(profile)
+    return jsonify({
+        'message': 'Login successful',
+        'user': profile,
+        'token': issue_token(user[0]),
+        'expires_in': SESSION_TOKEN_TTL_SECONDS
+    }), 200
+
 @auth_bp.route('/api/auth/me', methods=['GET'])
 def get_current_user():
+    """
+    The signed-in user, from the session token without touching the
+    database while their profile is cached. Clients without a token may
+    still look a user up by email.
+    """
+    if request.headers.get('Authorization'):
+        user, status_code = current_user()
+        if user is None:
+            return jsonify({'error': _SESSION_ERRORS.get(status_code, 'Failed to load user')}), status_code
+        return jsonify(user), 200
+
     email = request.args.get('email')
     if not email:
         return jsonify({'error': 'Email is required'}), 400
 
-    conn = get_db_connection(DB_CONFIG)
+    conn = get_db_connection(DB_CONFIG, read_only=True, user_key=email)
     if not conn:
         return jsonify({'error': 'Database connection failed'}), 500
 
@@ -86,3 +136,16 @@ def get_current_user():
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
     finally:
         conn.close()
+
+@auth_bp.route('/api/auth/me', methods=['PUT'])
+def update_current_user():
+    """Update the signed-in user's first_name, last_name or phone"""
+    user, status_code = current_user()
+    if user is None:
+        return jsonify({'error': _SESSION_ERRORS.get(status_code, 'Failed to load user')}), status_code
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No data provided'}), 400
+    result, status_code = User.update_profile(user['id'], data)
+    return jsonify(result), status_code
@@ -6,7 +6,7 @@ desk_booking_bp = Blueprint('desk_booking', __name__)
 @desk_booking_bp.route('/api/desks/confirm', methods=['POST'])
 def book_from_hold():
     """
-    Book a desk that is currently on hold
+    Book a desk that is currently on hold, given its booking_id and booking_date
     """
     data = request.get_json()
     
@@ -15,8 +15,12 @@ def book_from_hold():
         
     if 'booking_id' not in data:
         return jsonify({"error": "Missing booking_id"}), 400
+
+    if 'booking_date' not in data:
+        return jsonify({"error": "Missing booking_date"}), 400
     
     result, status_code = DeskBooking.book_from_hold(
-        booking_id=data['booking_id']
+        booking_id=data['booking_id'],
+        booking_date=data['booking_date']
     )
     return jsonify(result), status_code 
\ No newline at end of file
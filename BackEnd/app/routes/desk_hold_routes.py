@@ -1,9 +1,10 @@
 from flask import Blueprint, jsonify, request
-from flask_cors import CORS
 from app.models.desk_hold_model import DeskHold
+from app.utils.sessions import session_user_id
+from app.config.settings import HOLD_STATUS_BATCH_MAX
+from datetime import datetime
 
 desk_hold_bp = Blueprint('desk_hold', __name__)
-CORS(desk_hold_bp)  # Enable CORS for this blueprint
 
 @desk_hold_bp.route('/api/desks/hold', methods=['POST'])
 def put_desk_on_hold():
@@ -30,20 +31,52 @@ def put_desk_on_hold():
 @desk_hold_bp.route('/api/desks/hold/status/<int:desk_id>/<int:slot_id>', methods=['GET'])
 def get_desk_hold_status(desk_id, slot_id):
     """
-    Check if a desk is on hold for a specific slot
+    Check if a desk is on hold for a specific slot. The caller, from the
+    session token or user_id, reads their own recent holds.
     """
-    result, status_code = DeskHold.get_desk_hold_status(desk_id, slot_id)
+    user_id = session_user_id() or request.args.get('user_id')
+    result, status_code = DeskHold.get_desk_hold_status(desk_id, slot_id, user_id=user_id)
+    return jsonify(result), status_code
+
+@desk_hold_bp.route('/api/desks/hold/status', methods=['POST'])
+def get_desk_hold_statuses():
+    """
+    Check many desk slots at once. The body is
+    {"slots": [{"desk_id": 1, "slot_id": 2, "booking_date": "YYYY-MM-DD"}, ...]};
+    the response maps "desk_id:slot_id:booking_date" to booked, held or available.
+    The caller, from the session token or a user_id in the body, reads their
+    own recent holds.
+    """
+    data = request.get_json(silent=True)
+    slots = data.get('slots') if isinstance(data, dict) else None
+    if not isinstance(slots, list):
+        return jsonify({"error": "slots must be a list"}), 400
+    if len(slots) > HOLD_STATUS_BATCH_MAX:
+        return jsonify({"error": f"At most {HOLD_STATUS_BATCH_MAX} slots per request"}), 400
+
+    keys = []
+    for slot in slots:
+        try:
+            booking_date = datetime.strptime(slot['booking_date'], '%Y-%m-%d').date().isoformat()
+            keys.append((int(slot['desk_id']), int(slot['slot_id']), booking_date))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "Each slot needs integer desk_id and slot_id and a YYYY-MM-DD booking_date"}), 400
+
+    user_id = session_user_id() or data.get('user_id')
+    result, status_code = DeskHold.get_hold_statuses(keys, user_id=user_id)
     return jsonify(result), status_code
 
 @desk_hold_bp.route('/api/desks/hold', methods=['DELETE'])
 def delete_held_booking():
     """
-    Delete a held booking transaction by its ID
+    Delete a held booking transaction by its ID and booking date
     """
     data = request.get_json()
     if not data or 'booking_id' not in data:
         return jsonify({"error": "No booking_id provided in request body"}), 400
+    if 'booking_date' not in data:
+        return jsonify({"error": "No booking_date provided in request body"}), 400
     
     booking_id = data['booking_id']
-    result, status_code = DeskHold.delete_held_booking(booking_id)
+    result, status_code = DeskHold.delete_held_booking(booking_id, data['booking_date'])
     return jsonify(result), status_code 
\ No newline at end of file
@@ -1,79 +1,98 @@
-from flask import Blueprint, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from app.models.desk_model import DeskData
-from app.config.database import DB_CONFIG
-import threading
+from app.models.desk_hold_model import DeskHold
+from app.realtime.outbox import create_client_manager
+from app.realtime.subscriptions import canonical_filters, create_subscriptions, filter_room
+from app.realtime.topics import availability_for
+from app.utils.sessions import session_user_id
+from app.utils.stale_cache import read_cache, stale_aware_response
+from app.config.settings import (
+    USER_BOOKINGS_PAGE_SIZE,
+    USER_BOOKINGS_MAX_PAGE_SIZE,
+    DESK_UPDATE_INTERVAL_SECONDS,
+    REALTIME_BACKEND,
+    SOCKETIO_MESSAGE_QUEUE,
+    SOCKET_OUTBOX_RETRY_SECONDS,
+    ASYNC_MODE
+)
+import atexit
 import time
-import gevent
-from psycopg2 import pool
 
 desk_bp = Blueprint('desk', __name__)
 
+# Desk updates reach each client through a bounded, coalescing outbox; with
+# a message queue, emits from any worker or host reach every worker's clients
+client_manager = create_client_manager(SOCKETIO_MESSAGE_QUEUE)
+
 # Configure SocketIO with optimized settings
 socketio = SocketIO(
     cors_allowed_origins="*",
-    async_mode='threading',
+    async_mode=ASYNC_MODE,
+    client_manager=client_manager,
     logger=False,
     engineio_logger=False
 )
 
-# Create connection pool
-connection_pool = pool.ThreadedConnectionPool(
-    minconn=1,
-    maxconn=10,
-    **DB_CONFIG
-)
-
-# Store connected clients and their active filters
-connected_clients = {}
-client_lock = threading.Lock()
-
-def get_db_connection():
-    """Get a connection from the pool"""
-    return connection_pool.getconn()
+# Every client joins the room of its canonical filters; the subscription
+# store knows which rooms have clients, here or on other workers
+subscriptions = create_subscriptions(REALTIME_BACKEND, SOCKETIO_MESSAGE_QUEUE)
+atexit.register(subscriptions.close)
 
-def return_db_connection(conn):
-    """Return a connection to the pool"""
-    connection_pool.putconn(conn)
+def push_desk_updates() -> int:
+    """
+    Send every room with subscribers the desk availability for its filters.
+    Each location/date topic is queried once per push, whatever the rooms
+    watching it filter on.
+    Returns: Number of rooms updated
+    """
+    updated = 0
+    topics = {}
+    for room, filters in subscriptions.active_rooms().items():
+        try:
+            desk_data, status_code = availability_for(filters, topics)
+            if status_code == 200:
+                socketio.emit('desk_update', desk_data, room=room)
+                updated += 1
+        except Exception as e:
+            print(f"Error in background task for room {room}: {str(e)}")
+    return updated
 
 def background_desk_updates():
     """
-    Optimized background task to send desk updates to connected clients
+    Keep this worker's subscriptions alive and, on the one worker elected
+    producer, push desk updates to every room
     """
     while True:
-        if connected_clients:
-            # Batch process clients to reduce database load
-            with client_lock:
-                clients_to_update = list(connected_clients.items())
-            
-            for client_id, filters in clients_to_update:
-                try:
-                    desk_data, status_code = DeskData.get_desk_availability(
-                        location_ids=filters.get('location_ids'), 
-                        desk_type_ids=filters.get('desk_type_ids'),
-                        slot_type_ids=filters.get('slot_type_ids'),
-                        booking_date=filters.get('booking_date')
-                    )
-                    if status_code == 200:
-                        socketio.emit('desk_update', desk_data, room=client_id)
-                except Exception as e:
-                    print(f"Error in background task for client {client_id}: {str(e)}")
-                    # Remove problematic client
-                    with client_lock:
-                        if client_id in connected_clients:
-                            del connected_clients[client_id]
+        subscriptions.heartbeat()
+        if subscriptions.is_producer():
+            push_desk_updates()
         
         # Increased sleep time to reduce server load
-        time.sleep(10)
+        socketio.sleep(DESK_UPDATE_INTERVAL_SECONDS)
+
+def background_outbox_retry():
+    """Deliver held desk updates to clients that caught up; drop the ones that don't"""
+    while True:
+        socketio.sleep(SOCKET_OUTBOX_RETRY_SECONDS)
+        try:
+            client_manager.retry_held()
+        except Exception as e:
+            print(f"Error retrying held socket updates: {str(e)}")
 
-# Start background task in a separate thread
-def start_background_task():
-    thread = threading.Thread(target=background_desk_updates)
-    thread.daemon = True
-    thread.start()
+def start_desk_updates():
+    """Start the update loops as Socket.IO background tasks, green under eventlet"""
+    socketio.start_background_task(background_outbox_retry)
+    return socketio.start_background_task(background_desk_updates)
 
-# Start the background task when the module is loaded
-start_background_task()
+def subscribe(client_id, filters):
+    """Move the client into the room of its filters"""
+    room = filter_room(filters)
+    previous = subscriptions.room_of(client_id)
+    if previous and previous != room:
+        leave_room(previous)
+    join_room(room)
+    subscriptions.subscribe(client_id, room, filters)
 
 @socketio.on('connect')
 def handle_connect():
@@ -81,17 +100,12 @@ def handle_connect():
     Handle client connection with optimized initial data load
     """
     client_id = request.sid
-    with client_lock:
-        connected_clients[client_id] = {
-            'location_ids': [], 
-            'desk_type_ids': [], 
-            'slot_type_ids': [], 
-            'booking_date': None
-        }
+    filters = canonical_filters(None)
+    subscribe(client_id, filters)
     
     # Send initial desk data without filters
     try:
-        desk_data, status_code = DeskData.get_desk_availability()
+        desk_data, status_code = availability_for(filters)
         if status_code == 200:
             emit('desk_update', desk_data, room=client_id)
     except Exception as e:
@@ -102,10 +116,7 @@ def handle_disconnect():
     """
     Handle client disconnection with cleanup
     """
-    client_id = request.sid
-    with client_lock:
-        if client_id in connected_clients:
-            del connected_clients[client_id]
+    subscriptions.unsubscribe(request.sid)
 
 @socketio.on('filter_update')
 def handle_filter_update(filters):
@@ -113,17 +124,11 @@ def handle_filter_update(filters):
     Handle filter updates with optimized data fetching
     """
     client_id = request.sid
-    with client_lock:
-        if client_id in connected_clients:
-            connected_clients[client_id] = filters
+    filters = canonical_filters(filters)
+    subscribe(client_id, filters)
     
     try:
-        desk_data, status_code = DeskData.get_desk_availability(
-            location_ids=filters.get('location_ids'), 
-            desk_type_ids=filters.get('desk_type_ids'),
-            slot_type_ids=filters.get('slot_type_ids'),
-            booking_date=filters.get('booking_date')
-        )
+        desk_data, status_code = availability_for(filters)
         if status_code == 200:
             emit('desk_update', desk_data, room=client_id)
     except Exception as e:
@@ -139,6 +144,8 @@ def get_desks():
         desk_type_ids = request.args.getlist('desk_type_ids')
         slot_type_ids = request.args.getlist('slot_type_ids')
         booking_date = request.args.get('booking_date')
+        # Whose reads to keep on the primary after their own holds and bookings
+        user_id = session_user_id() or request.args.get('user_id')
 
         # Convert comma-separated strings to lists if necessary
         if location_ids and len(location_ids) == 1 and ',' in location_ids[0]:
@@ -148,13 +155,29 @@ def get_desks():
         if slot_type_ids and len(slot_type_ids) == 1 and ',' in slot_type_ids[0]:
             slot_type_ids = slot_type_ids[0].split(',')
 
-        desk_data, status_code = DeskData.get_desk_availability(
-            location_ids=location_ids if location_ids else None,
-            desk_type_ids=desk_type_ids if desk_type_ids else None,
-            slot_type_ids=slot_type_ids if slot_type_ids else None,
-            booking_date=booking_date
+        location_ids = location_ids if location_ids else None
+        desk_type_ids = desk_type_ids if desk_type_ids else None
+        slot_type_ids = slot_type_ids if slot_type_ids else None
+        booking_date = booking_date or time.strftime('%Y-%m-%d')
+
+        cache_key = (
+            'desks',
+            tuple(sorted(location_ids or [])),
+            tuple(sorted(desk_type_ids or [])),
+            tuple(sorted(slot_type_ids or [])),
+            booking_date
         )
-        return jsonify(desk_data), status_code
+        desk_data, status_code, stale_age = read_cache.serve(
+            cache_key,
+            lambda: DeskData.get_desk_availability(
+                location_ids=location_ids,
+                desk_type_ids=desk_type_ids,
+                slot_type_ids=slot_type_ids,
+                booking_date=booking_date,
+                user_id=user_id
+            )
+        )
+        return stale_aware_response(desk_data, status_code, stale_age)
     except Exception as e:
         print(f"Error in get_desks endpoint: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
@@ -162,7 +185,8 @@ def get_desks():
 @desk_bp.route('/api/desks/held', methods=['POST'])
 def hold_desk():
     """
-    Optimized API endpoint to put a desk slot on hold
+    Put a desk slot on hold for a booking date; the same hold as
+    /api/desks/hold, so a slot that is already held or booked conflicts
     """
     try:
         data = request.get_json()
@@ -180,7 +204,7 @@ def hold_desk():
         except ValueError:
             return jsonify({"error": "desk_id and slot_id must be integers"}), 400
 
-        response, status_code = DeskData.hold_desk_slot(user_id, desk_id, slot_id)
+        response, status_code = DeskHold.put_desk_on_hold(user_id, desk_id, slot_id, booking_date)
         return jsonify(response), status_code
 
     except Exception as e:
@@ -190,15 +214,50 @@ def hold_desk():
 @desk_bp.route('/api/desks/user-bookings', methods=['GET'])
 def get_user_bookings():
     """
-    Optimized endpoint to get user bookings
+    Get a user's bookings, newest first.
+    Without paging parameters the whole history is returned as before.
+    With limit and/or cursor (plus optional status, from_date, to_date) one
+    keyset page is returned with a next_cursor. With stream=true the whole
+    (optionally filtered) history is streamed from a server-side cursor.
     """
     try:
         user_id = request.args.get('user_id')
         if not user_id:
             return jsonify({"error": "User ID is required"}), 400
-            
-        result, status_code = DeskData.get_user_bookings(user_id)
-        return jsonify(result), status_code
+
+        statuses = [status for status in request.args.get('status', '').split(',') if status] or None
+        from_date = request.args.get('from_date')
+        to_date = request.args.get('to_date')
+
+        if request.args.get('stream', '').lower() in ('1', 'true'):
+            stream, status_code = DeskData.stream_user_bookings(
+                user_id, statuses=statuses, from_date=from_date, to_date=to_date
+            )
+            if status_code != 200:
+                return jsonify(stream), status_code
+            return Response(stream_with_context(stream), mimetype='application/json')
+
+        paging_args = ('limit', 'cursor', 'status', 'from_date', 'to_date')
+        if any(arg in request.args for arg in paging_args):
+            limit = request.args.get('limit', USER_BOOKINGS_PAGE_SIZE, type=int)
+            if not limit or limit < 1:
+                return jsonify({"error": "limit must be a positive integer"}), 400
+            limit = min(limit, USER_BOOKINGS_MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor')
+
+            result, status_code, stale_age = read_cache.serve(
+                ('user-bookings-page', user_id, limit, cursor, tuple(statuses or []), from_date, to_date),
+                lambda: DeskData.get_user_bookings_page(
+                    user_id, limit, cursor=cursor, statuses=statuses, from_date=from_date, to_date=to_date
+                )
+            )
+            return stale_aware_response(result, status_code, stale_age)
+
+        result, status_code, stale_age = read_cache.serve(
+            ('user-bookings', user_id),
+            lambda: DeskData.get_user_bookings(user_id)
+        )
+        return stale_aware_response(result, status_code, stale_age)
     except Exception as e:
         print(f"Error in get_user_bookings endpoint: {str(e)}")
-        return jsonify({"error": "Internal server error"}), 500 
\ No newline at end of file
+        return jsonify({"error": "Internal server error"}), 500
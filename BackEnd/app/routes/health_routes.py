@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, jsonify
+from app.config import settings
+from app.utils.db_utils import db_breaker, replica_router, pool_stats, CircuitBreaker
+from app.utils.prepared_statements import prepared_statement_stats
+from app.utils.metrics import render_metrics
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/api/health/db', methods=['GET'])
+def get_db_health():
+    """
+    Report the database circuit breaker state and counters, replica health,
+    connection pools and prepared statement timings
+    """
+    breaker = db_breaker.snapshot()
+    status_code = 503 if breaker["state"] == CircuitBreaker.OPEN else 200
+    return jsonify({
+        "circuit_breaker": breaker,
+        "replicas": replica_router.snapshot(),
+        "pools": pool_stats(),
+        "prepared_statements": prepared_statement_stats()
+    }), status_code
+
+@health_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, model call and phase latency histograms in the Prometheus text format"""
+    if not settings.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -1,36 +1,72 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from app.models.master_data_model import MasterData
+from app.utils.admin_auth import admin_required
 
 master_data_bp = Blueprint('master_data', __name__)
 
+def _snapshot_response(build_payload):
+    """
+    Serve a view of the master data snapshot with version headers so clients
+    can revalidate with If-None-Match instead of downloading it again
+    """
+    snapshot, status_code = MasterData.get_snapshot()
+    if snapshot is None:
+        return jsonify({"error": "Failed to fetch master data"}), status_code
+
+    etag = f'"{snapshot.version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build_payload(snapshot))
+    response.headers['ETag'] = etag
+    response.headers['X-Master-Data-Version'] = snapshot.version
+    response.headers['Cache-Control'] = 'no-cache'
+    if MasterData.is_stale():
+        response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
+
 @master_data_bp.route('/api/master-data', methods=['GET'])
 def get_all_master_data():
     """
     Get all master data (locations, slots, desk types) in a single call
     """
-    result, status_code = MasterData.get_all_master_data()
-    return jsonify(result), status_code
+    return _snapshot_response(lambda snapshot: {**snapshot.as_dict(), "version": snapshot.version})
 
 @master_data_bp.route('/api/master-data/locations', methods=['GET'])
 def get_locations():
     """
     Get all locations
     """
-    locations, status_code = MasterData.get_locations()
-    return jsonify({"locations": locations}), status_code
+    return _snapshot_response(lambda snapshot: {"locations": [dict(loc) for loc in snapshot.locations]})
 
 @master_data_bp.route('/api/master-data/slots', methods=['GET'])
 def get_slots():
     """
     Get all slots
     """
-    slots, status_code = MasterData.get_slots()
-    return jsonify({"slots": slots}), status_code
+    return _snapshot_response(lambda snapshot: {"slots": [dict(slot) for slot in snapshot.slots]})
 
 @master_data_bp.route('/api/master-data/desk-types', methods=['GET'])
 def get_desk_types():
     """
     Get all desk types
     """
-    desk_types, status_code = MasterData.get_desk_types()
-    return jsonify({"desk_types": desk_types}), status_code 
\ No newline at end of file
+    return _snapshot_response(lambda snapshot: {"desk_types": [dict(desk) for desk in snapshot.desk_types]})
+
+@master_data_bp.route('/api/master-data/reload', methods=['POST'])
+@admin_required
+def reload_master_data():
+    """
+    Reload the master data snapshot from the database
+    """
+    snapshot, status_code = MasterData.reload()
+    if status_code != 200:
+        return jsonify({
+            "error": "Failed to reload master data",
+            "version": snapshot.version if snapshot else None
+        }), status_code
+
+    return jsonify({
+        "message": "Master data reloaded successfully",
+        "version": snapshot.version
+    }), 200
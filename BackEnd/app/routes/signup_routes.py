@@ -1,14 +1,13 @@
 from flask import Blueprint, request, jsonify
-from app.utils.db_utils import get_db_connection
-from app.config.database import DB_CONFIG
+from app.models.user_model import EMAIL_PATTERN, User
+from app.utils.passwords import PasswordHasherBusy, hash_password
 import re
 
 signup_bp = Blueprint('signup', __name__)
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(re.match(EMAIL_PATTERN, email))
 
 @signup_bp.route('/api/auth/signup', methods=['POST'])
 def signup():
@@ -32,43 +31,16 @@ def signup():
     if not validate_email(email):
         return jsonify({'error': 'Invalid email format'}), 400
 
-    conn = get_db_connection(DB_CONFIG)
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-
+    # Hashed before User.create_user takes a connection; it is the slow part
     try:
-        cursor = conn.cursor()
-        # Check if email already exists
-        cursor.execute("SELECT id FROM sena.users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            return jsonify({'error': 'Email already registered'}), 409
-
-        # Create new user - let database generate UUID
-        cursor.execute("""
-            INSERT INTO sena.users (email, first_name, last_name, phone, password)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id, email, first_name, last_name, phone, created_at, updated_at, is_active
-        """, (email, first_name, last_name, phone, password))
-        
-        new_user = cursor.fetchone()
-        conn.commit()
-        
-        return jsonify({
-            'message': 'User created successfully',
-            'user': {
-                'id': new_user[0],
-                'email': new_user[1],
-                'first_name': new_user[2],
-                'last_name': new_user[3],
-                'phone': new_user[4],
-                'created_at': new_user[5],
-                'updated_at': new_user[6],
-                'is_active': new_user[7]
-            }
-        }), 201
-
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': f'Failed to create user: {str(e)}'}), 500
-    finally:
-        conn.close()
+        password_hash = hash_password(password)
+    except PasswordHasherBusy:
+        return jsonify({'error': 'Too many sign-ups in progress, try again shortly'}), 503, {'Retry-After': '1'}
+
+    result, status_code = User.create_user(email, first_name, last_name, phone, password_hash=password_hash)
+    if status_code != 201:
+        return jsonify(result), status_code
+    return jsonify({
+        'message': 'User created successfully',
+        'user': result
+    }), 201
@@ -0,0 +1,24 @@
+from functools import wraps
+from flask import jsonify, request
+from app.config import settings
+import hmac
+
+def _supplied_token() -> str:
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return request.headers.get('X-Admin-Token', '')
+
+def admin_required(view):
+    """
+    Only let requests carrying the ADMIN_API_TOKEN through to the view.
+    Admin endpoints answer 403 while no token is configured.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not settings.ADMIN_API_TOKEN:
+            return jsonify({"error": "Admin API is not configured"}), 403
+        if not hmac.compare_digest(_supplied_token().encode(), settings.ADMIN_API_TOKEN.encode()):
+            return jsonify({"error": "Admin token required"}), 401
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,15 +1,557 @@
 import psycopg2
+import psycopg2.extensions
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from app.utils import metrics
+from app.utils.green import blocking_io
+from app.utils.query_log import query_log
+from app.config.settings import (
+    DB_CONNECT_TIMEOUT_SECONDS,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_BREAKER_WINDOW_SECONDS,
+    DB_BREAKER_MIN_REQUESTS,
+    DB_BREAKER_FAILURE_RATIO,
+    DB_BREAKER_OPEN_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_LAG_CHECK_SECONDS,
+    REPLICA_PIN_MAX_USERS,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_WAIT_SECONDS,
+    DB_POOL_MAX_LIFETIME_SECONDS
+)
+import math
+import threading
+import time
 
-def get_db_connection(db_config):
-    try:
-        conn = psycopg2.connect(
-            host=db_config['host'],
-            port=db_config['port'],
-            dbname=db_config['dbname'],
-            user=db_config['user'],
-            password=db_config['password']
-        )
+class DeadlineExceeded(psycopg2.OperationalError):
+    """Raised instead of sending a statement once the request deadline has passed"""
+
+class CircuitBreaker:
+    """
+    Fails database calls fast once the recent error rate spikes.
+    CLOSED lets everything through, OPEN rejects everything for open_seconds,
+    then HALF_OPEN lets a single probe through to decide whether to close again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window_seconds: int, min_requests: int, failure_ratio: float, open_seconds: int):
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.failure_ratio = failure_ratio
+        self.open_seconds = open_seconds
+        self.state = CircuitBreaker.CLOSED
+        self._outcomes = deque()  # (timestamp, succeeded)
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+        self.successes_total = 0
+        self.failures_total = 0
+        self.rejected_total = 0
+        self.opened_total = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitBreaker.OPEN
+        self._opened_at = now
+        self._probe_started_at = None
+        self.opened_total += 1
+        print(f"[CircuitBreaker] Database circuit opened for {self.open_seconds}s")
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CircuitBreaker.OPEN and now - self._opened_at >= self.open_seconds:
+                self.state = CircuitBreaker.HALF_OPEN
+                self._probe_started_at = None
+
+            if self.state == CircuitBreaker.HALF_OPEN:
+                # A probe that never reported back must not wedge the breaker
+                if self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds:
+                    self._probe_started_at = now
+                    return True
+
+            if self.state == CircuitBreaker.CLOSED:
+                return True
+
+            self.rejected_total += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.successes_total += 1
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self.state = CircuitBreaker.CLOSED
+                self._outcomes.clear()
+                print("[CircuitBreaker] Database circuit closed")
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.failures_total += 1
+            if self.state == CircuitBreaker.HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            if self.state == CircuitBreaker.CLOSED and len(self._outcomes) >= self.min_requests:
+                failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+                if failures / len(self._outcomes) >= self.failure_ratio:
+                    self._open(now)
+
+    def snapshot(self) -> Dict:
+        """Current state and counters, for the health/metrics endpoints"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            window_failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            return {
+                "state": self.state,
+                "window_requests": len(self._outcomes),
+                "window_failure_rate": round(window_failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "successes_total": self.successes_total,
+                "failures_total": self.failures_total,
+                "rejected_total": self.rejected_total,
+                "opened_total": self.opened_total
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self._outcomes.clear()
+            self._probe_started_at = None
+
+db_breaker = CircuitBreaker(
+    window_seconds=DB_BREAKER_WINDOW_SECONDS,
+    min_requests=DB_BREAKER_MIN_REQUESTS,
+    failure_ratio=DB_BREAKER_FAILURE_RATIO,
+    open_seconds=DB_BREAKER_OPEN_SECONDS
+)
+
+# Absolute time.monotonic() deadline of the current request, if any
+_request_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+def set_request_deadline(timeout_seconds: float) -> None:
+    _request_deadline.set(time.monotonic() + timeout_seconds)
+
+def clear_request_deadline() -> None:
+    _request_deadline.set(None)
+
+# Wall-clock times (time.time()) of the current client's last write, as
+# carried in from an earlier request (e.g. in a cookie), and of a write
+# noted during this request, for the app to hand back to the client
+_client_last_write: ContextVar[Optional[float]] = ContextVar('client_last_write', default=None)
+_request_write: ContextVar[Optional[float]] = ContextVar('request_write', default=None)
+
+def set_client_last_write(written_at: Optional[float]) -> None:
+    _client_last_write.set(written_at)
+    _request_write.set(None)
+
+def request_write_time() -> Optional[float]:
+    return _request_write.get()
+
+def clear_client_last_write() -> None:
+    _client_last_write.set(None)
+    _request_write.set(None)
+
+def remaining_deadline_ms() -> Optional[int]:
+    """Milliseconds left before the current request's deadline, or None without one"""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return int((deadline - time.monotonic()) * 1000)
+
+class GuardedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor used for every connection from get_db_connection. It tightens
+    statement_timeout to the time left on the request deadline, reports
+    the outcome of each statement to the circuit breaker of the server the
+    connection belongs to and accounts its duration in the query log.
+    """
+
+    def _apply_deadline(self) -> None:
+        remaining_ms = remaining_deadline_ms()
+        if remaining_ms is None:
+            return
+        if remaining_ms <= 0:
+            raise DeadlineExceeded("Request deadline exceeded before running the query")
+        conn = self.connection
+        if conn.autocommit:
+            # No transaction to scope it to; putconn restores the default
+            if remaining_ms < conn.statement_timeout_ms:
+                super().execute("SET statement_timeout = %s", (remaining_ms,))
+                conn.statement_timeout_ms = remaining_ms
+            return
+        # Set for the current transaction only, so a commit or rollback can't
+        # leave it stale; no transaction open means none is in force
+        if conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.transaction_timeout_ms = None
+        if remaining_ms < (conn.transaction_timeout_ms or conn.statement_timeout_ms):
+            super().execute("SELECT set_config('statement_timeout', %s, true)", (str(remaining_ms),))
+            conn.transaction_timeout_ms = remaining_ms
+
+    def _run(self, method, query, vars):
+        self._apply_deadline()
+        start = time.perf_counter()
+        try:
+            result = method(query, vars)
+        except psycopg2.OperationalError:
+            # Connection drops and statement timeouts; not constraint or syntax errors
+            self.connection.breaker.record_failure()
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.record('db_query', seconds)
+        self.connection.breaker.record_success()
+        return result, seconds
+
+    def execute(self, query, vars=None):
+        result, seconds = self._run(super().execute, query, vars)
+        query_log.record(self, query, vars, seconds, explain_budget_ms=remaining_deadline_ms())
+        return result
+
+    def executemany(self, query, vars_list):
+        result, seconds = self._run(super().executemany, query, vars_list)
+        query_log.record(self, query, None, seconds, explain_budget_ms=0)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        # psycopg2 refuses COPY while the wait callback is set, so this blocks
+        # the worker for the whole COPY; send large inputs in bounded batches
+        with blocking_io():
+            result, seconds = self._run(lambda query, source: super(GuardedCursor, self).copy_expert(query, source, size),
+                                        sql, file)
+        query_log.record(self, sql, None, seconds, explain_budget_ms=0)
+        return result
+
+class GuardedConnection(psycopg2.extensions.connection):
+    """
+    Connection handed out by get_db_connection. Calling close() returns it to
+    its pool instead of disconnecting, so models keep their usual
+    try/finally conn.close() and still reuse connections.
+    """
+    statement_timeout_ms = DB_STATEMENT_TIMEOUT_MS
+    # Deadline-derived statement_timeout set locally in the open transaction
+    transaction_timeout_ms = None
+    breaker = db_breaker
+    is_replica = False
+    pool = None
+    in_use = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_at = time.monotonic()
+        # Names of statements already PREPAREd on this server session
+        self.prepared_statements = set()
+
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        if self.in_use:
+            self.pool.putconn(self)
+
+    def disconnect(self):
+        """Close the underlying server connection"""
+        super().close()
+
+class PoolExhausted(psycopg2.OperationalError):
+    """Raised when no pooled connection frees up in time"""
+
+class ConnectionPool:
+    """
+    Bounded LIFO pool of connections to one database server. Connections are
+    opened on demand, cleaned up on check-in and recycled after
+    DB_POOL_MAX_LIFETIME_SECONDS.
+    """
+
+    def __init__(self, connect, max_size: int):
+        self._connect = connect
+        self.max_size = max_size
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def getconn(self, wait_seconds: float) -> GuardedConnection:
+        if not self._slots.acquire(timeout=max(wait_seconds, 0)):
+            raise PoolExhausted("No database connection available")
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    conn = self._connect()
+                    conn.pool = self
+                    self.connections_opened += 1
+                elif idle.closed or time.monotonic() - idle.created_at > DB_POOL_MAX_LIFETIME_SECONDS:
+                    idle.disconnect()
+                else:
+                    conn = idle
+        except Exception:
+            self._slots.release()
+            raise
+        conn.in_use = True
         return conn
+
+    def putconn(self, conn: GuardedConnection) -> None:
+        conn.in_use = False
+        try:
+            if conn.closed:
+                return
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.statement_timeout_ms != DB_STATEMENT_TIMEOUT_MS:
+                # A plain cursor, so resetting isn't subject to deadlines or the breaker
+                cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+                cursor.execute("SET statement_timeout = %s", (DB_STATEMENT_TIMEOUT_MS,))
+                conn.commit()
+                conn.statement_timeout_ms = DB_STATEMENT_TIMEOUT_MS
+            with self._lock:
+                self._idle.append(conn)
+        except Exception as e:
+            print(f"Discarding pooled connection: {e}")
+            conn.disconnect()
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "max_size": self.max_size,
+            "idle": idle,
+            "connections_opened": self.connections_opened
+        }
+
+    def closeall(self) -> None:
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            conn.disconnect()
+
+class ReplicaRouter:
+    """
+    Chooses a read replica for read-only queries: round-robin over replicas
+    whose breaker is closed and whose replay lag is within
+    REPLICA_MAX_LAG_SECONDS. Users who wrote recently are pinned to the
+    primary, so they always read their own holds and bookings. Pins by user
+    are kept per process; a client that carries the time of its last write
+    (see set_client_last_write) is pinned on every worker.
+    """
+
+    def __init__(self, max_lag_seconds: float, lag_check_seconds: float, max_pinned_users: int):
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_seconds = lag_check_seconds
+        self.max_pinned_users = max_pinned_users
+        self._next = 0
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lag: Dict[str, tuple] = {}  # dsn -> (checked_at, lag_seconds)
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def pin_seconds(self) -> float:
+        # A replica is only used if its lag was within max_lag_seconds when last
+        # checked, so a write older than this is visible on every usable replica
+        return self.max_lag_seconds + self.lag_check_seconds
+
+    def note_write(self, *user_keys) -> None:
+        """Record that these users just wrote, pinning their reads to the primary"""
+        _request_write.set(time.time())
+        now = time.monotonic()
+        with self._lock:
+            for user_key in user_keys:
+                if user_key is None:
+                    continue
+                self._writes[str(user_key)] = now
+                self._writes.move_to_end(str(user_key))
+            while len(self._writes) > self.max_pinned_users:
+                self._writes.popitem(last=False)
+
+    def is_pinned(self, user_key) -> bool:
+        if user_key is None:
+            return False
+        with self._lock:
+            written_at = self._writes.get(str(user_key))
+        return written_at is not None and time.monotonic() - written_at < self.pin_seconds
+
+    def client_pinned(self) -> bool:
+        """Whether the current client wrote recently, on whichever worker"""
+        written_at = _client_last_write.get()
+        # A time in the future can only be forged or skewed; don't let it pin forever
+        return written_at is not None and abs(time.time() - written_at) < self.pin_seconds
+
+    def breaker_for(self, dsn: str) -> CircuitBreaker:
+        with self._lock:
+            if dsn not in self._breakers:
+                self._breakers[dsn] = CircuitBreaker(
+                    window_seconds=DB_BREAKER_WINDOW_SECONDS,
+                    min_requests=1,
+                    failure_ratio=DB_BREAKER_FAILURE_RATIO,
+                    open_seconds=DB_BREAKER_OPEN_SECONDS
+                )
+            return self._breakers[dsn]
+
+    def candidates(self, replicas: List[str]) -> List[str]:
+        """Replicas in round-robin order starting after the last one used"""
+        with self._lock:
+            start = self._next % len(replicas)
+            self._next += 1
+        return replicas[start:] + replicas[:start]
+
+    def lag_ok(self, dsn: str, conn) -> bool:
+        """Check replay lag, at most once every lag_check_seconds per replica"""
+        now = time.monotonic()
+        checked = self._lag.get(dsn)
+        if checked is None or now - checked[0] >= self.lag_check_seconds:
+            cursor = conn.cursor()
+            # An idle primary generates no WAL, so a caught-up replica counts as zero lag
+            cursor.execute("""
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery() THEN 0
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END
+            """)
+            checked = (now, float(cursor.fetchone()[0]))
+            self._lag[dsn] = checked
+            conn.rollback()
+        return checked[1] <= self.max_lag_seconds
+
+    def snapshot(self) -> List[Dict]:
+        return [
+            {
+                "replica": index,
+                "circuit_breaker": self._breakers[dsn].snapshot() if dsn in self._breakers else None,
+                "lag_seconds": self._lag[dsn][1] if dsn in self._lag else None
+            }
+            for index, dsn in enumerate(self._breakers)
+        ]
+
+replica_router = ReplicaRouter(
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS,
+    lag_check_seconds=REPLICA_LAG_CHECK_SECONDS,
+    max_pinned_users=REPLICA_PIN_MAX_USERS
+)
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def _connect_timeout() -> int:
+    """Connect timeout for a new connection, capped by the request deadline"""
+    remaining_ms = remaining_deadline_ms()
+    if remaining_ms is None:
+        return DB_CONNECT_TIMEOUT_SECONDS
+    # libpq treats anything below 2 seconds as 2
+    return max(2, min(DB_CONNECT_TIMEOUT_SECONDS, math.ceil(remaining_ms / 1000)))
+
+def _get_pool(role: str, connect_kwargs: Dict) -> ConnectionPool:
+    key = (role,) + tuple(sorted((name, str(value)) for name, value in connect_kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            def connect():
+                # The session default; GuardedCursor tightens it per request deadline
+                return psycopg2.connect(
+                    connect_timeout=_connect_timeout(),
+                    options=f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+                    connection_factory=GuardedConnection,
+                    cursor_factory=GuardedCursor,
+                    **connect_kwargs
+                )
+            _pools[key] = ConnectionPool(connect, DB_POOL_MAX_SIZE)
+        return _pools[key]
+
+def pool_stats() -> List[Dict]:
+    with _pools_lock:
+        pools = list(_pools.items())
+    return [{"role": key[0], **pool.stats()} for key, pool in pools]
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
+
+def _checkout(pool: ConnectionPool, breaker: CircuitBreaker):
+    """Take a connection from the pool within the request deadline, or return None"""
+    remaining_ms = remaining_deadline_ms()
+    if remaining_ms is not None and remaining_ms <= 0:
+        print("Database connection error: request deadline exceeded")
+        return None
+    wait_seconds = DB_POOL_WAIT_SECONDS
+    if remaining_ms is not None:
+        wait_seconds = min(wait_seconds, remaining_ms / 1000)
+
+    try:
+        with metrics.timer('db_connect'):
+            conn = pool.getconn(wait_seconds)
+    except PoolExhausted as e:
+        print(f"Database connection error: {e}")
+        return None
     except Exception as e:
+        breaker.record_failure()
         print(f"Database connection error: {e}")
         return None
+
+    conn.breaker = breaker
+    return conn
+
+def _connect_replica(replicas: List[str]):
+    """Check out a connection to the next healthy replica that is not lagging, or return None"""
+    for dsn in replica_router.candidates(replicas):
+        breaker = replica_router.breaker_for(dsn)
+        if not breaker.allow_request():
+            continue
+        conn = _checkout(_get_pool('replica', {'dsn': dsn}), breaker)
+        if conn is None:
+            continue
+
+        conn.is_replica = True
+        try:
+            if replica_router.lag_ok(dsn, conn):
+                return conn
+        except Exception as e:
+            print(f"Replica lag check error: {e}")
+        conn.close()
+    return None
+
+def get_db_connection(db_config, read_only: bool = False, user_key=None):
+    """
+    Check out a pooled connection to the primary, or to a replica for read-only work.
+    close() returns the connection to its pool.
+    Args:
+        db_config: DB_CONFIG-style dict, optionally with a 'replicas' DSN list
+        read_only: The caller only reads, so a replica may serve it
+        user_key: User id (or email) the read is for; users who wrote within
+            the last few seconds are kept on the primary, as are clients
+            whose last write (set_client_last_write) was that recent
+    Returns: A connection, or None if no database could be reached
+    """
+    replicas = db_config.get('replicas')
+    if read_only and replicas and not replica_router.is_pinned(user_key) and not replica_router.client_pinned():
+        conn = _connect_replica(replicas)
+        if conn:
+            return conn
+
+    if not db_breaker.allow_request():
+        print("Database connection error: circuit breaker is open")
+        return None
+
+    pool = _get_pool('primary', {
+        'host': db_config['host'],
+        'port': db_config['port'],
+        'dbname': db_config['dbname'],
+        'user': db_config['user'],
+        'password': db_config['password']
+    })
+    return _checkout(pool, db_breaker)
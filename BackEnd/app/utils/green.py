@@ -0,0 +1,63 @@
+"""
+The worker's concurrency model. With ASYNC_MODE=eventlet (production)
+everything runs on greenlets in one OS thread: the standard library is
+monkey-patched, so threading.Thread and time.sleep are green, and psycopg2
+waits for the server through the eventlet hub instead of blocking it. A
+slow query then only holds up the request that sent it.
+"""
+from contextlib import contextmanager
+from app.config.settings import ASYNC_MODE, DB_CONNECT_TIMEOUT_SECONDS
+import psycopg2
+import psycopg2.extensions
+
+def _eventlet_wait(conn, timeout=None):
+    """psycopg2 wait callback that yields to the eventlet hub while libpq waits"""
+    from eventlet.hubs import trampoline
+
+    # libpq ignores connect_timeout for non-blocking connects
+    wait_timeout = DB_CONNECT_TIMEOUT_SECONDS if conn.status == psycopg2.extensions.STATUS_SETUP else None
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        if state == psycopg2.extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True, timeout=wait_timeout,
+                       timeout_exc=psycopg2.OperationalError("timeout expired"))
+        elif state == psycopg2.extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True, timeout=wait_timeout,
+                       timeout_exc=psycopg2.OperationalError("timeout expired"))
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state}")
+
+def make_psycopg_green() -> None:
+    """Route psycopg2's waits through the eventlet hub, for connections opened from now on"""
+    psycopg2.extensions.set_wait_callback(_eventlet_wait)
+
+@contextmanager
+def blocking_io():
+    """
+    Let psycopg2 block the worker for the duration. COPY can't run through
+    a wait callback; keep what runs inside short and free of green I/O.
+    """
+    callback = psycopg2.extensions.get_wait_callback()
+    if callback is None:
+        yield
+        return
+    psycopg2.extensions.set_wait_callback(None)
+    try:
+        yield
+    finally:
+        psycopg2.extensions.set_wait_callback(callback)
+
+def setup_concurrency(mode: str = ASYNC_MODE) -> None:
+    """
+    Put the process in the configured concurrency mode. Call it before
+    anything else is imported; gunicorn's eventlet worker has already
+    monkey-patched, and patching again is harmless.
+    """
+    if mode == 'eventlet':
+        import eventlet
+        eventlet.monkey_patch()
+        make_psycopg_green()
+    elif mode != 'threading':
+        raise ValueError(f"ASYNC_MODE must be 'eventlet' or 'threading', not {mode!r}")
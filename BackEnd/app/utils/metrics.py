@@ -0,0 +1,172 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Sequence
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+from app.config import settings
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    A Prometheus histogram with a fixed set of labels. Each label value
+    combination keeps per-bucket counts, a sum and a count.
+    """
+    registry: Dict[str, "Histogram"] = {}
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        Histogram.registry[name] = self
+
+    def observe(self, labels: tuple, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        """The histogram in the Prometheus text exposition format"""
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts, total, count in sorted(series):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            prefix = label_text + ',' if label_text else ''
+            suffix = f'{{{label_text}}}' if label_text else ''
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{suffix} {total:.6f}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time from the start of a request to its response',
+    ['method', 'route', 'status']
+)
+MODEL_CALL_DURATION = Histogram(
+    'model_call_duration_seconds', 'Time spent in model methods', ['call']
+)
+PHASE_DURATION = Histogram(
+    'request_phase_duration_seconds',
+    'Time spent connecting, querying, shaping rows and serializing JSON', ['phase']
+)
+
+# name -> [seconds, occurrences] for the current request, or None outside one
+_request_timings: ContextVar[Optional[Dict[str, list]]] = ContextVar('request_timings', default=None)
+
+def _add_to_request(name: str, seconds: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+def record(phase: str, seconds: float) -> None:
+    """Record time spent in a phase such as db_connect or db_query"""
+    if not settings.METRICS_ENABLED:
+        return
+    PHASE_DURATION.observe((phase,), seconds)
+    _add_to_request(phase, seconds)
+
+@contextmanager
+def timer(phase: str):
+    """Time the block as a phase"""
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+def record_call(name: str, seconds: float) -> None:
+    """Record time spent in a model call that timed itself, e.g. a stream"""
+    if not settings.METRICS_ENABLED:
+        return
+    MODEL_CALL_DURATION.observe((name,), seconds)
+    _add_to_request(name, seconds)
+
+def timed(method):
+    """Time every call of a model method, under its qualified name"""
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        if not settings.METRICS_ENABLED:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_call(name, time.perf_counter() - start)
+    return wrapper
+
+def server_timing_header(timings: Dict[str, list], total_seconds: float) -> str:
+    """Server-Timing value listing each timed phase and call, then the total"""
+    entries = []
+    for name, (seconds, occurrences) in timings.items():
+        description = f';desc="x{occurrences}"' if occurrences > 1 else ''
+        entries.append(f"{name}{description};dur={seconds * 1000:.2f}")
+    entries.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ', '.join(entries)
+
+def start_request_timing() -> None:
+    if settings.METRICS_ENABLED:
+        request.environ['metrics.started_at'] = time.perf_counter()
+        _request_timings.set({})
+
+def finish_request_timing(response):
+    started_at = request.environ.get('metrics.started_at')
+    timings = _request_timings.get()
+    if started_at is None or timings is None:
+        return response
+    _request_timings.set(None)
+    total_seconds = time.perf_counter() - started_at
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_DURATION.observe((request.method, route, str(response.status_code)), total_seconds)
+    response.headers['Server-Timing'] = server_timing_header(timings, total_seconds)
+    return response
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, timing serialization as the json phase"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        with timer('json'):
+            return super().dumps(obj, **kwargs)
+
+def init_app(app: Flask) -> None:
+    """Time every request of app and its JSON responses"""
+    app.json = TimedJSONProvider(app)
+    app.before_request(start_request_timing)
+    app.after_request(finish_request_timing)
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in Histogram.registry.values():
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,91 @@
+"""
+Password hashing with argon2id, kept off the event loop. A hash takes tens
+of milliseconds of CPU; argon2 releases the GIL, so under eventlet it runs
+on native threads from eventlet's tpool and only the calling request waits.
+At most PASSWORD_HASH_WORKERS hashes run at once and at most
+PASSWORD_HASH_QUEUE_DEPTH more wait for a turn; past that, callers get
+PasswordHasherBusy straight away instead of queueing.
+"""
+from typing import Callable, Optional, Tuple
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from app.config.settings import PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_DEPTH
+import hmac
+import sys
+import threading
+
+password_hasher = PasswordHasher()
+
+# Verified when the email is unknown, so a miss costs as much as a wrong password
+_DUMMY_HASH = password_hasher.hash('sena-dummy-password')
+
+class PasswordHasherBusy(Exception):
+    """More password checks are waiting than PASSWORD_HASH_QUEUE_DEPTH allows"""
+
+def is_password_hash(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith('$argon2')
+
+class PasswordPool:
+    """Bounded, load-shedding runner for CPU-heavy password work"""
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        # Created after setup_concurrency, so green under eventlet
+        self._admitted = threading.BoundedSemaphore(workers + queue_depth)
+        self._running = threading.BoundedSemaphore(workers)
+        self.shed = 0
+
+    def run(self, fn: Callable, *args):
+        if not self._admitted.acquire(blocking=False):
+            self.shed += 1
+            raise PasswordHasherBusy()
+        try:
+            with self._running:
+                return _offload(fn, *args)
+        finally:
+            self._admitted.release()
+
+def _offload(fn: Callable, *args):
+    """Run fn on a native thread when the process is green; threads already are native otherwise"""
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            return tpool.execute(fn, *args)
+    return fn(*args)
+
+password_pool = PasswordPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_DEPTH)
+
+def _check(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not stored:
+        _verify_hash(_DUMMY_HASH, password)
+        return False, None
+    if not is_password_hash(stored):
+        # A row from before hashing: compare, and hash it if it matches
+        if hmac.compare_digest(stored.encode(), password.encode()):
+            return True, password_hasher.hash(password)
+        return False, None
+    if not _verify_hash(stored, password):
+        return False, None
+    if password_hasher.check_needs_rehash(stored):
+        return True, password_hasher.hash(password)
+    return True, None
+
+def _verify_hash(stored: str, password: str) -> bool:
+    try:
+        return password_hasher.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+def hash_password(password: str) -> str:
+    """argon2id hash to store; raises PasswordHasherBusy when overloaded"""
+    return password_pool.run(password_hasher.hash, password)
+
+def check_password(password: str, stored: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Check a password against what sena.users stores: an argon2 hash, or
+    plaintext from before hashing. Pass stored=None for an unknown user.
+    Raises PasswordHasherBusy when overloaded.
+    Returns: Tuple of (matches, new hash to store or None)
+    """
+    return password_pool.run(_check, password, stored)
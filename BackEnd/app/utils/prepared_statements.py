@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Sequence
+from app.config.settings import PREPARED_STATEMENT_EXPLAIN_EVERY
+import psycopg2.extensions
+import threading
+import time
+
+class PreparedStatement:
+    """
+    A fixed, parameterized SQL template that is PREPAREd once per pooled
+    connection and afterwards run with EXECUTE, so Postgres parses it once
+    and can reuse its plan. The SQL uses $1..$n placeholders whose types are
+    given by param_types.
+    """
+    registry: Dict[str, "PreparedStatement"] = {}
+
+    def __init__(self, name: str, param_types: Sequence[str], sql: str, read_only: bool = True):
+        self.name = name
+        self.param_types = list(param_types)
+        self.read_only = read_only
+        self.prepare_sql = f"PREPARE {name}({', '.join(self.param_types)}) AS {sql}"
+        # Arguments are cast explicitly; EXECUTE won't coerce e.g. text[] to uuid[]
+        self.execute_sql = f"EXECUTE {name}({', '.join(f'%s::{t}' for t in self.param_types)})"
+        self._lock = threading.Lock()
+        self.prepare_count = 0
+        self.prepare_ms = 0.0
+        self.execute_count = 0
+        self.execute_ms = 0.0
+        self.plan_samples = 0
+        self.sampled_planning_ms = 0.0
+        self.sampled_execution_ms = 0.0
+        PreparedStatement.registry[name] = self
+
+    def execute(self, cursor, params: Sequence = ()) -> None:
+        """Run the statement on cursor, preparing it first on connections that haven't seen it"""
+        conn = cursor.connection
+        if self.name not in conn.prepared_statements:
+            start = time.perf_counter()
+            cursor.execute(self.prepare_sql)
+            conn.prepared_statements.add(self.name)
+            with self._lock:
+                self.prepare_count += 1
+                self.prepare_ms += (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.execute_count += 1
+            sample = (self.read_only and PREPARED_STATEMENT_EXPLAIN_EVERY > 0
+                      and self.execute_count % PREPARED_STATEMENT_EXPLAIN_EVERY == 0)
+        planning_ms = self._sample_planning(cursor, params) if sample else None
+
+        start = time.perf_counter()
+        cursor.execute(self.execute_sql, tuple(params))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.execute_ms += elapsed_ms
+            if planning_ms is not None:
+                self.plan_samples += 1
+                self.sampled_planning_ms += planning_ms
+                self.sampled_execution_ms += max(elapsed_ms - planning_ms, 0.0)
+
+    def _sample_planning(self, cursor, params: Sequence) -> Optional[float]:
+        """
+        Planning time of the next run, from a plain EXPLAIN (SUMMARY), which
+        plans the statement without running it. Execution time is then the
+        timed run less this.
+        """
+        conn = cursor.connection
+        if conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+            return None
+        # A plain cursor, so the EXPLAIN is neither logged nor timed itself
+        explain_cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        in_transaction = not conn.autocommit
+        try:
+            if in_transaction:
+                explain_cursor.execute("SAVEPOINT prepared_statement_sample")
+            explain_cursor.execute("EXPLAIN (SUMMARY, FORMAT JSON) " + self.execute_sql, tuple(params))
+            plan = explain_cursor.fetchone()[0][0]
+            if in_transaction:
+                explain_cursor.execute("RELEASE SAVEPOINT prepared_statement_sample")
+            return plan.get('Planning Time', 0.0)
+        except Exception as e:
+            print(f"[PreparedStatement ERROR] Failed to sample plan for {self.name}: {str(e)}")
+            if in_transaction:
+                try:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT prepared_statement_sample")
+                except Exception:
+                    pass
+            return None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "prepare_count": self.prepare_count,
+                "avg_prepare_ms": round(self.prepare_ms / self.prepare_count, 3) if self.prepare_count else None,
+                "execute_count": self.execute_count,
+                "avg_execute_ms": round(self.execute_ms / self.execute_count, 3) if self.execute_count else None,
+                "plan_samples": self.plan_samples,
+                "avg_planning_ms": round(self.sampled_planning_ms / self.plan_samples, 3) if self.plan_samples else None,
+                "avg_execution_ms": round(self.sampled_execution_ms / self.plan_samples, 3) if self.plan_samples else None
+            }
+
+def prepared_statement_stats() -> List[Dict]:
+    return [statement.stats() for statement in PreparedStatement.registry.values()]
@@ -0,0 +1,113 @@
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+import sys
+import threading
+import time
+
+def _native_modules():
+    """
+    The threading and time modules eventlet has not patched, so the sampler
+    is a real OS thread that keeps running while a greenlet hogs the worker
+    """
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher is not None and patcher.is_monkey_patched('thread'):
+        return patcher.original('threading'), patcher.original('time')
+    return threading, time
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread every interval_seconds. Under
+    eventlet the worker's OS thread shows whichever greenlet is running (or
+    the hub, when idle), so the samples show where CPU time goes.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration_seconds = 0.0
+
+    def _sample(self, ignored: set, thread_names: Dict[int, str]) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in ignored:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            labels.reverse()
+            self.stacks[';'.join(labels)] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> None:
+        """Sample for the given number of seconds; the caller sleeps meanwhile"""
+        native_threading, native_time = _native_modules()
+        ignored = set()
+        if native_threading is threading:
+            # Without eventlet the caller is a thread of its own, just sleeping
+            ignored.add(threading.get_ident())
+        thread_names = {thread.ident: thread.name for thread in native_threading.enumerate()}
+        stop = native_threading.Event()
+
+        def sample():
+            ignored.add(native_threading.get_ident())
+            while not stop.is_set():
+                self._sample(ignored, thread_names)
+                stop.wait(self.interval_seconds)
+
+        sampler = native_threading.Thread(target=sample, name='sampling-profiler', daemon=True)
+        started = native_time.perf_counter()
+        sampler.start()
+        try:
+            # Cooperative under eventlet, so the profiled greenlets keep running
+            time.sleep(seconds)
+        finally:
+            stop.set()
+            sampler.join()
+            self.duration_seconds = native_time.perf_counter() - started
+
+    def collapsed(self) -> str:
+        """One "frame;frame;... count" line per distinct stack, for flamegraph.pl or speedscope"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def functions(self, module_prefixes: Sequence[str] = ('app.', '__main__', 'main:'), limit: int = 50) -> List[Dict]:
+        """
+        Samples per function of our own code: total counts samples with the
+        function anywhere on the stack, self only those where it was running
+        """
+        totals: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            labels = stack.split(';')[1:]
+            for label in set(labels):
+                if label.startswith(tuple(module_prefixes)):
+                    totals[label] += count
+            if labels and labels[-1].startswith(tuple(module_prefixes)):
+                own[labels[-1]] += count
+        return [
+            {
+                "function": label,
+                "total_samples": count,
+                "self_samples": own[label],
+                "total_pct": round(100 * count / self.samples, 1) if self.samples else 0.0
+            }
+            for label, count in totals.most_common(limit)
+        ]
+
+_running = threading.Lock()
+
+def run_profile(seconds: float, interval_seconds: float) -> Optional[SamplingProfiler]:
+    """Profile the process, or return None while another profile is running"""
+    if not _running.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(interval_seconds)
+        profiler.run(seconds)
+        return profiler
+    finally:
+        _running.release()
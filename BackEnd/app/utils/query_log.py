@@ -0,0 +1,200 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional
+from app.config.settings import (
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_LOG_SIZE,
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    SLOW_QUERY_EXPLAIN_ANALYZE,
+    QUERY_STATS_MAX_FINGERPRINTS
+)
+from app.utils.prepared_statements import PreparedStatement
+import psycopg2.extensions
+import re
+import threading
+import time
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_WHITESPACE = re.compile(r"\s+")
+_EXECUTE = re.compile(r"^EXECUTE\s+(\w+)", re.IGNORECASE)
+# Reads that still change state when run again under EXPLAIN ANALYZE
+_SIDE_EFFECTS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|nextval|setval)\b|advisory", re.IGNORECASE)
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """The query with literals and placeholders replaced by ? and whitespace collapsed"""
+    normalized = _STRING.sub('?', query)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+def _value_shape(value) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, (list, tuple)):
+        inner = type(value[0]).__name__ if value else ''
+        return f"{inner}[{len(value)}]"
+    return type(value).__name__
+
+def param_shape(vars) -> str:
+    """Types of the query parameters, with array lengths, but not their values"""
+    if vars is None:
+        return ''
+    if isinstance(vars, dict):
+        return ', '.join(f"{name}: {_value_shape(value)}" for name, value in vars.items())
+    return ', '.join(_value_shape(value) for value in vars)
+
+def explain_mode(query: str) -> Optional[str]:
+    """
+    'analyze' for statements that can safely run again under EXPLAIN ANALYZE,
+    'plan' for writes, which are only planned, or None for statements that
+    EXPLAIN doesn't take
+    """
+    statement = query.lstrip()
+    keyword = statement.split(None, 1)[0].upper() if statement else ''
+    if keyword in ('SELECT', 'WITH', 'VALUES', 'TABLE'):
+        return 'plan' if _SIDE_EFFECTS.search(statement) else 'analyze'
+    if keyword in ('INSERT', 'UPDATE', 'DELETE', 'MERGE'):
+        return 'plan'
+    if keyword == 'EXECUTE':
+        match = _EXECUTE.match(statement)
+        prepared = PreparedStatement.registry.get(match.group(1)) if match else None
+        return 'analyze' if prepared is not None and prepared.read_only else 'plan'
+    return None
+
+class QueryLog:
+    """
+    Duration totals per query fingerprint, plus a ring buffer of the latest
+    statements slower than threshold_ms. The first slow run of a fingerprint
+    in each explain interval also captures its plan: EXPLAIN only, or with
+    analyze set, EXPLAIN (ANALYZE, BUFFERS) for reads that are safe to run
+    again.
+    """
+
+    def __init__(self, threshold_ms: int, log_size: int, explain_interval_seconds: int, max_fingerprints: int,
+                 analyze: bool = False):
+        self.threshold_ms = threshold_ms
+        self.explain_interval_seconds = explain_interval_seconds
+        self.analyze = analyze
+        self.max_fingerprints = max_fingerprints
+        self._slow = deque(maxlen=log_size)
+        self._stats: "OrderedDict[str, Dict]" = OrderedDict()
+        self._explained_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, cursor, query, vars, seconds: float, explain_budget_ms: Optional[int] = None) -> None:
+        """
+        Account one statement run on cursor.
+        Args:
+            explain_budget_ms: Time left on the request deadline; no plan is
+                captured if it is 0, or with analyze set, if the statement
+                couldn't run again within it
+        """
+        if self.threshold_ms <= 0:
+            return
+        if not isinstance(query, str):
+            query = query.decode() if isinstance(query, bytes) else query.as_string(cursor)
+        duration_ms = seconds * 1000
+        key = fingerprint(query)
+        slow = duration_ms >= self.threshold_ms
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "slow_calls": 0}
+                while len(self._stats) > self.max_fingerprints:
+                    evicted, _ = self._stats.popitem(last=False)
+                    self._explained_at.pop(evicted, None)
+            self._stats.move_to_end(key)
+            stats["calls"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if not slow:
+                return
+            stats["slow_calls"] += 1
+            now = time.monotonic()
+            explain = now - self._explained_at.get(key, -self.explain_interval_seconds) >= self.explain_interval_seconds
+            if explain:
+                self._explained_at[key] = now
+
+        plan = None
+        needed_ms = duration_ms if self.analyze else 0
+        if explain and (explain_budget_ms is None or explain_budget_ms > needed_ms):
+            plan = self._explain(cursor, query, vars)
+        print(f"[SlowQuery] {duration_ms:.0f} ms ({param_shape(vars)}): {key[:200]}")
+        with self._lock:
+            self._slow.append({
+                "captured_at": datetime.now(timezone.utc).isoformat(),
+                "fingerprint": key,
+                "params": param_shape(vars),
+                "duration_ms": round(duration_ms, 2),
+                "replica": getattr(cursor.connection, 'is_replica', False),
+                "plan": plan
+            })
+
+    def _explain(self, cursor, query: str, vars) -> Optional[str]:
+        mode = explain_mode(query)
+        if mode is None:
+            return None
+        conn = cursor.connection
+        # A plain cursor, so the EXPLAIN is neither logged nor timed itself
+        explain_cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        options = "ANALYZE, BUFFERS, FORMAT TEXT" if self.analyze and mode == 'analyze' else "FORMAT TEXT"
+        in_transaction = not conn.autocommit
+        try:
+            if in_transaction:
+                explain_cursor.execute("SAVEPOINT slow_query_explain")
+            explain_cursor.execute(f"EXPLAIN ({options}) {query}", vars)
+            plan = '\n'.join(row[0] for row in explain_cursor.fetchall())
+            if in_transaction:
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as e:
+            print(f"[SlowQuery ERROR] Failed to explain slow query: {str(e)}")
+            if in_transaction:
+                try:
+                    explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                except Exception:
+                    pass
+            return None
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Slow statements, newest first"""
+        with self._lock:
+            entries = list(self._slow)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def top_fingerprints(self, limit: int = 50) -> List[Dict]:
+        """Fingerprints with the most total time"""
+        with self._lock:
+            stats = [(key, dict(values)) for key, values in self._stats.items()]
+        stats.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return [
+            {
+                "fingerprint": key,
+                "calls": values["calls"],
+                "slow_calls": values["slow_calls"],
+                "total_ms": round(values["total_ms"], 2),
+                "avg_ms": round(values["total_ms"] / values["calls"], 3),
+                "max_ms": round(values["max_ms"], 2)
+            }
+            for key, values in stats[:limit]
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slow.clear()
+            self._stats.clear()
+            self._explained_at.clear()
+
+query_log = QueryLog(
+    threshold_ms=SLOW_QUERY_THRESHOLD_MS,
+    log_size=SLOW_QUERY_LOG_SIZE,
+    explain_interval_seconds=SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    max_fingerprints=QUERY_STATS_MAX_FINGERPRINTS,
+    analyze=SLOW_QUERY_EXPLAIN_ANALYZE
+)
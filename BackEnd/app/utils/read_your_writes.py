@@ -0,0 +1,36 @@
+"""
+Read-your-writes on every worker. Users who just wrote are pinned to the
+primary by the worker that took the write; other workers and hosts can't
+see that pin. So the time of a client's last write also travels in a
+cookie, and reads for a client that wrote recently stay on the primary
+whichever worker serves them.
+"""
+from flask import Flask, request
+from app.utils.db_utils import (
+    clear_client_last_write, replica_router, request_write_time, set_client_last_write
+)
+from app.config.database import DB_CONFIG
+import math
+
+LAST_WRITE_COOKIE = 'sena_last_write'
+
+def load_client_last_write() -> None:
+    set_client_last_write(request.cookies.get(LAST_WRITE_COOKIE, type=float))
+
+def remember_client_last_write(response):
+    written_at = request_write_time()
+    if written_at is not None and DB_CONFIG.get('replicas'):
+        response.set_cookie(
+            LAST_WRITE_COOKIE, f"{written_at:.3f}",
+            max_age=math.ceil(replica_router.pin_seconds), httponly=True, samesite='Lax'
+        )
+    return response
+
+def end_client_last_write(exc) -> None:
+    clear_client_last_write()
+
+def init_app(app: Flask) -> None:
+    """Pin reads to the primary for clients whose cookie says they just wrote"""
+    app.before_request(load_client_last_write)
+    app.after_request(remember_client_last_write)
+    app.teardown_request(end_client_last_write)
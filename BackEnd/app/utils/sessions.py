@@ -0,0 +1,60 @@
+"""
+Signed, expiring session tokens. Login issues one; requests send it back as
+"Authorization: Bearer <token>". Checking it is an HMAC over the token, so
+resolving the caller needs no database round trip unless their profile has
+dropped out of the user profile cache.
+"""
+from typing import Dict, Optional, Tuple
+from flask import g, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.models.user_model import User
+from app.config.settings import SESSION_SECRET_KEY, SESSION_TOKEN_TTL_SECONDS
+import secrets
+
+if not SESSION_SECRET_KEY:
+    print("[Sessions] SESSION_SECRET_KEY is not set; tokens are only valid on this process until it restarts")
+
+_serializer = URLSafeTimedSerializer(SESSION_SECRET_KEY or secrets.token_hex(32), salt='sena-session')
+
+def issue_token(user_id) -> str:
+    return _serializer.dumps({'sub': str(user_id)})
+
+def verify_token(token: str) -> Optional[str]:
+    """The user ID a token was issued for, or None if it is forged or expired"""
+    try:
+        claims = _serializer.loads(token, max_age=SESSION_TOKEN_TTL_SECONDS)
+    except BadSignature:
+        return None
+    return claims.get('sub') if isinstance(claims, dict) else None
+
+def _bearer_token() -> str:
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return ''
+
+def session_user_id() -> Optional[str]:
+    """The user ID from this request's valid session token, without loading the profile"""
+    token = _bearer_token()
+    return verify_token(token) if token else None
+
+def current_user() -> Tuple[Optional[Dict], int]:
+    """
+    The profile of the user whose token came with this request, resolved
+    once per request
+    Returns: Tuple of (user_dict or None, status_code)
+    """
+    if 'session_user' not in g:
+        g.session_user = _resolve()
+    return g.session_user
+
+def _resolve() -> Tuple[Optional[Dict], int]:
+    user_id = session_user_id()
+    if not user_id:
+        return None, 401
+    user, status_code = User.get_profile(user_id)
+    if status_code == 404:
+        return None, 401
+    if user is not None and user['is_active'] is False:
+        return None, 403
+    return user, status_code
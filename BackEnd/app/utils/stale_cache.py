@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+from flask import jsonify
+from app.config.settings import (
+    STALE_CACHE_MAX_ENTRIES,
+    STALE_CACHE_MAX_AGE_SECONDS,
+    STALE_CACHE_RETRY_SECONDS
+)
+import threading
+import time
+
+Loader = Callable[[], Tuple[Any, int]]
+
+class CacheEntry(NamedTuple):
+    result: Any
+    fetched_at: float
+
+class StaleWhileRevalidateCache:
+    """
+    Remembers the last successful result of read endpoints and serves it,
+    marked stale, while the database is failing. A background refresh keeps
+    retrying the loader until it succeeds again.
+    """
+
+    def __init__(self, max_entries: int, max_age_seconds: int, retry_seconds: int):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.retry_seconds = retry_seconds
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        # While degraded, reads with a cached result skip the database entirely
+        self._degraded_until = 0.0
+
+    def _get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.fetched_at > self.max_age_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(result, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _revalidate(self, key: Hashable, loader: Loader) -> None:
+        """Retry the loader in the background until it succeeds or the entry expires"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                delay = self.retry_seconds
+                while self._get(key) is not None:
+                    time.sleep(delay)
+                    try:
+                        result, status_code = loader()
+                    except Exception as e:
+                        print(f"[StaleCache ERROR] Background refresh failed for {key}: {str(e)}")
+                        status_code = 500
+                    if status_code == 200:
+                        self._store(key, result)
+                        self._degraded_until = 0.0
+                        return
+                    if status_code < 500:
+                        return
+                    delay = min(delay * 2, 60)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+
+    def serve(self, key: Hashable, loader: Loader) -> Tuple[Any, int, Optional[float]]:
+        """
+        Run a read through the cache
+        Args:
+            key: Identifies the read (endpoint plus its normalized arguments)
+            loader: Callable returning (result, status_code), e.g. a model method
+        Returns: Tuple of (result, status_code, stale_age_seconds or None if fresh)
+        """
+        entry = self._get(key)
+        if entry is not None and time.time() < self._degraded_until:
+            self._revalidate(key, loader)
+            return entry.result, 200, time.time() - entry.fetched_at
+
+        result, status_code = loader()
+        if status_code < 500:
+            if status_code == 200:
+                self._store(key, result)
+            return result, status_code, None
+
+        self._degraded_until = time.time() + self.retry_seconds
+        if entry is None:
+            return result, status_code, None
+
+        self._revalidate(key, loader)
+        return entry.result, 200, time.time() - entry.fetched_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._degraded_until = 0.0
+
+read_cache = StaleWhileRevalidateCache(
+    max_entries=STALE_CACHE_MAX_ENTRIES,
+    max_age_seconds=STALE_CACHE_MAX_AGE_SECONDS,
+    retry_seconds=STALE_CACHE_RETRY_SECONDS
+)
+
+def stale_aware_response(result: Dict, status_code: int, stale_age: Optional[float]):
+    """
+    Build a JSON response, flagging results that were served from the stale cache
+    """
+    if stale_age is None:
+        return jsonify(result), status_code
+
+    response = jsonify({**result, "stale": True, "stale_age_seconds": round(stale_age, 1)})
+    response.status_code = status_code
+    response.headers['Warning'] = '110 - "Response is Stale"'
+    return response
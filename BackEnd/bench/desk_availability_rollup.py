@@ -0,0 +1,184 @@
+"""
+Benchmark desk availability computed from booking_transactions (the old
+booking_status CTE) against the desk_slot_day_status rollup.
+
+Needs a scratch database migrated with `python -m app.migrations`. It adds
+desks and bulk-loads synthetic transactions, so never point it at a real
+database:
+
+    python -m bench.desk_availability_rollup --dsn "host=localhost dbname=sena_bench user=postgres" --rows 10000000
+"""
+from app.models.desk_model import desk_availability_statement
+from app.maintenance.backfill_desk_slot_day_status import EXPECTED_STATUS_SQL
+from datetime import date, timedelta
+import argparse
+import random
+import statistics
+import time
+import psycopg2
+
+ROLLUP_JOIN = """LEFT JOIN sena.desk_slot_day_status st
+        ON st.booking_date = $4 AND st.desk_id = db.desk_id AND st.slot_id = aslt.slot_id"""
+
+# Equivalent to the booking_status CTE the availability query used before the rollup
+LEGACY_JOIN = """LEFT JOIN (
+        SELECT desk_id, slot_id,
+               COUNT(*) FILTER (WHERE status = 'booked') AS booked_count,
+               COUNT(*) FILTER (WHERE status = 'held') AS held_count
+        FROM sena.booking_transactions
+        WHERE booking_date = $4
+        GROUP BY desk_id, slot_id
+    ) st ON st.desk_id = db.desk_id AND st.slot_id = aslt.slot_id"""
+
+ROLLUP_TRIGGERS = ('desk_slot_day_status_insert', 'desk_slot_day_status_update', 'desk_slot_day_status_delete')
+
+def prepare_statements(cursor) -> None:
+    # The unfiltered statement; the benchmark passes no filters
+    statement = desk_availability_statement(None, None, None)
+    assert ROLLUP_JOIN in statement.prepare_sql
+    cursor.execute(statement.prepare_sql.replace(
+        'PREPARE desk_availability', 'PREPARE bench_rollup', 1))
+    cursor.execute(statement.prepare_sql.replace(
+        'PREPARE desk_availability', 'PREPARE bench_legacy', 1).replace(ROLLUP_JOIN, LEGACY_JOIN))
+
+def load(conn, rows: int, desks: int, days: int, start: date) -> None:
+    """Top sena.desks up to `desks` and insert `rows` synthetic transactions, then rebuild the rollup"""
+    cursor = conn.cursor()
+    cursor.execute("SET statement_timeout = 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_booking_transactions_booking_date ON sena.booking_transactions (booking_date)")
+    cursor.execute("SELECT COUNT(*) FROM sena.desks")
+    missing = desks - cursor.fetchone()[0]
+    if missing > 0:
+        cursor.execute("""
+            INSERT INTO sena.desks (name, floor_number, capacity, description, rating, desk_type_id, building_id, location_id)
+            SELECT 'Bench ' || g, g %% 10, d.capacity, d.description, (g %% 5)::numeric, d.desk_type_id, d.building_id, d.location_id
+            FROM generate_series(1, %s) g
+            CROSS JOIN LATERAL (SELECT * FROM sena.desks ORDER BY id LIMIT 1) d
+        """, (missing,))
+    cursor.execute("SELECT array_agg(id::text ORDER BY id) FROM sena.users")
+    users = cursor.fetchone()[0]
+    cursor.execute("SELECT array_agg(id ORDER BY id) FROM (SELECT id FROM sena.desks ORDER BY id LIMIT %s) d", (desks,))
+    desk_ids = cursor.fetchone()[0]
+    cursor.execute("SELECT array_agg(id ORDER BY id) FROM sena.slot_master")
+    slot_ids = cursor.fetchone()[0]
+    conn.commit()
+
+    for name in ROLLUP_TRIGGERS:
+        cursor.execute(f"ALTER TABLE sena.booking_transactions DISABLE TRIGGER {name}")
+    batch = 1_000_000
+    for offset in range(0, rows, batch):
+        started = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO sena.booking_transactions (user_id, desk_id, slot_id, status, booking_date)
+            SELECT
+                (%(users)s::uuid[])[1 + g %% %(n_users)s],
+                (%(desks)s::int[])[1 + (g / %(n_slots)s) %% %(n_desks)s],
+                (%(slots)s::int[])[1 + g %% %(n_slots)s],
+                -- Only one booked or held transaction per desk, slot and day;
+                -- rows past the first pass over the keys are cancelled
+                CASE WHEN g::bigint >= %(keys)s::bigint THEN 'cancelled'
+                     WHEN g %% 20 < 12 THEN 'booked' WHEN g %% 20 < 17 THEN 'held' ELSE 'cancelled' END,
+                %(start)s::date + ((g::bigint / (%(n_slots)s * %(n_desks)s)) %% %(days)s)::int
+            FROM generate_series(%(first)s, %(last)s) g
+        """, {
+            'users': users, 'n_users': len(users),
+            'desks': desk_ids, 'n_desks': len(desk_ids), 'slots': slot_ids, 'n_slots': len(slot_ids),
+            'start': start, 'days': days, 'keys': len(slot_ids) * len(desk_ids) * days,
+            'first': offset, 'last': min(offset + batch, rows) - 1
+        })
+        conn.commit()
+        print(f"loaded {min(offset + batch, rows)} rows ({time.perf_counter() - started:.1f}s)")
+    for name in ROLLUP_TRIGGERS:
+        cursor.execute(f"ALTER TABLE sena.booking_transactions ENABLE TRIGGER {name}")
+
+    started = time.perf_counter()
+    cursor.execute("TRUNCATE sena.desk_slot_day_status")
+    cursor.execute(f"INSERT INTO sena.desk_slot_day_status {EXPECTED_STATUS_SQL}", (date.min, date.max))
+    cursor.execute("ANALYZE sena.booking_transactions")
+    cursor.execute("ANALYZE sena.desk_slot_day_status")
+    conn.commit()
+    print(f"rollup rebuilt ({time.perf_counter() - started:.1f}s)")
+
+def time_statement(cursor, name: str, booking_date: date) -> float:
+    started = time.perf_counter()
+    cursor.execute(f"EXECUTE {name}(NULL, NULL, NULL, %s)", (booking_date,))
+    cursor.fetchall()
+    return (time.perf_counter() - started) * 1000
+
+def time_write_path(conn, samples: int, enabled: bool) -> float:
+    """Mean ms of a hold-like insert plus its delete, with or without the rollup triggers"""
+    cursor = conn.cursor()
+    action = 'ENABLE' if enabled else 'DISABLE'
+    for name in ROLLUP_TRIGGERS:
+        cursor.execute(f"ALTER TABLE sena.booking_transactions {action} TRIGGER {name}")
+    conn.commit()
+    cursor.execute("SELECT id FROM sena.users LIMIT 1")
+    user_id = cursor.fetchone()[0]
+    timings = []
+    for i in range(samples):
+        started = time.perf_counter()
+        cursor.execute("""
+            INSERT INTO sena.booking_transactions (user_id, desk_id, slot_id, status, booking_date)
+            VALUES (%s, (SELECT MIN(id) FROM sena.desks), (SELECT MIN(id) FROM sena.slot_master), 'held', %s)
+            RETURNING id
+        """, (user_id, date(2100, 1, 1) + timedelta(days=i)))
+        booking_id = cursor.fetchone()[0]
+        conn.commit()
+        cursor.execute("DELETE FROM sena.booking_transactions WHERE id = %s", (booking_id,))
+        conn.commit()
+        timings.append((time.perf_counter() - started) * 1000)
+    for name in ROLLUP_TRIGGERS:
+        cursor.execute(f"ALTER TABLE sena.booking_transactions ENABLE TRIGGER {name}")
+    conn.commit()
+    return statistics.mean(timings)
+
+def summary(timings) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms   mean {statistics.mean(ordered):8.2f} ms"
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dsn', required=True, help="Scratch database to load and query")
+    parser.add_argument('--rows', type=int, default=10_000_000, help="Synthetic transactions to load")
+    parser.add_argument('--desks', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=730, help="Booking dates the rows are spread over")
+    parser.add_argument('--samples', type=int, default=50, help="Random dates timed per variant")
+    parser.add_argument('--skip-load', action='store_true', help="Reuse data from a previous run")
+    args = parser.parse_args(argv)
+
+    start = date(2024, 1, 1)
+    conn = psycopg2.connect(args.dsn)
+    cursor = conn.cursor()
+    if not args.skip_load:
+        load(conn, args.rows, args.desks, args.days, start)
+
+    cursor.execute("SELECT COUNT(*) FROM sena.booking_transactions")
+    transactions = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM sena.desk_slot_day_status")
+    rollup_rows = cursor.fetchone()[0]
+    print(f"{transactions} transactions, {rollup_rows} rollup rows")
+
+    prepare_statements(cursor)
+    dates = [start + timedelta(days=random.randrange(args.days)) for _ in range(args.samples)]
+    for booking_date in dates[:3]:
+        # Warm up plans and caches; both variants must agree
+        cursor.execute("EXECUTE bench_legacy(NULL, NULL, NULL, %s)", (booking_date,))
+        legacy = cursor.fetchall()
+        cursor.execute("EXECUTE bench_rollup(NULL, NULL, NULL, %s)", (booking_date,))
+        assert cursor.fetchall() == legacy, f"Results differ for {booking_date}"
+
+    legacy_ms = [time_statement(cursor, 'bench_legacy', d) for d in dates]
+    rollup_ms = [time_statement(cursor, 'bench_rollup', d) for d in dates]
+    conn.rollback()
+    print(f"availability, booking_status CTE:  {summary(legacy_ms)}")
+    print(f"availability, day status rollup: {summary(rollup_ms)}")
+
+    write_samples = 200
+    without = time_write_path(conn, write_samples, enabled=False)
+    with_triggers = time_write_path(conn, write_samples, enabled=True)
+    print(f"hold insert + delete: {without:.2f} ms without triggers, {with_triggers:.2f} ms with triggers")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""
+Fill the sena schema of a scratch database with a synthetic dataset for
+scale testing: locations, buildings, desks, slots, pricing, users and
+months of booking_transactions, loaded with COPY.
+
+The same --seed and sizes give the same rows. --start-month defaults to a
+window ending two months from now, so pass it as well when a dataset must
+be reproduced on another day. Pending migrations are applied first, and
+existing data is only replaced with --reset, so never point it at a real
+database. Rows are loaded as a superuser with session_replication_role =
+replica, which skips foreign key checks and the desk_slot_day_status
+triggers; the rollup is rebuilt in one pass at the end.
+
+    python -m bench.generate_dataset --dsn "host=localhost dbname=sena_bench user=postgres" \\
+        --desks 100000 --transactions 10000000 --reset
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+from app.maintenance import partitions
+from app.maintenance.backfill_desk_slot_day_status import EXPECTED_STATUS_SQL
+from app.migrations import runner
+from app.utils.passwords import password_hasher
+from datetime import date, datetime, timedelta
+import argparse
+import io
+import json
+import random
+import time
+import uuid
+import numpy as np
+import psycopg2
+
+# Emptied by --reset; children before parents
+TABLES = (
+    'booking_transactions', 'desk_slot_day_status', 'occupancy_daily_rollup', 'occupancy_rollup_days',
+    'desk_pricing', 'desks', 'buildings', 'locations', 'desk_type_master', 'slot_master', 'users'
+)
+
+CITIES = ['Chennai', 'Bengaluru', 'Hyderabad', 'Pune', 'Mumbai', 'Delhi', 'Kolkata', 'Kochi', 'Ahmedabad', 'Jaipur']
+AMENITIES = ['wifi', 'parking', 'cafeteria', 'gym', 'lockers', 'printing', 'shower', 'phone booths']
+FIRST_NAMES = ['Asha', 'Arjun', 'Divya', 'Karthik', 'Meena', 'Naveen', 'Priya', 'Rahul', 'Sneha', 'Vikram']
+LAST_NAMES = ['Iyer', 'Kumar', 'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Singh', 'Varma']
+
+# (type, capacity, share of desks, base price per slot)
+DESK_TYPES = [('Hot Desk', 1, 0.55, 150), ('Dedicated Desk', 1, 0.25, 250), ('Cabin', 4, 0.15, 600),
+              ('Meeting Room', 10, 0.05, 1200)]
+# (slot type, start, end, price multiplier); more slots than listed are hourly
+SLOTS = [('Morning', '09:00', '13:00', 1.0), ('Afternoon', '13:00', '17:00', 1.0),
+         ('Full Day', '09:00', '18:00', 1.8), ('Evening', '17:00', '21:00', 0.8)]
+
+# Relative booking volume by weekday, Monday first
+WEEKDAY_WEIGHTS = [1.0, 1.0, 1.0, 0.95, 0.8, 0.15, 0.05]
+HELD_SHARE = 0.15
+COPY_BATCH_ROWS = 500_000
+
+TRANSACTIONS_COPY_SQL = """
+    COPY sena.booking_transactions
+        (user_id, desk_id, slot_id, status, booking_details, booking_date, created_at, updated_at)
+    FROM STDIN
+"""
+
+def _copy_value(value) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """COPY rows into sena.<table>"""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row) + '\n')
+        count += 1
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY sena.{table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+def _uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+def add_dimensions(cursor, rnd: random.Random, args, start_month: date) -> Dict[str, List]:
+    """
+    Locations, buildings, desk types, slots, pricing, desks and users with
+    explicit ids
+    Returns: Dict of the ids and per-desk/slot details the transactions need
+    """
+    locations = []
+    for n in range(args.locations):
+        city = CITIES[n % len(CITIES)]
+        locations.append((_uuid(rnd), city if n < len(CITIES) else f"{city} {n // len(CITIES) + 1}"))
+    copy_rows(cursor, 'locations', ('id', 'name'), locations)
+
+    buildings = []
+    for location_id, city in locations:
+        for n in range(args.buildings_per_location):
+            building_id = len(buildings) + 1
+            buildings.append((
+                building_id, location_id, f"{city} Tower {chr(65 + n % 26)}{n // 26 or ''}",
+                f"{rnd.randint(1, 400)} Tech Park Road, {city}", rnd.randint(3, 12),
+                json.dumps(sorted(rnd.sample(AMENITIES, rnd.randint(2, 5)))),
+                json.dumps({"open": "08:00", "close": rnd.choice(["20:00", "22:00"])})
+            ))
+    copy_rows(cursor, 'buildings',
+              ('id', 'location_id', 'name', 'address', 'floor_count', 'amenities', 'operating_hours'), buildings)
+
+    copy_rows(cursor, 'desk_type_master', ('id', 'type', 'capacity'),
+              [(n + 1, name, capacity) for n, (name, capacity, _, _) in enumerate(DESK_TYPES)])
+
+    slots = []
+    for n in range(args.slots):
+        if n < len(SLOTS):
+            slot_type, start, end, multiplier = SLOTS[n]
+        else:
+            hour = 8 + (n - len(SLOTS)) % 12
+            slot_type, start, end, multiplier = f"Hour {hour:02d}", f"{hour:02d}:00", f"{hour + 1:02d}:00", 0.3
+        slots.append((n + 1, slot_type, start, end, 'IST', True, multiplier))
+    copy_rows(cursor, 'slot_master', ('id', 'slot_type', 'start_time', 'end_time', 'time_zone', 'is_active'),
+              [slot[:6] for slot in slots])
+
+    prices = {}
+    pricing = []
+    for type_index, (_, _, _, base_price) in enumerate(DESK_TYPES):
+        for slot in slots:
+            prices[(type_index + 1, slot[0])] = round(base_price * slot[6], 2)
+            pricing.append((len(pricing) + 1, type_index + 1, slot[0], prices[(type_index + 1, slot[0])], True))
+    copy_rows(cursor, 'desk_pricing', ('id', 'desk_type_id', 'slot_id', 'price', 'is_active'), pricing)
+
+    type_weights = [share for _, _, share, _ in DESK_TYPES]
+    desks = []
+    for n in range(args.desks):
+        building = buildings[n % len(buildings)]
+        desk_type_id = rnd.choices(range(1, len(DESK_TYPES) + 1), type_weights)[0]
+        floor = rnd.randint(1, building[4])
+        desks.append((
+            n + 1, f"{building[2].split(' Tower ')[1]}-{floor}-{n // len(buildings) + 1}", floor,
+            DESK_TYPES[desk_type_id - 1][1], f"{DESK_TYPES[desk_type_id - 1][0]} on floor {floor}",
+            'available', round(rnd.uniform(3.0, 5.0), 2), desk_type_id, building[0], building[1]
+        ))
+    copy_rows(cursor, 'desks', ('id', 'name', 'floor_number', 'capacity', 'description', 'status', 'rating',
+                                'desk_type_id', 'building_id', 'location_id'), desks)
+
+    # Users sign up over the year before the first booking month
+    signup_start = datetime.combine(start_month, datetime.min.time()) - timedelta(days=365)
+    users = []
+    # One argon2 hash shared by every user; hashing each would take minutes
+    password_hash = password_hasher.hash('password')
+    for n in range(args.users):
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        signed_up = f"{signup_start + timedelta(seconds=rnd.randrange(365 * 86400))}+00"
+        users.append((_uuid(rnd), f"user{n + 1}@example.com", first, last, f"9{rnd.randrange(10 ** 9):09d}",
+                      password_hash, signed_up, signed_up))
+    copy_rows(cursor, 'users', ('id', 'email', 'first_name', 'last_name', 'phone', 'password',
+                                'created_at', 'updated_at'), users)
+
+    for table in ('buildings', 'desk_type_master', 'slot_master', 'desk_pricing', 'desks'):
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('sena.{table}', 'id'), (SELECT MAX(id) FROM sena.{table}))")
+
+    return {
+        'users': [user[0] for user in users],
+        # Opening of each desk's booking_details; the rest is added per transaction
+        'desk_details': [
+            json.dumps({"desk_details": {"name": desk[1], "floor_number": desk[2]}})[:-1] for desk in desks
+        ],
+        'desk_types': [desk[7] for desk in desks],
+        'slots': [slot[0] for slot in slots],
+        'slot_types': [slot[1] for slot in slots],
+        'prices': prices,
+    }
+
+def booking_days(start_month: date, months: int) -> List[date]:
+    end = partitions.add_months(start_month, months)
+    return [start_month + timedelta(days=n) for n in range((end - start_month).days)]
+
+def add_transactions(conn, rng: np.random.Generator, dimensions: Dict[str, List], days: List[date],
+                     transactions: int, today: date) -> int:
+    """
+    COPY transactions spread over days by weekday, each (desk, slot, day)
+    at most once. Users are skewed so some have long histories. Future
+    days carry a share of holds; everything else is booked.
+    Returns: Number of rows loaded
+    """
+    cursor = conn.cursor()
+    users = np.array(dimensions['users'], dtype=object)
+    desk_details = dimensions['desk_details']
+    desk_types = dimensions['desk_types']
+    slots = dimensions['slots']
+    slot_types = dimensions['slot_types']
+    prices = dimensions['prices']
+    keys_per_day = len(desk_details) * len(slots)
+
+    weights = np.array([WEEKDAY_WEIGHTS[day.weekday()] for day in days])
+    per_day = np.minimum(rng.multinomial(transactions, weights / weights.sum()), keys_per_day)
+
+    loaded = 0
+    lines = []
+    started = time.perf_counter()
+    for day, count in zip(days, per_day.tolist()):
+        if count == 0:
+            continue
+        keys = rng.choice(keys_per_day, size=count, replace=False)
+        desk_index = (keys // len(slots)).tolist()
+        slot_index = (keys % len(slots)).tolist()
+        user_ids = users[(rng.random(count) ** 2 * len(users)).astype(np.int64)].tolist()
+        if day >= today:
+            held = (rng.random(count) < HELD_SHARE).tolist()
+        else:
+            held = [False] * count
+
+        # Booked between a month and a few minutes ahead of the day
+        midnight = np.datetime64(day, 's')
+        created = midnight - rng.exponential(7 * 86400, count).astype('timedelta64[s]')
+        updated = created + rng.integers(0, 600, count).astype('timedelta64[s]')
+        created_at = np.datetime_as_string(created, unit='s').tolist()
+        updated_at = np.datetime_as_string(updated, unit='s').tolist()
+        booking_date = day.isoformat()
+
+        for n in range(count):
+            desk, slot = desk_index[n], slot_index[n]
+            details = (f'{desk_details[desk]}, "slot_details": {{"type": "{slot_types[slot]}", '
+                       f'"date": "{booking_date}"}}, "pricing": {{"price": {prices[(desk_types[desk], slots[slot])]}}}}}')
+            lines.append(f"{user_ids[n]}\t{desk + 1}\t{slots[slot]}\t{'held' if held[n] else 'booked'}\t"
+                         f"{details}\t{booking_date}\t{created_at[n]}+00\t{updated_at[n]}+00\n")
+
+        if len(lines) >= COPY_BATCH_ROWS:
+            cursor.copy_expert(TRANSACTIONS_COPY_SQL, io.StringIO(''.join(lines)))
+            conn.commit()
+            loaded += len(lines)
+            print(f"loaded {loaded} transactions through {day} ({time.perf_counter() - started:.1f}s)")
+            lines = []
+            started = time.perf_counter()
+    if lines:
+        cursor.copy_expert(TRANSACTIONS_COPY_SQL, io.StringIO(''.join(lines)))
+        conn.commit()
+        loaded += len(lines)
+        print(f"loaded {loaded} transactions ({time.perf_counter() - started:.1f}s)")
+    return loaded
+
+def generate(conn, args, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Load the dataset described by args (see main) into the database behind conn
+    Returns: Dict of row counts per table
+    """
+    today = today or date.today()
+    start_month = args.start_month or partitions.add_months(today.replace(day=1), 2 - args.months)
+    cursor = conn.cursor()
+    cursor.execute("SET statement_timeout = 0")
+    runner.apply_pending(cursor)
+    conn.commit()
+    cursor.execute("SET session_replication_role = replica")
+
+    cursor.execute(' UNION ALL '.join(f"(SELECT '{table}' FROM sena.{table} LIMIT 1)" for table in TABLES))
+    filled = [row[0] for row in cursor.fetchall()]
+    if filled and not args.reset:
+        raise SystemExit(f"sena.{filled[0]} already has rows; pass --reset to replace the data")
+    if filled:
+        cursor.execute(f"TRUNCATE {', '.join(f'sena.{table}' for table in TABLES)} RESTART IDENTITY CASCADE")
+
+    started = time.perf_counter()
+    dimensions = add_dimensions(cursor, random.Random(args.seed), args, start_month)
+    conn.commit()
+    print(f"loaded {args.locations} locations, {args.desks} desks, {args.users} users "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    days = booking_days(start_month, args.months)
+    if partitions.is_partitioned(cursor):
+        for month in range(args.months):
+            cursor.execute("SELECT sena.create_booking_transactions_partition(%s)",
+                           (partitions.add_months(start_month, month),))
+        conn.commit()
+
+    transactions = add_transactions(conn, np.random.default_rng(args.seed), dimensions, days,
+                                    args.transactions, today)
+
+    started = time.perf_counter()
+    cursor.execute(f"INSERT INTO sena.desk_slot_day_status {EXPECTED_STATUS_SQL}", (days[0], days[-1]))
+    for table in TABLES:
+        cursor.execute(f"ANALYZE sena.{table}")
+    conn.commit()
+    print(f"rollup rebuilt and tables analyzed ({time.perf_counter() - started:.1f}s)")
+
+    return {'locations': args.locations, 'desks': args.desks, 'users': args.users, 'transactions': transactions}
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dsn', required=True, help="Scratch database to fill")
+    parser.add_argument('--locations', type=int, default=20)
+    parser.add_argument('--buildings-per-location', type=int, default=5)
+    parser.add_argument('--desks', type=int, default=100_000)
+    parser.add_argument('--slots', type=int, default=3)
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--months', type=int, default=12, help="Months of booking dates")
+    parser.add_argument('--transactions', type=int, default=10_000_000)
+    parser.add_argument('--start-month', type=lambda value: datetime.strptime(value, '%Y-%m').date(),
+                        help="First booking month, YYYY-MM")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help="Replace existing rows in the sena tables")
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        counts = generate(conn, args)
+    finally:
+        conn.close()
+    print(', '.join(f"{count} {name}" for name, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Show that concurrent slow work doesn't serialize the eventlet worker.
+
+Runs --queries concurrent `SELECT pg_sleep(--sleep)` on green threads
+through get_db_connection, against the database in the DB_* settings. It
+runs them twice:
+- green: psycopg2 waits through the eventlet hub, as with ASYNC_MODE=eventlet
+- blocking: psycopg2 blocks the hub, as the worker did before
+
+It then runs --password-checks concurrent argon2 password checks, through
+the password pool (offloaded) and inline on the hub.
+
+Meanwhile a ticker green thread records how late the event loop runs it,
+which is the extra delay every socket sees. Run it as a script; importing
+it monkey-patches the process:
+
+    python -m bench.green_concurrency [--queries 8] [--sleep 0.5] [--password-checks 4] [--json]
+
+Exits with status 1 if the green run takes more than half the time the
+queries need back to back, or if offloaded password checks delay the event
+loop by more than half as much as inline ones.
+"""
+from app.utils.green import setup_concurrency
+setup_concurrency('eventlet')
+
+from typing import Callable, Dict, List, Tuple
+from app.utils.db_utils import close_all_pools, get_db_connection
+from app.utils.green import make_psycopg_green
+from app.utils.passwords import check_password, password_hasher
+from app.utils.query_log import query_log
+from app.config.database import DB_CONFIG
+import argparse
+import json
+import sys
+import time
+import eventlet
+import numpy as np
+import psycopg2.extensions
+
+TICK_SECONDS = 0.01
+
+def run_with_ticker(tasks: List[Callable]) -> Tuple[float, List[float]]:
+    """
+    Run the tasks on concurrent green threads
+    Returns: Tuple of (wall_ms, event loop lags in ms seen meanwhile)
+    """
+    lags_ms = []
+    done = [False]
+
+    def ticker():
+        while not done[0]:
+            started = time.perf_counter()
+            eventlet.sleep(TICK_SECONDS)
+            lags_ms.append((time.perf_counter() - started - TICK_SECONDS) * 1000)
+
+    ticker_thread = eventlet.spawn(ticker)
+    eventlet.sleep(TICK_SECONDS * 2)
+    started = time.perf_counter()
+    threads = [eventlet.spawn(task) for task in tasks]
+    for thread in threads:
+        thread.wait()
+    wall_ms = (time.perf_counter() - started) * 1000
+    done[0] = True
+    ticker_thread.wait()
+    return wall_ms, lags_ms
+
+def lag_summary(lags_ms: List[float]) -> Dict:
+    return {
+        "p95_loop_lag_ms": round(float(np.percentile(lags_ms, 95)), 1) if lags_ms else None,
+        "max_loop_lag_ms": round(max(lags_ms), 1) if lags_ms else None,
+    }
+
+def measure(queries: int, sleep_seconds: float, green: bool) -> Dict:
+    if green:
+        make_psycopg_green()
+    else:
+        psycopg2.extensions.set_wait_callback(None)
+    # Whether a connection is green is fixed when it is opened
+    close_all_pools()
+
+    latencies_ms = []
+    errors = [0]
+
+    def query():
+        started = time.perf_counter()
+        conn = get_db_connection(DB_CONFIG)
+        if not conn:
+            errors[0] += 1
+            return
+        try:
+            conn.cursor().execute("SELECT pg_sleep(%s)", (sleep_seconds,))
+            conn.commit()
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            print(f"Query failed: {e}", file=sys.stderr)
+            errors[0] += 1
+        finally:
+            conn.close()
+
+    wall_ms, lags_ms = run_with_ticker([query] * queries)
+    close_all_pools()
+
+    return {
+        "mode": "green" if green else "blocking",
+        "queries": queries,
+        "errors": errors[0],
+        "wall_ms": round(wall_ms, 1),
+        "back_to_back_ms": round(queries * sleep_seconds * 1000, 1),
+        "p50_query_ms": round(float(np.percentile(latencies_ms, 50)), 1) if latencies_ms else None,
+        "max_query_ms": round(max(latencies_ms), 1) if latencies_ms else None,
+        **lag_summary(lags_ms),
+    }
+
+def measure_password_checks(checks: int, offloaded: bool) -> Dict:
+    stored = password_hasher.hash('password')
+    errors = [0]
+
+    def check():
+        try:
+            if offloaded:
+                matches = check_password('password', stored)[0]
+            else:
+                matches = password_hasher.verify(stored, 'password')
+            if not matches:
+                errors[0] += 1
+        except Exception as e:
+            print(f"Password check failed: {e}", file=sys.stderr)
+            errors[0] += 1
+
+    wall_ms, lags_ms = run_with_ticker([check] * checks)
+    return {
+        "mode": "password_offloaded" if offloaded else "password_inline",
+        "checks": checks,
+        "errors": errors[0],
+        "wall_ms": round(wall_ms, 1),
+        **lag_summary(lags_ms),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent slow queries on one eventlet worker")
+    parser.add_argument('--queries', type=int, default=8,
+                        help="Concurrent queries; keep within DB_POOL_MAX_SIZE")
+    parser.add_argument('--sleep', type=float, default=0.5, help="Seconds each query sleeps in Postgres")
+    parser.add_argument('--password-checks', type=int, default=4, help="Concurrent argon2 password checks")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    # Every query here is slow on purpose; don't re-run them under EXPLAIN ANALYZE
+    query_log.threshold_ms = 0
+    results = [measure(args.queries, args.sleep, green=True), measure(args.queries, args.sleep, green=False)]
+    passwords = [measure_password_checks(args.password_checks, offloaded=True),
+                 measure_password_checks(args.password_checks, offloaded=False)]
+    if args.json:
+        print(json.dumps(results + passwords, indent=2))
+    else:
+        print(f"{'mode':<9} {'wall ms':>9} {'back-to-back ms':>15} {'p50 query ms':>12} "
+              f"{'p95 loop lag ms':>15} {'max loop lag ms':>15}")
+        for result in results:
+            print(f"{result['mode']:<9} {result['wall_ms']:>9.1f} {result['back_to_back_ms']:>15.1f} "
+                  f"{result['p50_query_ms'] or 0:>12.1f} {result['p95_loop_lag_ms'] or 0:>15.1f} "
+                  f"{result['max_loop_lag_ms'] or 0:>15.1f}")
+        print(f"\n{'mode':<18} {'wall ms':>9} {'p95 loop lag ms':>15} {'max loop lag ms':>15}")
+        for result in passwords:
+            print(f"{result['mode']:<18} {result['wall_ms']:>9.1f} {result['p95_loop_lag_ms'] or 0:>15.1f} "
+                  f"{result['max_loop_lag_ms'] or 0:>15.1f}")
+    green, (offloaded, inline) = results[0], passwords
+    queries_ok = not green['errors'] and green['wall_ms'] < green['back_to_back_ms'] / 2
+    passwords_ok = not offloaded['errors'] and offloaded['max_loop_lag_ms'] < inline['max_loop_lag_ms'] / 2
+    return 0 if queries_ok and passwords_ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Stress concurrent holds of one desk slot through DeskHold.put_desk_on_hold.
+
+Runs against the database in the DB_* settings, which should be a scratch
+database migrated with `python -m app.migrations`. For each contention
+level, that many threads start together and try to hold the same desk,
+slot and date; exactly one of them must succeed. Each level reports:
+- throughput
+- time spent waiting on locks, sampled from pg_stat_activity
+- retries of attempts that could not get a pooled connection
+
+The held transaction is deleted after each level:
+
+    python -m bench.hold_contention [--levels 1,10,100,1000] [--max-retries 5]
+"""
+from typing import Dict, List, Optional
+from app.models.desk_hold_model import DeskHold
+from app.utils.db_utils import get_db_connection
+from app.config.database import DB_CONFIG
+from datetime import date, timedelta
+import argparse
+import sys
+import threading
+import time
+import numpy as np
+import psycopg2
+
+LOCK_SAMPLE_SECONDS = 0.005
+
+class LockWaitSampler:
+    """Samples how many backends of the database wait on a lock"""
+
+    def __init__(self, db_config: Dict):
+        self.db_config = db_config
+        self.lock_wait_ms = 0.0
+        self.max_waiters = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        conn = psycopg2.connect(**{key: value for key, value in self.db_config.items() if key != 'replicas'})
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            last = time.perf_counter()
+            while not self._stop.is_set():
+                cursor.execute("""
+                    SELECT COUNT(*) FROM pg_stat_activity
+                    WHERE datname = current_database() AND wait_event_type = 'Lock'
+                """)
+                waiters = cursor.fetchone()[0]
+                now = time.perf_counter()
+                self.lock_wait_ms += waiters * (now - last) * 1000
+                self.max_waiters = max(self.max_waiters, waiters)
+                last = now
+                self._stop.wait(LOCK_SAMPLE_SECONDS)
+        finally:
+            conn.close()
+
+def active_transactions(desk_id: int, slot_id: int, booking_date: date) -> List[int]:
+    conn = get_db_connection(DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id FROM sena.booking_transactions
+            WHERE desk_id = %s AND slot_id = %s AND booking_date = %s AND status IN ('booked', 'held')
+        """, (desk_id, slot_id, booking_date))
+        ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
+
+def delete_transactions(booking_ids: List[int]) -> None:
+    if not booking_ids:
+        return
+    conn = get_db_connection(DB_CONFIG)
+    try:
+        conn.cursor().execute("DELETE FROM sena.booking_transactions WHERE id = ANY(%s)", (booking_ids,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def contend(attempts: int, user_ids: List[str], desk_id: int, slot_id: int, booking_date: date,
+            max_retries: int = 5, db_config: Optional[Dict] = None) -> Dict:
+    """
+    Release `attempts` threads at once, each holding desk_id/slot_id on
+    booking_date for a different user. A 500 (e.g. no pooled connection
+    within DB_POOL_WAIT_SECONDS) is retried with backoff up to max_retries
+    times.
+    Returns: Dict of outcome counts, latency, throughput and lock waits
+    """
+    barrier = threading.Barrier(attempts)
+    lock = threading.Lock()
+    outcomes = {201: 0, 400: 0, 'errors': 0}
+    latencies = []
+    retries = [0]
+
+    def attempt(index: int):
+        user_id = user_ids[index % len(user_ids)]
+        barrier.wait()
+        started = time.perf_counter()
+        for retry in range(max_retries + 1):
+            _, status_code = DeskHold.put_desk_on_hold(user_id, desk_id, slot_id, booking_date.isoformat())
+            if status_code != 500 or retry == max_retries:
+                break
+            with lock:
+                retries[0] += 1
+            time.sleep(0.01 * 2 ** retry)
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status_code in outcomes:
+                outcomes[status_code] += 1
+            else:
+                outcomes['errors'] += 1
+
+    threads = [threading.Thread(target=attempt, args=(n,)) for n in range(attempts)]
+    with LockWaitSampler(db_config or DB_CONFIG) as sampler:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started
+
+    active = active_transactions(desk_id, slot_id, booking_date)
+    return {
+        "attempts": attempts,
+        "succeeded": outcomes[201],
+        "conflicts": outcomes[400],
+        "errors": outcomes['errors'],
+        "retries": retries[0],
+        "active_transactions": len(active),
+        "booking_ids": active,
+        "wall_ms": round(wall_seconds * 1000, 1),
+        "throughput_per_s": round(attempts / wall_seconds, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "lock_wait_ms": round(sampler.lock_wait_ms, 1),
+        "max_lock_waiters": sampler.max_waiters,
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stress concurrent holds of one desk slot")
+    parser.add_argument('--levels', type=lambda value: [int(n) for n in value.split(',') if n],
+                        default=[1, 10, 100, 1000], help="Comma-separated numbers of concurrent attempts")
+    parser.add_argument('--max-retries', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id::text FROM sena.users ORDER BY id LIMIT %s", (max(args.levels),))
+        user_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT MIN(id) FROM sena.desks")
+        desk_id = cursor.fetchone()[0]
+        cursor.execute("SELECT MIN(id) FROM sena.slot_master")
+        slot_id = cursor.fetchone()[0]
+        cursor.execute("SELECT to_regclass('sena.uq_booking_transactions_active_slot') IS NOT NULL")
+        unique_index = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+    if not user_ids or desk_id is None or slot_id is None:
+        print("The database needs users, desks and slots", file=sys.stderr)
+        return 1
+    if not unique_index:
+        print("Warning: migration 0006 is not applied; concurrent holds can double-book", file=sys.stderr)
+
+    failed = False
+    # A date far ahead, one per level, so levels don't see each other's holds
+    first_date = date.today() + timedelta(days=3650)
+    print(f"{'attempts':>8} {'ok':>4} {'conflicts':>9} {'errors':>6} {'retries':>7} {'holds/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'lock wait ms':>12} {'max waiters':>11}")
+    for offset, attempts in enumerate(args.levels):
+        booking_date = first_date + timedelta(days=offset)
+        result = contend(attempts, user_ids, desk_id, slot_id, booking_date, args.max_retries)
+        delete_transactions(result["booking_ids"])
+        print(f"{attempts:>8} {result['succeeded']:>4} {result['conflicts']:>9} {result['errors']:>6} "
+              f"{result['retries']:>7} {result['throughput_per_s']:>9.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['lock_wait_ms']:>12.1f} {result['max_lock_waiters']:>11}")
+        if result['succeeded'] != 1 or result['active_transactions'] != 1:
+            print(f"  FAILED: {result['succeeded']} holds succeeded, "
+                  f"{result['active_transactions']} active transactions for the slot", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""
+End-to-end benchmark of the booking hot paths.
+
+Drives the Flask app from main.py in-process, one test client per worker
+thread, against the database in the DB_* settings. Point those at a
+scratch database filled by bench.generate_dataset; holds and bookings made
+during the run are deleted afterwards. It measures throughput and
+p50/p95/p99 latency for:
+- GET /api/desks with no filter, one location, and location + desk type + slot
+- hold, confirm and delete hold
+- login and master data
+It also times one background_desk_updates pass over N socket clients.
+
+Results are written as JSON and compared with a stored baseline. The run
+exits with status 1 when a scenario returns errors or its p95 latency,
+throughput or fan-out time is more than --tolerance worse than the
+baseline:
+
+    python -m bench.hot_paths [--requests 400] [--concurrency 8] [--socket-clients 10,100] [--update-baseline]
+"""
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / 'results' / 'hot_paths.json'
+DEFAULT_BASELINE = BENCH_DIR / 'baselines' / 'hot_paths.json'
+
+# Password bench.generate_dataset gives every user
+USER_PASSWORD = 'password'
+
+Request = Callable[[object, random.Random], object]
+
+class Scenario:
+    def __init__(self, name: str, request: Request, expected: Sequence[int], requests: Optional[int] = None):
+        self.name = name
+        self.request = request
+        self.expected = set(expected)
+        self.requests = requests
+
+def latency_summary(latencies_ms: List[float], errors: int, wall_seconds: float) -> Dict:
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "throughput_rps": round(len(latencies_ms) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3) if latencies_ms else None,
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3) if latencies_ms else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3) if latencies_ms else None,
+    }
+
+def run_scenario(app, scenario: Scenario, requests: int, concurrency: int, seed: int) -> Tuple[Dict, List]:
+    """
+    Send `requests` requests from `concurrency` threads
+    Returns: Tuple of (summary dict, JSON bodies of the expected responses)
+    """
+    requests = scenario.requests if scenario.requests is not None else requests
+    latencies, bodies = [], []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(index: int, count: int):
+        client = app.test_client()
+        rnd = random.Random(seed * 1000 + index)
+        own_latencies, own_bodies, own_errors = [], [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            response = scenario.request(client, rnd)
+            own_latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code in scenario.expected:
+                own_bodies.append(response.get_json(silent=True))
+            else:
+                own_errors += 1
+        with lock:
+            latencies.extend(own_latencies)
+            bodies.extend(own_bodies)
+            errors[0] += own_errors
+
+    counts = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(n, count)) for n, count in enumerate(counts) if count]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latency_summary(latencies, errors[0], time.perf_counter() - started), bodies
+
+def load_dataset() -> Dict[str, List]:
+    """Ids the scenarios pick from"""
+    from app.utils.db_utils import get_db_connection
+    from app.config.database import DB_CONFIG
+
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id::text, location_id::text, desk_type_id FROM sena.desks ORDER BY id")
+        desks = cursor.fetchall()
+        cursor.execute("SELECT id FROM sena.slot_master WHERE is_active ORDER BY id")
+        slots = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id::text, email FROM sena.users ORDER BY email LIMIT 10000")
+        users = cursor.fetchall()
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'sena.booking_transactions'::regclass")
+        transactions = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        conn.close()
+    if not desks or not slots or not users:
+        raise RuntimeError("The database needs desks, slots and users; fill it with bench.generate_dataset")
+    return {
+        'desk_ids': [int(desk[0]) for desk in desks],
+        'location_ids': sorted({desk[1] for desk in desks}),
+        'desk_type_ids': sorted({desk[2] for desk in desks}),
+        'slot_ids': slots,
+        'users': users,
+        'transactions': max(transactions, 0),
+    }
+
+def delete_bookings(bookings: List[Tuple[int, str]]) -> None:
+    """Remove the holds and bookings the run created"""
+    from app.utils.db_utils import get_db_connection
+    from app.config.database import DB_CONFIG
+
+    if not bookings:
+        return
+    conn = get_db_connection(DB_CONFIG)
+    try:
+        booking_ids = [booking_id for booking_id, _ in bookings]
+        conn.cursor().execute("DELETE FROM sena.booking_transactions WHERE id = ANY(%s)", (booking_ids,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def http_scenarios(dataset: Dict[str, List], today: date) -> List[Scenario]:
+    def booking_date(rnd):
+        return (today + timedelta(days=rnd.randint(1, 60))).isoformat()
+
+    def desks(params_for):
+        return lambda client, rnd: client.get('/api/desks', query_string=params_for(rnd))
+
+    def hold(client, rnd):
+        user_id = rnd.choice(dataset['users'])[0]
+        return client.post('/api/desks/hold', json={
+            'user_id': user_id, 'desk_id': rnd.choice(dataset['desk_ids']),
+            'slot_id': rnd.choice(dataset['slot_ids']), 'booking_date': booking_date(rnd)
+        })
+
+    def login(client, rnd):
+        return client.post('/api/auth/login', json={'email': rnd.choice(dataset['users'])[1], 'password': USER_PASSWORD})
+
+    return [
+        Scenario('desks_all', desks(lambda rnd: {'booking_date': booking_date(rnd)}), [200]),
+        Scenario('desks_location', desks(lambda rnd: {
+            'booking_date': booking_date(rnd), 'location_ids': rnd.choice(dataset['location_ids'])
+        }), [200]),
+        Scenario('desks_location_type_slot', desks(lambda rnd: {
+            'booking_date': booking_date(rnd), 'location_ids': rnd.choice(dataset['location_ids']),
+            'desk_type_ids': rnd.choice(dataset['desk_type_ids']), 'slot_type_ids': rnd.choice(dataset['slot_ids'])
+        }), [200]),
+        # A desk already taken for the slot and date answers 400
+        Scenario('hold', hold, [201, 400]),
+        Scenario('login', login, [200]),
+        Scenario('master_data', lambda client, rnd: client.get('/api/master-data'), [200]),
+    ]
+
+def booking_scenarios(bookings: List[Tuple[int, str]]) -> List[Scenario]:
+    """Confirm half of the (booking_id, booking_date) holds made by the hold scenario and delete the rest"""
+    half = len(bookings) // 2
+    to_confirm, to_delete = iter(bookings[:half]), iter(bookings[half:])
+    lock = threading.Lock()
+
+    def take(held):
+        with lock:
+            booking_id, booking_date = next(held)
+        return {'booking_id': booking_id, 'booking_date': booking_date}
+
+    return [
+        Scenario('confirm', lambda client, rnd: client.post('/api/desks/confirm', json=take(to_confirm)),
+                 [200], requests=half),
+        Scenario('delete_hold', lambda client, rnd: client.delete('/api/desks/hold', json=take(to_delete)),
+                 [200], requests=len(bookings) - half),
+    ]
+
+def measure_fanout(dataset: Dict[str, List], clients: int, today: date, seed: int) -> Dict:
+    """
+    Time one push_desk_updates pass over `clients` socket clients with
+    filters like the frontend sends. Emits are JSON-encoded the way
+    Socket.IO would encode them, without sending anything.
+    """
+    from app.routes import desk_routes
+    from app.realtime.subscriptions import canonical_filters, filter_room
+
+    rnd = random.Random(seed)
+    filters = {}
+    for n in range(clients):
+        filters[f'bench-{n}'] = canonical_filters({
+            'location_ids': [rnd.choice(dataset['location_ids'])] if n % 2 else [],
+            'desk_type_ids': [], 'slot_type_ids': [],
+            'booking_date': (today + timedelta(days=rnd.randint(0, 14))).isoformat(),
+        })
+
+    payload_bytes = [0]
+
+    def emit(event, data, room=None):
+        payload_bytes[0] += len(json.dumps(data, default=str))
+
+    with patch.object(desk_routes.socketio, 'emit', side_effect=emit):
+        for client_id, client_filters in filters.items():
+            desk_routes.subscriptions.subscribe(client_id, filter_room(client_filters), client_filters)
+        try:
+            started = time.perf_counter()
+            updated = desk_routes.push_desk_updates()
+            total_ms = (time.perf_counter() - started) * 1000
+        finally:
+            for client_id in filters:
+                desk_routes.subscriptions.unsubscribe(client_id)
+
+    return {
+        "clients": clients,
+        "updated": updated,
+        "total_ms": round(total_ms, 3),
+        "per_client_ms": round(total_ms / clients, 3),
+        "payload_bytes": payload_bytes[0],
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions of results against baseline. Errors always count; latency,
+    throughput and fan-out time only for scenarios the baseline has.
+    Returns: One message per regression
+    """
+    regressions = []
+    baseline_scenarios = baseline.get("scenarios", {})
+    for name, current in results["scenarios"].items():
+        if current.get("errors"):
+            regressions.append(f"{name}: {current['errors']} of {current['requests']} requests failed")
+        base = baseline_scenarios.get(name)
+        if not base:
+            continue
+        for metric in ("p95_ms", "total_ms"):
+            if base.get(metric) and current.get(metric) is not None and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {current[metric]:.2f} vs baseline {base[metric]:.2f}")
+        if base.get("throughput_rps") and current.get("throughput_rps", 0) < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput_rps {current['throughput_rps']:.2f} vs baseline {base['throughput_rps']:.2f}"
+            )
+    return regressions
+
+def run(args) -> Dict:
+    # main.py builds the app and initializes Socket.IO; import it only once the CLI runs.
+    # The bench drives the app from OS threads, so keep the standard library unpatched.
+    os.environ.setdefault('ASYNC_MODE', 'threading')
+    from main import app
+
+    today = date.today()
+    dataset = load_dataset()
+    results = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "dataset": {
+                "desks": len(dataset['desk_ids']),
+                "locations": len(dataset['location_ids']),
+                "transactions": dataset['transactions'],
+            },
+        },
+        "scenarios": {},
+    }
+
+    created = []
+    try:
+        for scenario in http_scenarios(dataset, today):
+            summary, bodies = run_scenario(app, scenario, args.requests, args.concurrency, args.seed)
+            results["scenarios"][scenario.name] = summary
+            if scenario.name == 'hold':
+                created = [(body['booking']['booking_id'], body['booking']['booking_date'])
+                           for body in bodies if body and 'booking' in body]
+            print(format_line(scenario.name, summary))
+
+        for scenario in booking_scenarios(created):
+            summary, _ = run_scenario(app, scenario, args.requests, args.concurrency, args.seed)
+            results["scenarios"][scenario.name] = summary
+            print(format_line(scenario.name, summary))
+    finally:
+        delete_bookings(created)
+
+    for clients in args.socket_clients:
+        summary = measure_fanout(dataset, clients, today, args.seed)
+        results["scenarios"][f"fanout_{clients}"] = summary
+        print(f"{'fanout_' + str(clients):<26} {summary['total_ms']:10.1f} ms total "
+              f"{summary['per_client_ms']:8.2f} ms/client {summary['payload_bytes']:>12} bytes")
+    return results
+
+def format_line(name: str, summary: Dict) -> str:
+    if not summary["requests"]:
+        return f"{name:<26} no requests"
+    return (f"{name:<26} {summary['throughput_rps']:8.1f} req/s   p50 {summary['p50_ms']:8.2f}   "
+            f"p95 {summary['p95_ms']:8.2f}   p99 {summary['p99_ms']:8.2f} ms   errors {summary['errors']}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the booking hot paths")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="Client threads per scenario")
+    parser.add_argument('--socket-clients', type=lambda value: [int(n) for n in value.split(',') if n],
+                        default=[10, 100], help="Comma-separated client counts for the fan-out pass")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS against {args.baseline}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
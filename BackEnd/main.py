@@ -1,11 +1,23 @@
-from flask import Flask, jsonify
+# Before anything else, so every later import sees the patched standard library
+from app.utils.green import setup_concurrency
+setup_concurrency()
+
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from app.routes.auth_routes import auth_bp
 from app.routes.signup_routes import signup_bp
 from app.routes.master_data_routes import master_data_bp
-from app.routes.desk_routes import desk_bp, socketio
+from app.routes.desk_routes import desk_bp, socketio, start_desk_updates
 from app.routes.desk_hold_routes import desk_hold_bp
 from app.routes.desk_booking_routes import desk_booking_bp
+from app.routes.health_routes import health_bp
+from app.routes.admin_routes import admin_bp
+from app.models.master_data_model import MasterData
+from app.maintenance.partitions import start_partition_maintenance
+from app.config.settings import MASTER_DATA_PRELOAD, REQUEST_TIMEOUT_MS, ASYNC_MODE
+from app.utils.db_utils import set_request_deadline, clear_request_deadline
+from app.utils import read_your_writes
+from app.utils import metrics
 from werkzeug.exceptions import HTTPException
 
 app = Flask(__name__)
@@ -14,7 +26,9 @@ CORS(app, resources={
     r"/api/*": {
         "origins": ["http://localhost:3000", "http://127.0.0.1:3000"],  # Add your frontend URL
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "X-Admin-Token", "X-Request-Timeout-Ms"],
+        # The frontend sends cookies, for read_your_writes
+        "supports_credentials": True
     }
 })
 
@@ -25,9 +39,39 @@ app.register_blueprint(master_data_bp)
 app.register_blueprint(desk_bp)
 app.register_blueprint(desk_hold_bp)
 app.register_blueprint(desk_booking_bp)
+app.register_blueprint(health_bp)
+app.register_blueprint(admin_bp)
+
+# Per-request deadline; clients may ask for a shorter one, never a longer one
+@app.before_request
+def start_request_deadline():
+    timeout_ms = REQUEST_TIMEOUT_MS
+    requested_ms = request.headers.get('X-Request-Timeout-Ms', type=int)
+    if requested_ms and requested_ms > 0:
+        timeout_ms = min(timeout_ms, requested_ms)
+    set_request_deadline(timeout_ms / 1000)
+
+@app.teardown_request
+def end_request_deadline(exc):
+    clear_request_deadline()
+
+# Reads stay on the primary for clients that just wrote, on every worker
+read_your_writes.init_app(app)
+
+# Server-Timing headers and /metrics histograms (off with METRICS_ENABLED=false)
+metrics.init_app(app)
+
+# Initialize SocketIO; desk_routes sets up the client manager for
+# SOCKETIO_MESSAGE_QUEUE
+socketio.init_app(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
+start_desk_updates()
+
+# Warm the master data snapshot so the first requests don't pay for loading it
+if MASTER_DATA_PRELOAD:
+    MasterData.get_snapshot()
 
-# Initialize SocketIO
-socketio.init_app(app, cors_allowed_origins="*", async_mode="eventlet")
+# Create next months' booking_transactions partitions before they're needed
+start_partition_maintenance()
 
 # Error handlers
 @app.errorhandler(HTTPException)
@@ -0,0 +1,36 @@
+import getpass
+import os
+import pytest
+import psycopg2.extensions
+from unittest.mock import patch
+from app.config.database import DB_CONFIG
+
+# A scratch database, e.g.
+#   TEST_DATABASE_DSN="host=localhost port=5432 dbname=sena user=postgres"
+# Tests that take database_dsn or test_db_config are skipped while it is unset.
+DATABASE_DSN = os.getenv('TEST_DATABASE_DSN')
+
+@pytest.fixture(scope='session')
+def database_dsn():
+    if not DATABASE_DSN:
+        pytest.skip("TEST_DATABASE_DSN is not set")
+    return DATABASE_DSN
+
+@pytest.fixture
+def test_db_config(database_dsn):
+    """
+    DB_CONFIG pointed at the test database for the test, with libpq's
+    defaults for every setting get_db_connection reads that the DSN leaves out
+    """
+    dsn = psycopg2.extensions.parse_dsn(database_dsn)
+    user = dsn.get('user') or os.getenv('PGUSER') or getpass.getuser()
+    config = {
+        'host': dsn.get('host') or os.getenv('PGHOST', 'localhost'),
+        'port': dsn.get('port') or os.getenv('PGPORT', '5432'),
+        'dbname': dsn.get('dbname') or os.getenv('PGDATABASE') or user,
+        'user': user,
+        'password': dsn.get('password') or os.getenv('PGPASSWORD', ''),
+        'replicas': []
+    }
+    with patch.dict(DB_CONFIG, config, clear=True):
+        yield config
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask import Flask
+from unittest.mock import MagicMock, patch
+from app.models.booking_export_model import BookingExport, EXPORT_COLUMNS
+from app.routes.admin_routes import admin_bp
+
+ADMIN_HEADERS = {'Authorization': 'Bearer test-admin-token'}
+
+ROW = (
+    7, 'user-1', 3, 1, 'booked', date(2024, 3, 20),
+    datetime(2024, 3, 19, 9, 0, tzinfo=timezone.utc), datetime(2024, 3, 19, 9, 5, tzinfo=timezone.utc),
+    'loc-1', 'Chennai', 'Ann', 'a@example.com', '1',
+    'D3', 3, 'Tower A', '1 Main St', 'Morning', '09:00:00', '13:00:00', 'IST',
+    'Hot Desk', Decimal('101.00')
+)
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(admin_bp)
+    with patch('app.config.settings.ADMIN_API_TOKEN', 'test-admin-token'):
+        yield app.test_client()
+
+def make_connection(rows):
+    conn = MagicMock()
+    conn.cursor.return_value.__iter__.return_value = iter(rows)
+    return conn
+
+def test_export_requires_admin_token(client):
+    assert client.get('/api/admin/bookings/export').status_code == 401
+
+def test_csv_export_streams_flattened_rows(client):
+    conn = make_connection([ROW] * 3)
+    with patch('app.models.booking_export_model.get_db_connection', return_value=conn), \
+            patch('app.models.booking_export_model.BOOKING_EXPORT_CHUNK_ROWS', 2):
+        response = client.get('/api/admin/bookings/export?from_date=2024-03-01&status=booked', headers=ADMIN_HEADERS)
+
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        # Header plus two rows, then the last row
+        chunks = list(response.response)
+        assert len(chunks) == 2
+
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == 4
+    assert rows[1][EXPORT_COLUMNS.index('booking_date')] == '2024-03-20'
+    assert rows[1][EXPORT_COLUMNS.index('building_name')] == 'Tower A'
+
+    # Rows come from a named server-side cursor and the connection goes back to the pool
+    assert conn.cursor.call_args.kwargs['name'].startswith('booking_export_')
+    conn.close.assert_called_once()
+
+def test_ndjson_export(client):
+    with patch('app.models.booking_export_model.get_db_connection', return_value=make_connection([ROW])):
+        response = client.get('/api/admin/bookings/export?format=ndjson', headers=ADMIN_HEADERS)
+
+    lines = response.get_data(as_text=True).splitlines()
+    assert response.mimetype == 'application/x-ndjson'
+    assert json.loads(lines[0])['price'] == 101.0
+    assert json.loads(lines[0])['updated_at'] == '2024-03-19T09:05:00+00:00'
+
+def test_export_rejects_bad_parameters(client):
+    assert client.get('/api/admin/bookings/export?format=xml', headers=ADMIN_HEADERS).status_code == 400
+    assert client.get('/api/admin/bookings/export?from_date=20-03-2024', headers=ADMIN_HEADERS).status_code == 400
+    assert BookingExport.stream_bookings('xml')[1] == 400
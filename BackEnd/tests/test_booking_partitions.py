@@ -0,0 +1,99 @@
+import os
+import pytest
+import psycopg2
+import psycopg2.errors
+from datetime import date
+from app.maintenance import partitions
+from app.migrations import runner
+from app.maintenance.backfill_desk_slot_day_status import EXPECTED_STATUS_SQL
+from app.models.booking_export_model import EXPORT_SQL
+from app.models.desk_hold_model import HOLD_CONFLICT_STATEMENT, HOLD_STATUS_SQL
+
+# A scratch database with the sena schema, e.g.
+#   TEST_DATABASE_DSN="host=localhost port=5432 dbname=sena user=postgres"
+# Pending migrations, which partition the table, run inside a transaction
+# that is rolled back.
+DATABASE_DSN = os.getenv('TEST_DATABASE_DSN')
+
+requires_database = pytest.mark.skipif(not DATABASE_DSN, reason="TEST_DATABASE_DSN is not set")
+
+@pytest.fixture
+def cursor():
+    conn = psycopg2.connect(DATABASE_DSN)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        for month in ('2020-01-01', '2099-05-01', '2099-06-01', '2099-07-01'):
+            cursor.execute("SELECT sena.create_booking_transactions_partition(%s)", (month,))
+        partitions.ensure_future_partitions(cursor, months_ahead=2)
+        cursor.execute("ANALYZE sena.booking_transactions")
+        yield cursor
+    finally:
+        conn.rollback()
+        conn.close()
+
+def scanned_tables(cursor, sql, params=()):
+    """Tables the plan for sql reads, after partition pruning"""
+    cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    tables = set()
+
+    def walk(node):
+        if 'Relation Name' in node:
+            tables.add(node['Relation Name'])
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(cursor.fetchone()[0][0]['Plan'])
+    return {table for table in tables if table.startswith('booking_transactions')}
+
+def test_add_months():
+    assert partitions.add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert partitions.add_months(date(2024, 1, 1), -24) == date(2022, 1, 1)
+
+@requires_database
+def test_hold_conflict_reads_one_partition(cursor):
+    cursor.execute(HOLD_CONFLICT_STATEMENT.prepare_sql)
+    execute = HOLD_CONFLICT_STATEMENT.execute_sql
+    assert scanned_tables(cursor, execute, (1, 1, '2099-06-15')) == {'booking_transactions_p2099_06'}
+
+    # Generic plans of the prepared statement prune when the executor starts
+    cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+    assert scanned_tables(cursor, execute, (1, 1, '2099-06-15')) == {'booking_transactions_p2099_06'}
+
+@requires_database
+def test_id_lookups_with_the_booking_date_read_one_partition(cursor):
+    lookup = "SELECT status FROM sena.booking_transactions WHERE id = %s AND booking_date = %s"
+    assert scanned_tables(cursor, lookup, (1, '2099-06-15')) == {'booking_transactions_p2099_06'}
+
+    # booking_date is part of the primary key
+    cursor.execute("SAVEPOINT undated")
+    with pytest.raises(psycopg2.errors.NotNullViolation):
+        cursor.execute("INSERT INTO sena.booking_transactions (user_id, status) VALUES (gen_random_uuid(), 'held')")
+    cursor.execute("ROLLBACK TO SAVEPOINT undated")
+
+@requires_database
+def test_date_range_queries_skip_other_months(cursor):
+    export = EXPORT_SQL % tuple(["'2099-06-01'"] * 2 + ["'2099-06-30'"] * 2 + ["NULL"] * 4)
+    assert scanned_tables(cursor, export) == {'booking_transactions_p2099_06'}
+
+    rollup = f"SELECT * FROM ({EXPECTED_STATUS_SQL}) e"
+    assert scanned_tables(cursor, rollup, ('2099-05-20', '2099-06-10')) == {
+        'booking_transactions_p2099_05', 'booking_transactions_p2099_06'
+    }
+
+@requires_database
+def test_hold_status_skips_past_months(cursor):
+    tables = scanned_tables(cursor, HOLD_STATUS_SQL, (1, 1))
+    this_month = date.today().replace(day=1)
+    months = [partitions.PARTITION_NAME.match(table) for table in tables]
+    assert all(date(int(m.group(1)), int(m.group(2)), 1) >= this_month for m in months if m)
+    assert 'booking_transactions_p2020_01' not in tables
+    assert 'booking_transactions_p2099_06' in tables
+
+@requires_database
+def test_manager_archives_old_months(cursor):
+    assert partitions.ensure_future_partitions(cursor, months_ahead=2) == []
+    archived = partitions.archive_old_partitions(cursor, retain_months=0, today=date(2099, 6, 10))
+    assert 'booking_transactions_p2099_05' in archived
+    assert 'booking_transactions_p2099_06' not in archived
+    assert 'booking_transactions_p2099_05' not in partitions.monthly_partitions(cursor)
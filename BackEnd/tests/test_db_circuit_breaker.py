@@ -0,0 +1,100 @@
+import time
+import pytest
+import psycopg2
+import psycopg2.errors
+from unittest.mock import patch
+from app.utils import db_utils
+from app.config.settings import DB_STATEMENT_TIMEOUT_MS
+from app.utils.db_utils import CircuitBreaker
+
+TEST_DB_CONFIG = {'host': 'deadline-test', 'port': 5432, 'dbname': 'sena', 'user': 'u', 'password': 'p'}
+
+def make_breaker(open_seconds=60):
+    return CircuitBreaker(window_seconds=60, min_requests=4, failure_ratio=0.5, open_seconds=open_seconds)
+
+def test_opens_when_failure_rate_spikes():
+    breaker = make_breaker()
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
+    assert breaker.snapshot()["rejected_total"] == 1
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = make_breaker(open_seconds=0)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Only one probe is let through while half open
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.open_seconds = 60
+    assert breaker.allow_request() is False
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.open_seconds = 0
+    assert breaker.allow_request() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_get_db_connection_fails_fast_when_open():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record_failure()
+
+    with patch.object(db_utils, 'db_breaker', breaker), \
+            patch('psycopg2.connect') as mock_connect:
+        assert db_utils.get_db_connection(TEST_DB_CONFIG) is None
+        mock_connect.assert_not_called()
+
+def test_request_deadline_caps_connect_timeout():
+    with patch('psycopg2.connect') as mock_connect, \
+            patch.object(db_utils, 'db_breaker', make_breaker()):
+        db_utils.set_request_deadline(1.5)
+        try:
+            db_utils.get_db_connection(TEST_DB_CONFIG)
+        finally:
+            db_utils.clear_request_deadline()
+            db_utils.close_all_pools()
+
+    assert mock_connect.call_args.kwargs['connect_timeout'] == 2
+
+def test_expired_deadline_skips_the_database():
+    with patch('psycopg2.connect') as mock_connect:
+        db_utils.set_request_deadline(0)
+        time.sleep(0.01)
+        try:
+            assert db_utils.get_db_connection(TEST_DB_CONFIG) is None
+        finally:
+            db_utils.clear_request_deadline()
+        mock_connect.assert_not_called()
+
+def test_deadline_survives_a_rollback(test_db_config):
+    conn = db_utils.get_db_connection(test_db_config)
+    db_utils.set_request_deadline(0.5)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        conn.rollback()
+        with pytest.raises(psycopg2.errors.QueryCanceled):
+            cursor.execute("SELECT pg_sleep(2)")
+        conn.rollback()
+    finally:
+        db_utils.clear_request_deadline()
+        conn.close()
+
+    # Nothing of the deadline outlives the request
+    conn = db_utils.get_db_connection(test_db_config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT setting::int FROM pg_settings WHERE name = 'statement_timeout'")
+        assert cursor.fetchone()[0] == DB_STATEMENT_TIMEOUT_MS
+    finally:
+        conn.close()
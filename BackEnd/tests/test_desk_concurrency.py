@@ -76,9 +76,9 @@ def test_concurrent_hold_requests(app, client):
     threads = []
     lock = threading.Lock()
 
-    # Mock the hold_desk_slot method to simulate database locking
-    with patch('app.models.desk_model.DeskData.hold_desk_slot') as mock_hold:
-        def mock_hold_side_effect(user_id, desk_id, slot_id):
+    # Mock the put_desk_on_hold method to simulate database locking
+    with patch('app.models.desk_hold_model.DeskHold.put_desk_on_hold') as mock_hold:
+        def mock_hold_side_effect(user_id, desk_id, slot_id, booking_date):
             # Simulate database check for existing holds
             if hasattr(mock_hold_side_effect, 'held'):
                 return {"error": "Desk already held"}, 409
@@ -147,8 +147,8 @@ def test_hold_and_booking_race_condition(app, client):
     user1_id = str(uuid.uuid4())
     user2_id = str(uuid.uuid4())
     
-    # Mock the hold_desk_slot method
-    with patch('app.models.desk_model.DeskData.hold_desk_slot') as mock_hold:
+    # Mock the put_desk_on_hold method
+    with patch('app.models.desk_hold_model.DeskHold.put_desk_on_hold') as mock_hold:
         # First call succeeds, subsequent calls fail
         mock_hold.side_effect = [
             ({"message": "Desk slot held successfully"}, 201),
@@ -163,6 +163,8 @@ def test_hold_and_booking_race_condition(app, client):
             'booking_date': '2024-03-20'
         })
         assert hold_response.status_code == 201
+        # The hold is for the requested date, so the per-date conflict checks apply
+        assert mock_hold.call_args.args == (user1_id, TEST_DESK_ID, TEST_SLOT_ID, '2024-03-20')
 
         # Second user tries to hold the same desk
         hold_response2 = client.post('/api/desks/held', json={
@@ -0,0 +1,65 @@
+import os
+import pytest
+import psycopg2
+from app.maintenance.backfill_desk_slot_day_status import EXPECTED_STATUS_SQL
+from app.migrations import runner
+
+# A scratch database with the sena schema, e.g.
+#   TEST_DATABASE_DSN="host=localhost port=5432 dbname=sena user=postgres"
+# Everything runs in one transaction that is rolled back.
+DATABASE_DSN = os.getenv('TEST_DATABASE_DSN')
+
+pytestmark = pytest.mark.skipif(not DATABASE_DSN, reason="TEST_DATABASE_DSN is not set")
+
+@pytest.fixture
+def db():
+    conn = psycopg2.connect(DATABASE_DSN)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        cursor.execute("""
+            SELECT (SELECT id FROM sena.users LIMIT 1), (SELECT id FROM sena.desks LIMIT 1),
+                   (SELECT id FROM sena.slot_master ORDER BY id LIMIT 1),
+                   (SELECT id FROM sena.slot_master ORDER BY id OFFSET 1 LIMIT 1)
+        """)
+        ids = cursor.fetchone()
+        if None in ids:
+            pytest.skip("The test database needs a user, a desk and two slots")
+        yield cursor, ids
+    finally:
+        conn.rollback()
+        conn.close()
+
+def rollup_rows(cursor, booking_date):
+    cursor.execute("""
+        SELECT desk_id, slot_id, booked_count, held_count FROM sena.desk_slot_day_status
+        WHERE booking_date = %s ORDER BY desk_id, slot_id
+    """, (booking_date,))
+    return cursor.fetchall()
+
+def expected_rows(cursor, booking_date):
+    cursor.execute(f"SELECT desk_id, slot_id, booked_count, held_count FROM ({EXPECTED_STATUS_SQL}) e ORDER BY desk_id, slot_id",
+                   (booking_date, booking_date))
+    return cursor.fetchall()
+
+def test_triggers_follow_hold_book_and_release(db):
+    cursor, (user_id, desk_id, slot_id, second_slot_id) = db
+    booking_date = '2099-06-01'
+
+    cursor.execute("""
+        INSERT INTO sena.booking_transactions (user_id, desk_id, slot_id, status, booking_date)
+        VALUES (%s, %s, %s, 'held', %s), (%s, %s, %s, 'cancelled', %s), (%s, %s, %s, 'held', %s)
+        RETURNING id
+    """, (user_id, desk_id, slot_id, booking_date) * 2 + (user_id, desk_id, second_slot_id, booking_date))
+    first, cancelled, other_slot = [row[0] for row in cursor.fetchall()]
+    assert rollup_rows(cursor, booking_date) == [(desk_id, slot_id, 0, 1), (desk_id, second_slot_id, 0, 1)]
+
+    cursor.execute("UPDATE sena.booking_transactions SET status = 'booked' WHERE id = %s", (first,))
+    assert rollup_rows(cursor, booking_date) == [(desk_id, slot_id, 1, 0), (desk_id, second_slot_id, 0, 1)]
+
+    cursor.execute("DELETE FROM sena.booking_transactions WHERE id IN (%s, %s)", (cancelled, other_slot))
+    assert rollup_rows(cursor, booking_date) == expected_rows(cursor, booking_date) == [(desk_id, slot_id, 1, 0)]
+
+    # Keys left with nothing booked or held have no row
+    cursor.execute("UPDATE sena.booking_transactions SET status = 'cancelled' WHERE id = %s", (first,))
+    assert rollup_rows(cursor, booking_date) == []
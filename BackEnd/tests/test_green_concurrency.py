@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+def test_slow_work_runs_concurrently_with_the_event_loop(test_db_config):
+    # The bench monkey-patches its process, so it runs in one of its own
+    env = dict(os.environ, DB_HOST=test_db_config['host'], DB_PORT=str(test_db_config['port']),
+               DB_NAME=test_db_config['dbname'], DB_USER=test_db_config['user'],
+               DB_PASSWORD=test_db_config['password'], DB_REPLICA_DSNS='', PYTHONWARNINGS='ignore')
+    completed = subprocess.run(
+        [sys.executable, '-m', 'bench.green_concurrency', '--queries', '6', '--sleep', '0.3', '--password-checks', '3', '--json'],
+        cwd=Path(__file__).resolve().parent.parent, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    green, blocking, offloaded, inline = json.loads(completed.stdout)
+
+    assert green["errors"] == 0 and blocking["errors"] == 0
+    assert green["wall_ms"] < 900
+    assert green["max_loop_lag_ms"] < 150
+    # Without the wait callback each query holds the whole worker
+    assert blocking["wall_ms"] >= 1700
+    assert blocking["max_loop_lag_ms"] >= 250
+
+    # Password checks on the pool leave the hub free; inline each one stalls it
+    assert offloaded["errors"] == 0
+    assert offloaded["max_loop_lag_ms"] < 100
+    assert inline["max_loop_lag_ms"] > offloaded["max_loop_lag_ms"] * 2
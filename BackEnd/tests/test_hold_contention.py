@@ -0,0 +1,37 @@
+import pytest
+import psycopg2
+from datetime import date
+from app.migrations import runner
+from bench.hold_contention import contend, delete_transactions
+
+# Holds are committed by DeskHold itself, so pending migrations are
+# committed first and the holds are deleted afterwards.
+BOOKING_DATE = date(2199, 1, 1)
+
+@pytest.fixture
+def ids(database_dsn, test_db_config):
+    conn = psycopg2.connect(database_dsn)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        conn.commit()
+        cursor.execute("SELECT array_agg(id::text) FROM (SELECT id FROM sena.users ORDER BY id LIMIT 50) u")
+        user_ids = cursor.fetchone()[0]
+        cursor.execute("SELECT (SELECT MIN(id) FROM sena.desks), (SELECT MIN(id) FROM sena.slot_master)")
+        desk_id, slot_id = cursor.fetchone()
+        if not user_ids or desk_id is None or slot_id is None:
+            pytest.skip("The test database needs users, a desk and a slot")
+    finally:
+        conn.close()
+    return user_ids, desk_id, slot_id
+
+def test_exactly_one_of_many_concurrent_holds_succeeds(ids):
+    user_ids, desk_id, slot_id = ids
+    result = contend(50, user_ids, desk_id, slot_id, BOOKING_DATE)
+    try:
+        assert result["succeeded"] == 1
+        assert result["conflicts"] == 49
+        assert result["errors"] == 0
+        assert result["active_transactions"] == 1
+    finally:
+        delete_transactions(result["booking_ids"])
@@ -0,0 +1,77 @@
+import pytest
+import psycopg2
+from flask import Flask
+from unittest.mock import patch
+from app.migrations import runner
+from app.models.desk_hold_model import DeskHold
+from app.routes.desk_hold_routes import desk_hold_bp
+from app.utils import sessions
+
+# The hold is committed so DeskHold's own connection sees it, and deleted afterwards.
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(desk_hold_bp)
+    return app.test_client()
+
+def test_batch_request_is_validated_before_querying(client):
+    with patch.object(DeskHold, 'get_hold_statuses', return_value=({"statuses": {}}, 200)) as statuses:
+        assert client.post('/api/desks/hold/status', json={'slots': 'nope'}).status_code == 400
+        assert client.post('/api/desks/hold/status', json={
+            'slots': [{'desk_id': 1, 'slot_id': 2, 'booking_date': '02/03/2026'}]
+        }).status_code == 400
+        statuses.assert_not_called()
+
+        response = client.post('/api/desks/hold/status', json={'user_id': 'user-1', 'slots': [
+            {'desk_id': '1', 'slot_id': 2, 'booking_date': '2026-03-02'},
+            {'desk_id': 3, 'slot_id': 4, 'booking_date': '2026-03-03'},
+        ]})
+        assert response.status_code == 200
+        statuses.assert_called_once_with([(1, 2, '2026-03-02'), (3, 4, '2026-03-03')], user_id='user-1')
+
+def test_status_reads_follow_the_callers_own_holds(client):
+    token = sessions.issue_token('user-2')
+    with patch.object(DeskHold, 'get_desk_hold_status', return_value=({"is_held": False}, 200)) as status:
+        client.get('/api/desks/hold/status/1/2?user_id=user-1')
+        client.get('/api/desks/hold/status/1/2', headers={'Authorization': f'Bearer {token}'})
+    assert [call.kwargs['user_id'] for call in status.call_args_list] == ['user-1', 'user-2']
+
+@pytest.fixture
+def held_slot(database_dsn, test_db_config):
+    conn = psycopg2.connect(database_dsn)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        cursor.execute("""
+            SELECT (SELECT id FROM sena.users LIMIT 1), (SELECT MIN(id) FROM sena.desks),
+                   (SELECT MIN(id) FROM sena.slot_master)
+        """)
+        user_id, desk_id, slot_id = cursor.fetchone()
+        if None in (user_id, desk_id, slot_id):
+            pytest.skip("The test database needs a user, a desk and a slot")
+        cursor.execute("""
+            INSERT INTO sena.booking_transactions (user_id, desk_id, slot_id, status, booking_date)
+            VALUES (%s, %s, %s, 'held', '2199-02-01') RETURNING id
+        """, (user_id, desk_id, slot_id))
+        booking_id = cursor.fetchone()[0]
+        conn.commit()
+
+        yield desk_id, slot_id
+        cursor.execute("DELETE FROM sena.booking_transactions WHERE id = %s", (booking_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_statuses_of_many_slots_in_one_query(held_slot):
+    desk_id, slot_id = held_slot
+    result, status_code = DeskHold.get_hold_statuses([
+        (desk_id, slot_id, '2199-02-01'),
+        (desk_id, slot_id, '2199-02-02'),
+        (desk_id, slot_id, '2199-02-01'),
+    ])
+    assert status_code == 200
+    assert result == {"statuses": {
+        f"{desk_id}:{slot_id}:2199-02-01": 'held',
+        f"{desk_id}:{slot_id}:2199-02-02": 'available',
+    }}
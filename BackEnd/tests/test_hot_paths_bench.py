@@ -0,0 +1,35 @@
+from bench.hot_paths import compare, latency_summary
+
+def results(**scenarios):
+    return {"scenarios": scenarios}
+
+def test_latency_summary_percentiles():
+    summary = latency_summary([float(ms) for ms in range(1, 101)], errors=2, wall_seconds=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["p50_ms"] == 50.5
+    assert summary["p99_ms"] == 99.01
+    assert summary["errors"] == 2
+
+def test_compare_flags_slower_p95_and_lower_throughput():
+    baseline = results(hold={"p95_ms": 40.0, "throughput_rps": 200.0, "errors": 0})
+    current = results(hold={"p95_ms": 55.0, "throughput_rps": 120.0, "errors": 0, "requests": 400})
+    regressions = compare(current, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert all(regression.startswith("hold:") for regression in regressions)
+
+def test_compare_allows_noise_within_tolerance():
+    baseline = results(hold={"p95_ms": 40.0, "throughput_rps": 200.0}, fanout_10={"total_ms": 900.0})
+    current = results(hold={"p95_ms": 48.0, "throughput_rps": 170.0, "errors": 0, "requests": 400},
+                      fanout_10={"total_ms": 1000.0})
+    assert compare(current, baseline, tolerance=0.25) == []
+
+def test_compare_fails_on_errors_and_slower_fanout():
+    baseline = results(fanout_100={"total_ms": 1000.0})
+    current = results(login={"p95_ms": 5.0, "throughput_rps": 900.0, "errors": 3, "requests": 400},
+                      fanout_100={"total_ms": 2000.0})
+    regressions = compare(current, baseline, tolerance=0.25)
+    assert regressions == [
+        "login: 3 of 400 requests failed",
+        "fanout_100: total_ms 2000.00 vs baseline 1000.00",
+    ]
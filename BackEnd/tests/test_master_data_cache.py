@@ -0,0 +1,109 @@
+import pytest
+import time
+from types import MappingProxyType
+from flask import Flask
+from unittest.mock import patch
+from app.models.master_data_model import MasterData, MasterDataSnapshot
+from app.routes.master_data_routes import master_data_bp
+
+ADMIN_HEADERS = {'Authorization': 'Bearer test-admin-token'}
+
+def make_snapshot(version="v1"):
+    return MasterDataSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        locations=(MappingProxyType({"location_id": "loc-1", "location_name": "Chennai"}),),
+        slots=(MappingProxyType({
+            "slot_id": 1, "slot_type": "Morning",
+            "start_time": "09:00:00", "end_time": "13:00:00", "time_zone": "IST"
+        }),),
+        desk_types=(MappingProxyType({"desk_type_id": 1, "type": "Hot Desk", "capacity": 1}),)
+    )
+
+@pytest.fixture(autouse=True)
+def admin_token():
+    with patch('app.config.settings.ADMIN_API_TOKEN', 'test-admin-token'):
+        yield
+
+@pytest.fixture(autouse=True)
+def reset_snapshot():
+    MasterData._snapshot = None
+    MasterData._next_refresh_at = 0.0
+    MasterData._last_refresh_failed = False
+    yield
+    MasterData._snapshot = None
+    MasterData._next_refresh_at = 0.0
+    MasterData._last_refresh_failed = False
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(master_data_bp)
+    return app.test_client()
+
+def test_snapshot_is_loaded_once_for_all_routes(client):
+    """All four master-data routes are served from one load"""
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot()) as mock_load:
+        for url in ['/api/master-data', '/api/master-data/locations',
+                    '/api/master-data/slots', '/api/master-data/desk-types']:
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.headers['X-Master-Data-Version'] == 'v1'
+
+        assert mock_load.call_count == 1
+
+    body = client.get('/api/master-data').get_json()
+    assert body['version'] == 'v1'
+    assert body['locations'] == [{"location_id": "loc-1", "location_name": "Chennai"}]
+
+def test_if_none_match_returns_not_modified(client):
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot()):
+        response = client.get('/api/master-data/slots', headers={'If-None-Match': '"v1"'})
+        assert response.status_code == 304
+        assert response.data == b''
+
+def test_failed_refresh_keeps_serving_last_snapshot(client):
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot()):
+        client.get('/api/master-data')
+
+    with patch.object(MasterData, '_load_snapshot', return_value=None):
+        reload_response = client.post('/api/master-data/reload', headers=ADMIN_HEADERS)
+        assert reload_response.status_code == 500
+        assert reload_response.get_json()['version'] == 'v1'
+
+        response = client.get('/api/master-data/locations')
+        assert response.status_code == 200
+        assert response.get_json()['locations'][0]['location_name'] == 'Chennai'
+        assert 'Warning' in response.headers
+
+def test_expired_snapshot_is_served_while_refreshing(client):
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot("v1")):
+        client.get('/api/master-data')
+
+    MasterData._next_refresh_at = 0.0
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot("v2")):
+        response = client.get('/api/master-data')
+        assert response.get_json()['version'] == 'v1'
+
+        # The background refresh swaps in the new snapshot
+        with MasterData._refresh_lock:
+            pass
+        assert client.get('/api/master-data').get_json()['version'] == 'v2'
+
+def test_reload_swaps_snapshot_version(client):
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot("v1")):
+        client.get('/api/master-data')
+    with patch.object(MasterData, '_load_snapshot', return_value=make_snapshot("v2")):
+        response = client.post('/api/master-data/reload', headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.get_json()['version'] == 'v2'
+
+    assert client.get('/api/master-data').headers['ETag'] == '"v2"'
+
+def test_reload_requires_admin_token(client):
+    assert client.post('/api/master-data/reload').status_code == 401
+    assert client.post('/api/master-data/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+
+    with patch('app.config.settings.ADMIN_API_TOKEN', ''):
+        assert client.post('/api/master-data/reload', headers=ADMIN_HEADERS).status_code == 403
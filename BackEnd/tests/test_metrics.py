@@ -0,0 +1,65 @@
+import pytest
+from flask import Flask, jsonify
+from unittest.mock import patch
+from app.routes.health_routes import health_bp
+from app.utils import metrics
+
+@metrics.timed
+def load_desks():
+    metrics.record('db_query', 0.002)
+    metrics.record('db_query', 0.003)
+    return {"desks": [1, 2]}, 200
+
+@pytest.fixture(autouse=True)
+def clear_histograms():
+    for histogram in metrics.Histogram.registry.values():
+        histogram.clear()
+    yield
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(health_bp)
+    metrics.init_app(app)
+
+    @app.route('/api/desks/<int:desk_id>')
+    def get_desk(desk_id):
+        result, status_code = load_desks()
+        return jsonify(result), status_code
+
+    return app.test_client()
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram('test_seconds', 'Test', ['call'], buckets=(0.01, 0.1))
+    try:
+        histogram.observe(('a',), 0.005)
+        histogram.observe(('a',), 0.05)
+        histogram.observe(('a',), 3.0)
+        lines = histogram.render()
+    finally:
+        del metrics.Histogram.registry['test_seconds']
+    assert 'test_seconds_bucket{call="a",le="0.01"} 1' in lines
+    assert 'test_seconds_bucket{call="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{call="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{call="a"} 3' in lines
+
+def test_server_timing_lists_phases_model_calls_and_total(client):
+    response = client.get('/api/desks/7')
+    header = response.headers['Server-Timing']
+    entries = [entry.split(';')[0] for entry in header.split(', ')]
+    assert entries == ['db_query', 'load_desks', 'json', 'total']
+    assert 'db_query;desc="x2";dur=5.00' in header
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/desks/<int:desk_id>",status="200"} 1' in text
+    assert 'model_call_duration_seconds_count{call="load_desks"} 1' in text
+    assert 'request_phase_duration_seconds_count{phase="db_query"} 2' in text
+
+def test_disabled_metrics_add_no_header_or_samples(client):
+    with patch.object(metrics.settings, 'METRICS_ENABLED', False):
+        response = client.get('/api/desks/7')
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response.headers
+        assert client.get('/metrics').status_code == 404
+    assert 'load_desks' not in metrics.render_metrics()
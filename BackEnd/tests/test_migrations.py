@@ -0,0 +1,25 @@
+import pytest
+from unittest.mock import MagicMock
+from app.migrations import runner
+
+def history_cursor(rows):
+    cursor = MagicMock()
+    cursor.fetchall.return_value = rows
+    return cursor
+
+def test_migrations_load_in_version_order():
+    versions = [migration.version for migration in runner.load_migrations()]
+    assert versions == sorted(versions)
+    assert versions[0] == 1
+
+def test_pending_skips_applied_and_stops_at_target():
+    migrations = runner.load_migrations()
+    applied = [(migrations[0].version, migrations[0].checksum)]
+
+    pending = runner.pending_migrations(history_cursor(applied), migrations, target=migrations[2].version)
+    assert [migration.version for migration in pending] == [migrations[1].version, migrations[2].version]
+
+def test_changed_migration_is_refused():
+    migrations = runner.load_migrations()
+    with pytest.raises(ValueError):
+        runner.pending_migrations(history_cursor([(migrations[0].version, 'edited')]), migrations)
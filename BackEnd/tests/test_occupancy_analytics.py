@@ -0,0 +1,67 @@
+import numpy as np
+from datetime import date
+from app.models.occupancy_model import OccupancyAnalytics
+
+# id, location id, location, building id, building, floor, desk type id, desk type
+DESKS = [
+    (1, 'loc-1', 'Chennai', 1, 'Tower A', 1, 1, 'Hot Desk'),
+    (2, 'loc-1', 'Chennai', 1, 'Tower A', 2, 2, 'Cabin'),
+    (3, 'loc-2', 'Bengaluru', 2, 'Tower B', 1, 1, 'Hot Desk'),
+    (4, 'loc-2', 'Bengaluru', 2, 'Tower B', 1, 1, 'Hot Desk')
+]
+SLOTS = [(1, 'Morning'), (2, 'Evening')]
+
+# day offset, desk_id, slot_id, booked_count, held_count
+ROLLUP = np.array([
+    [0, 1, 1, 1, 0],
+    [0, 1, 2, 1, 0],   # same desk-day as above, counted once
+    [0, 3, 1, 1, 0],
+    [1, 2, 2, 0, 1],   # hold left open on a day that is over
+    [7, 4, 1, 1, 0],
+    [7, 9, 1, 1, 0]    # desk that no longer exists
+])
+
+def summarize(**kwargs):
+    # 2024-03-04 is a Monday; two weeks, the first week is over
+    return OccupancyAnalytics.summarize(
+        date(2024, 3, 4), date(2024, 3, 17), date(2024, 3, 11), DESKS, SLOTS, ROLLUP, **kwargs
+    )
+
+def test_utilization_by_location():
+    report = summarize(group_by='location')
+
+    assert report["desk_days"] == 4 * 14
+    assert report["occupied_desk_days"] == 3
+    groups = {group["label"]: group for group in report["groups"]}
+    assert groups["Chennai"]["occupied"] == 1
+    assert groups["Chennai"]["utilization"] == round(1 / 28, 4)
+    assert groups["Bengaluru"]["occupied"] == 2
+    assert groups["Chennai"]["hold_abandonment_rate"] == round(1 / 3, 4)
+
+    assert report["peak_day"] == {"date": "2024-03-04", "occupied_desks": 2, "utilization": 0.5}
+    assert report["abandoned_holds"] == 1
+
+def test_weekly_periods_and_slot_grouping():
+    report = summarize(group_by='slot', period='week')
+    assert [period["period_start"] for period in report["periods"]] == ['2024-03-04', '2024-03-11']
+    assert [period["occupied_desk_days"] for period in report["periods"]] == [2, 1]
+    assert report["by_weekday"][0] == {"weekday": "Monday", "utilization": round(3 / 8, 4)}
+
+    slots = {group["label"]: group for group in report["groups"]}
+    assert slots["Morning"]["occupied"] == 3
+    assert slots["Evening"]["occupied"] == 1
+
+def test_floor_grouping_and_empty_range():
+    floors = {group["label"]: group["desks"] for group in summarize(group_by='floor')["groups"]}
+    assert floors == {"Tower A / floor 1": 1, "Tower A / floor 2": 1, "Tower B / floor 1": 2}
+
+    empty = OccupancyAnalytics.summarize(
+        date(2024, 3, 4), date(2024, 3, 4), date(2024, 3, 11), DESKS, SLOTS, np.empty((0, 5)), period='month'
+    )
+    assert empty["utilization"] == 0.0
+    assert empty["peak_day"] is None
+
+def test_rejects_bad_ranges():
+    assert OccupancyAnalytics.get_occupancy_report('2024-03-10', '2024-03-01')[1] == 400
+    assert OccupancyAnalytics.get_occupancy_report('2024-01-01', '2026-01-01')[1] == 400
+    assert OccupancyAnalytics.get_occupancy_report('2024-03-01', '2024-03-10', group_by='desk')[1] == 400
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock, patch
+from app.routes import auth_routes
+from app.utils.passwords import PasswordHasherBusy, PasswordPool, check_password, hash_password, is_password_hash
+
+ROW = ('7c9e6679-7425-40de-944b-e07fc1f90ae7', 'ada@example.com', 'Ada', 'Lovelace', None, None, None, True)
+
+def test_hashes_verify_and_plaintext_rows_are_upgraded():
+    stored = hash_password('s3cret')
+    assert is_password_hash(stored)
+    assert check_password('s3cret', stored) == (True, None)
+    assert check_password('wrong', stored) == (False, None)
+    assert check_password('s3cret', None) == (False, None)
+
+    matches, new_hash = check_password('s3cret', 's3cret')
+    assert matches and is_password_hash(new_hash)
+    assert check_password('s3cret', new_hash) == (True, None)
+    assert check_password('wrong', 's3cret') == (False, None)
+
+def test_pool_sheds_work_beyond_its_queue_depth():
+    pool = PasswordPool(workers=1, queue_depth=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=pool.run, args=(slow,))
+    worker.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(PasswordHasherBusy):
+            pool.run(lambda: None)
+        assert pool.shed == 1
+    finally:
+        release.set()
+        worker.join()
+    assert pool.run(lambda: 'ran') == 'ran'
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(auth_routes.auth_bp)
+    return app.test_client()
+
+def test_login_upgrades_a_plaintext_password(client):
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = ROW + ('pw',)
+    with patch.object(auth_routes, 'get_db_connection', return_value=conn):
+        assert client.post('/api/auth/login', json={'email': ROW[1], 'password': 'nope'}).status_code == 401
+        upgrades = [call for call in conn.cursor.return_value.execute.call_args_list
+                    if call[0][0] == auth_routes.UPGRADE_PASSWORD_SQL]
+        assert upgrades == []
+
+        response = client.post('/api/auth/login', json={'email': ROW[1], 'password': 'pw'})
+        assert response.status_code == 200 and response.get_json()['token']
+        upgrades = [call for call in conn.cursor.return_value.execute.call_args_list
+                    if call[0][0] == auth_routes.UPGRADE_PASSWORD_SQL]
+        new_hash, user_id, checked = upgrades[0][0][1]
+        assert is_password_hash(new_hash) and (user_id, checked) == (ROW[0], 'pw')
+
+def test_login_is_shed_when_the_pool_is_full(client):
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.return_value = ROW + ('pw',)
+    with patch.object(auth_routes, 'get_db_connection', return_value=conn), \
+            patch.object(auth_routes, 'check_password', side_effect=PasswordHasherBusy()):
+        response = client.post('/api/auth/login', json={'email': ROW[1], 'password': 'pw'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
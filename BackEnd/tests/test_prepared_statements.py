@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock, patch
+from app.utils.prepared_statements import PreparedStatement
+
+def make_cursor():
+    cursor = MagicMock()
+    cursor.connection.prepared_statements = set()
+    return cursor
+
+def test_prepared_once_per_connection():
+    statement = PreparedStatement('test_lookup', ['int', 'uuid[]'], "SELECT $1, $2")
+    first_connection = make_cursor()
+
+    statement.execute(first_connection, (1, ['a']))
+    statement.execute(first_connection, (2, ['b']))
+    executed = [call.args[0] for call in first_connection.execute.call_args_list]
+    assert executed == [
+        "PREPARE test_lookup(int, uuid[]) AS SELECT $1, $2",
+        "EXECUTE test_lookup(%s::int, %s::uuid[])",
+        "EXECUTE test_lookup(%s::int, %s::uuid[])"
+    ]
+
+    # A different pooled connection has its own server session
+    second_connection = make_cursor()
+    statement.execute(second_connection, (3, None))
+    assert second_connection.execute.call_args_list[0].args[0].startswith("PREPARE test_lookup")
+
+    stats = statement.stats()
+    assert stats["prepare_count"] == 2
+    assert stats["execute_count"] == 3
+
+def test_sampled_runs_are_planned_but_run_once():
+    statement = PreparedStatement('test_sampled', ['int'], "SELECT $1", read_only=True)
+    cursor = make_cursor()
+    cursor.connection.autocommit = False
+    explain_cursor = cursor.connection.cursor.return_value
+    explain_cursor.fetchone.return_value = ([{'Plan': {}, 'Planning Time': 0.25}],)
+
+    with patch('app.utils.prepared_statements.PREPARED_STATEMENT_EXPLAIN_EVERY', 2):
+        statement.execute(cursor, (1,))
+        statement.execute(cursor, (2,))
+    assert [call.args[0] for call in cursor.execute.call_args_list].count("EXECUTE test_sampled(%s::int)") == 2
+    assert [call.args[0] for call in explain_cursor.execute.call_args_list] == [
+        "SAVEPOINT prepared_statement_sample",
+        "EXPLAIN (SUMMARY, FORMAT JSON) EXECUTE test_sampled(%s::int)",
+        "RELEASE SAVEPOINT prepared_statement_sample"
+    ]
+    stats = statement.stats()
+    assert stats["plan_samples"] == 1 and stats["avg_planning_ms"] == 0.25
+
+    # Autocommit connections have no transaction to hold a savepoint
+    cursor.connection.autocommit = True
+    explain_cursor.execute.reset_mock()
+    with patch('app.utils.prepared_statements.PREPARED_STATEMENT_EXPLAIN_EVERY', 1):
+        statement.execute(cursor, (3,))
+    assert [call.args[0] for call in explain_cursor.execute.call_args_list] == [
+        "EXPLAIN (SUMMARY, FORMAT JSON) EXECUTE test_sampled(%s::int)"
+    ]
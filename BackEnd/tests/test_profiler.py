@@ -0,0 +1,61 @@
+import threading
+import pytest
+from flask import Flask
+from unittest.mock import patch
+from app.models.desk_model import DeskData
+from app.routes.admin_routes import admin_bp
+from app.utils import profiler
+
+HEADERS = {'X-Admin-Token': 'secret'}
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(admin_bp)
+    with patch('app.utils.admin_auth.settings.ADMIN_API_TOKEN', 'secret'):
+        yield app.test_client()
+
+@pytest.fixture
+def busy_slot_rules():
+    """A thread applying slot rules in a loop, standing in for a pegged worker"""
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            desk = {'slots': [
+                {'slot_type': 'Full Day', 'status': 'available'},
+                {'slot_type': 'Morning', 'status': 'booked'},
+                {'slot_type': 'Evening', 'status': 'available'}
+            ]}
+            DeskData._apply_slot_rules(desk)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+def test_profile_attributes_samples_to_model_methods(client, busy_slot_rules):
+    response = client.get('/api/admin/profile?seconds=0.3&interval_ms=5', headers=HEADERS)
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["samples"] > 10
+    functions = {entry["function"]: entry for entry in body["functions"]}
+    slot_rules = functions["app.models.desk_model:DeskData._apply_slot_rules"]
+    assert slot_rules["total_samples"] > 0
+    # The profiler's own thread is never sampled
+    assert "sampling-profiler" not in body["collapsed"]
+
+    collapsed = client.get('/api/admin/profile?seconds=0.1&format=collapsed', headers=HEADERS)
+    first_line = collapsed.get_data(as_text=True).splitlines()[0]
+    stack, count = first_line.rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+
+def test_one_profile_at_a_time(client):
+    with profiler._running:
+        response = client.get('/api/admin/profile?seconds=1', headers=HEADERS)
+    assert response.status_code == 409
+
+def test_profile_duration_is_bounded(client):
+    assert client.get('/api/admin/profile?seconds=3600', headers=HEADERS).status_code == 400
+    assert client.get('/api/admin/profile?seconds=1&interval_ms=0', headers=HEADERS).status_code == 400
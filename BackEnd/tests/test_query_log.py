@@ -0,0 +1,82 @@
+import os
+import pytest
+import psycopg2
+from flask import Flask
+from unittest.mock import MagicMock, patch
+from app.models.desk_model import desk_availability_statement
+from app.routes.admin_routes import admin_bp
+from app.utils import db_utils
+from app.utils.query_log import QueryLog, explain_mode, fingerprint, param_shape
+
+DATABASE_DSN = os.getenv('TEST_DATABASE_DSN')
+
+def test_fingerprint_replaces_literals_and_placeholders():
+    query = """
+        SELECT id FROM sena.booking_transactions
+        WHERE user_id = %s AND status = 'held' AND desk_id IN (12, 13)
+        LIMIT 50
+    """
+    assert fingerprint(query) == (
+        "SELECT id FROM sena.booking_transactions WHERE user_id = ? AND status = ? "
+        "AND desk_id IN (?, ?) LIMIT ?"
+    )
+    assert fingerprint("EXECUTE desk_availability(%s::uuid[], %s::int[])") == \
+        "EXECUTE desk_availability(?::uuid[], ?::int[])"
+
+def test_param_shape_keeps_types_and_array_lengths_only():
+    assert param_shape((['a', 'b'], None, 3, '2026-01-01')) == "str[2], null, int, str"
+    assert param_shape({'user_id': 'abc'}) == "user_id: str"
+
+def test_explain_mode_only_analyzes_side_effect_free_reads():
+    assert explain_mode("SELECT * FROM sena.desks") == 'analyze'
+    assert explain_mode("  WITH d AS (SELECT 1) SELECT * FROM d") == 'analyze'
+    assert explain_mode("SELECT id FROM sena.desks FOR UPDATE") == 'plan'
+    assert explain_mode("SELECT pg_try_advisory_lock(1)") == 'plan'
+    assert explain_mode("INSERT INTO sena.users(email) VALUES (%s)") == 'plan'
+    assert explain_mode(desk_availability_statement(['a'], None, None).execute_sql) == 'analyze'
+    assert explain_mode("SET statement_timeout = 100") is None
+
+def test_admin_endpoint_lists_slow_queries():
+    app = Flask(__name__)
+    app.register_blueprint(admin_bp)
+    log = QueryLog(threshold_ms=5, log_size=10, explain_interval_seconds=60, max_fingerprints=10)
+    with patch('app.utils.admin_auth.settings.ADMIN_API_TOKEN', 'secret'), \
+         patch('app.routes.admin_routes.query_log', log), \
+         patch.object(log, '_explain', return_value="Seq Scan on desks"):
+        cursor = MagicMock()
+        cursor.connection.is_replica = False
+        log.record(cursor, "SELECT 1", None, 0.001)
+        log.record(cursor, "SELECT * FROM sena.desks WHERE id = %s", (7,), 0.02)
+        response = app.test_client().get('/api/admin/slow-queries', headers={'X-Admin-Token': 'secret'})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [entry["fingerprint"] for entry in body["slow_queries"]] == ["SELECT * FROM sena.desks WHERE id = ?"]
+    assert body["slow_queries"][0]["plan"] == "Seq Scan on desks"
+    assert body["slow_queries"][0]["params"] == "int"
+    assert [entry["calls"] for entry in body["fingerprints"]] == [1, 1]
+
+@pytest.mark.skipif(not DATABASE_DSN, reason="TEST_DATABASE_DSN is not set")
+@pytest.mark.parametrize('analyze', [False, True])
+def test_slow_statements_capture_plans_without_repeating_writes(analyze):
+    log = QueryLog(threshold_ms=5, log_size=10, explain_interval_seconds=60, max_fingerprints=10, analyze=analyze)
+    conn = psycopg2.connect(DATABASE_DSN, connection_factory=db_utils.GuardedConnection,
+                            cursor_factory=db_utils.GuardedCursor)
+    try:
+        with patch.object(db_utils, 'query_log', log):
+            cursor = conn.cursor()
+            cursor.execute("CREATE TEMP TABLE slow_writes (value text)")
+            cursor.execute("SELECT 'x' FROM pg_sleep(%s)", (0.02,))
+            assert cursor.fetchall() == [('x',)]
+            cursor.execute("INSERT INTO slow_writes SELECT 'x' FROM pg_sleep(0.02)")
+            cursor.execute("SELECT COUNT(*) FROM slow_writes")
+            assert cursor.fetchone()[0] == 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+    write, read = log.slow_queries()
+    assert read["fingerprint"] == "SELECT ? FROM pg_sleep(?)"
+    # Without analyze, nothing slow runs twice on the request path
+    assert ("Execution Time" in read["plan"]) is analyze
+    assert write["fingerprint"].startswith("INSERT INTO slow_writes")
+    assert "actual" not in write["plan"]
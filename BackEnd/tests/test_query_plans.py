@@ -0,0 +1,177 @@
+import os
+import pytest
+import psycopg2
+from app.migrations import runner
+from app.models.desk_hold_model import HOLD_CONFLICT_STATEMENT
+from app.models.desk_model import (
+    USER_BOOKINGS_FIRST_PAGE_STATEMENT, USER_BOOKINGS_NEXT_PAGE_STATEMENT, desk_availability_statement
+)
+from app.routes.auth_routes import LOGIN_STATEMENT
+
+# A scratch database, e.g.
+#   TEST_DATABASE_DSN="host=localhost port=5432 dbname=sena user=postgres"
+# Pending migrations and a realistic amount of data (50 locations, 2000
+# desks, 20000 users, 200000 bookings) are loaded in one transaction that
+# is rolled back after the module.
+DATABASE_DSN = os.getenv('TEST_DATABASE_DSN')
+
+pytestmark = pytest.mark.skipif(not DATABASE_DSN, reason="TEST_DATABASE_DSN is not set")
+
+BOOKINGS = 200000
+
+@pytest.fixture(scope='module')
+def db():
+    conn = psycopg2.connect(DATABASE_DSN)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        for month in range(1, 3):
+            cursor.execute("SELECT sena.create_booking_transactions_partition(%s)", (f'2099-{month:02d}-01',))
+
+        cursor.execute("""
+            CREATE TEMP TABLE plan_locations ON COMMIT DROP AS
+            WITH inserted AS (
+                INSERT INTO sena.locations (name)
+                SELECT 'Plan city ' || g FROM generate_series(1, 50) g
+                RETURNING id
+            )
+            SELECT id, row_number() OVER () AS n FROM inserted
+        """)
+        cursor.execute("""
+            INSERT INTO sena.buildings (location_id, name, address, floor_count, amenities, operating_hours)
+            SELECT id, 'Plan tower ' || n, n || ' Main St', 5, '[]', '{}' FROM plan_locations
+        """)
+        cursor.execute("""
+            INSERT INTO sena.desk_type_master (type, capacity)
+            SELECT 'Plan type ' || g, g FROM generate_series(1, 4) g
+            RETURNING id
+        """)
+        desk_types = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            INSERT INTO sena.desks (name, floor_number, capacity, description, rating, desk_type_id, building_id, location_id)
+            SELECT 'Plan desk ' || g, g %% 5, 1, 'desk', (g %% 5)::numeric,
+                   (%s::int[])[1 + g %% 4], b.id, l.id
+            FROM generate_series(0, 1999) g
+            JOIN plan_locations l ON l.n = 1 + g %% 50
+            JOIN sena.buildings b ON b.location_id = l.id
+            RETURNING id
+        """, (desk_types,))
+        desks = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            INSERT INTO sena.users (email, first_name, last_name, password)
+            SELECT 'plan-user-' || g || '@example.com', 'Plan', 'User', 'pw'
+            FROM generate_series(1, 20000) g
+            RETURNING id
+        """)
+        users = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM sena.slot_master WHERE is_active ORDER BY id")
+        slots = [row[0] for row in cursor.fetchall()]
+        if not slots:
+            pytest.skip("The test database needs an active slot")
+
+        # Every desk and slot is taken once per day from 2099-01-01 on
+        cursor.execute("""
+            INSERT INTO sena.booking_transactions (user_id, desk_id, slot_id, status, booking_date, updated_at)
+            SELECT (%(users)s::uuid[])[1 + g %% 20000], (%(desks)s::int[])[1 + g %% 2000],
+                   (%(slots)s::int[])[1 + (g / 2000) %% %(slot_count)s],
+                   (ARRAY['booked', 'booked', 'booked', 'held', 'cancelled'])[1 + g %% 5],
+                   DATE '2099-01-01' + g / (2000 * %(slot_count)s), now() - g * interval '1 minute'
+            FROM generate_series(0, %(bookings)s - 1) g
+        """, {'users': [str(user) for user in users], 'desks': desks, 'slots': slots,
+              'slot_count': len(slots), 'bookings': BOOKINGS})
+        for table in ('locations', 'buildings', 'desk_type_master', 'slot_master', 'desks', 'desk_pricing',
+                      'users', 'booking_transactions', 'desk_slot_day_status'):
+            cursor.execute(f"ANALYZE sena.{table}")
+        yield cursor, {'desk': desks[0], 'slot': slots[0], 'user': users[0]}
+    finally:
+        conn.rollback()
+        conn.close()
+
+def used_indexes(cursor, statement, params, runs=0):
+    """
+    (table, index columns) of every index the plan reads; indexes of
+    booking_transactions partitions are reported as the parent's. After
+    more than 5 runs Postgres may switch a prepared statement to its
+    generic plan, so runs executes it that many times first.
+    """
+    cursor.execute(statement.prepare_sql)
+    try:
+        for _ in range(runs):
+            cursor.execute(statement.execute_sql, params)
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement.execute_sql, params)
+        plan = cursor.fetchone()[0][0]['Plan']
+    finally:
+        cursor.execute(f"DEALLOCATE {statement.name}")
+
+    names = set()
+
+    def walk(node):
+        if 'Index Name' in node:
+            names.add(node['Index Name'])
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan)
+    indexes = set()
+    for name in names:
+        cursor.execute("""
+            SELECT t.relname, array_agg(a.attname ORDER BY k.ord)
+            FROM pg_class i
+            LEFT JOIN pg_inherits parent ON parent.inhrelid = i.oid
+            JOIN pg_index x ON x.indexrelid = COALESCE(parent.inhparent, i.oid)
+            JOIN pg_class t ON t.oid = x.indrelid
+            CROSS JOIN unnest(x.indkey::int2[]) WITH ORDINALITY k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+            WHERE i.oid = to_regclass('sena.' || quote_ident(%s))
+            GROUP BY t.relname
+        """, (name,))
+        table, columns = cursor.fetchone()
+        indexes.add((table, tuple(columns)))
+    return indexes
+
+def test_login_uses_email_index(db):
+    cursor, _ = db
+    indexes = used_indexes(cursor, LOGIN_STATEMENT, ('plan-user-77@example.com',))
+    assert ('users', ('email',)) in indexes
+
+def test_hold_conflict_uses_booking_date_desk_slot_index(db):
+    cursor, ids = db
+    indexes = used_indexes(cursor, HOLD_CONFLICT_STATEMENT, (ids['desk'], ids['slot'], '2099-01-15'))
+    # Either the hot-query index or the unique index on active transactions
+    assert any(table == 'booking_transactions' and columns[:3] == ('booking_date', 'desk_id', 'slot_id')
+               for table, columns in indexes)
+
+def test_booking_history_pages_use_user_index(db):
+    cursor, ids = db
+    user_index = ('booking_transactions', ('user_id', 'updated_at', 'id'))
+    first = used_indexes(cursor, USER_BOOKINGS_FIRST_PAGE_STATEMENT, (ids['user'], None, None, None, 20))
+    assert user_index in first
+    following = used_indexes(cursor, USER_BOOKINGS_NEXT_PAGE_STATEMENT,
+                             (ids['user'], None, None, None, 20, '2099-01-01T00:00:00+00:00', 1000))
+    assert user_index in following
+
+def test_availability_for_a_location_uses_desk_and_status_indexes(db):
+    cursor, ids = db
+    cursor.execute("SELECT location_id FROM sena.desks WHERE id = %s", (ids['desk'],))
+    location_id = cursor.fetchone()[0]
+    statement = desk_availability_statement([location_id], None, None)
+    indexes = used_indexes(cursor, statement, ([location_id], None, None, '2099-01-15'))
+    assert ('desks', ('location_id', 'desk_type_id')) in indexes
+    assert ('desk_slot_day_status', ('booking_date', 'desk_id', 'slot_id')) in indexes
+    # desk_pricing holds one row per desk type and slot; a sequential scan
+    # stays cheaper than idx_desk_pricing_active at that size
+
+@pytest.mark.parametrize('plan_cache_mode', ['auto', 'force_generic_plan'])
+def test_availability_keeps_desk_index_once_plans_are_cached(db, plan_cache_mode):
+    cursor, ids = db
+    cursor.execute("SELECT location_id, desk_type_id FROM sena.desks WHERE id = %s", (ids['desk'],))
+    location_id, desk_type_id = cursor.fetchone()
+    params = ([location_id], [desk_type_id], None, '2099-01-15')
+    # Whether Postgres picks the generic plan after five runs depends on
+    # costs, so it is also forced
+    cursor.execute("SELECT set_config('plan_cache_mode', %s, true)", (plan_cache_mode,))
+    try:
+        indexes = used_indexes(cursor, desk_availability_statement(*params[:3]), params, runs=6)
+    finally:
+        cursor.execute("RESET plan_cache_mode")
+    assert ('desks', ('location_id', 'desk_type_id')) in indexes
@@ -0,0 +1,127 @@
+import os
+import time
+import pytest
+import psycopg2.extensions
+from flask import Flask, jsonify
+from unittest.mock import patch
+from app.config.database import DB_CONFIG
+from app.utils import db_utils, read_your_writes
+from app.utils.db_utils import ReplicaRouter, get_db_connection
+
+# Point these at two local Postgres instances (ideally a primary and its
+# streaming replica) to run the routing tests against real servers, e.g.
+#   TEST_PRIMARY_DSN="host=localhost port=5432 dbname=sena user=postgres"
+#   TEST_REPLICA_DSN="host=localhost port=5433 dbname=sena user=postgres"
+PRIMARY_DSN = os.getenv('TEST_PRIMARY_DSN')
+REPLICA_DSN = os.getenv('TEST_REPLICA_DSN')
+
+requires_two_databases = pytest.mark.skipif(
+    not (PRIMARY_DSN and REPLICA_DSN),
+    reason="TEST_PRIMARY_DSN and TEST_REPLICA_DSN are not set"
+)
+
+def make_router(max_lag_seconds=5.0):
+    return ReplicaRouter(max_lag_seconds=max_lag_seconds, lag_check_seconds=0, max_pinned_users=100)
+
+def db_config(replicas):
+    params = psycopg2.extensions.parse_dsn(PRIMARY_DSN)
+    return {
+        'host': params.get('host', 'localhost'),
+        'port': params.get('port', 5432),
+        'dbname': params['dbname'],
+        'user': params.get('user'),
+        'password': params.get('password'),
+        'replicas': replicas
+    }
+
+def served_by(conn) -> int:
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT inet_server_port()")
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+def port_of(dsn) -> int:
+    return int(psycopg2.extensions.parse_dsn(dsn).get('port', 5432))
+
+def test_round_robin_over_replicas():
+    router = make_router()
+    replicas = ['replica-a', 'replica-b', 'replica-c']
+    assert [router.candidates(replicas)[0] for _ in range(4)] == [
+        'replica-a', 'replica-b', 'replica-c', 'replica-a'
+    ]
+
+def test_recent_writers_are_pinned_to_primary():
+    router = make_router()
+    router.note_write('user-1')
+    assert router.is_pinned('user-1')
+    assert not router.is_pinned('user-2')
+    assert not router.is_pinned(None)
+
+    router.max_lag_seconds = -1
+    assert not router.is_pinned('user-1')
+
+def test_clients_that_wrote_recently_are_pinned():
+    router = make_router()
+    try:
+        db_utils.set_client_last_write(time.time() - 1)
+        assert router.client_pinned()
+        db_utils.set_client_last_write(time.time() - router.pin_seconds - 1)
+        assert not router.client_pinned()
+        db_utils.set_client_last_write(time.time() + 3600)
+        assert not router.client_pinned()
+    finally:
+        db_utils.clear_client_last_write()
+    assert not router.client_pinned()
+
+def test_last_write_cookie_pins_the_client_on_any_worker():
+    app = Flask(__name__)
+    read_your_writes.init_app(app)
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        db_utils.replica_router.note_write('user-1')
+        return jsonify({})
+
+    @app.route('/read')
+    def read():
+        return jsonify({"pinned": db_utils.replica_router.client_pinned()})
+
+    with patch.dict(DB_CONFIG, {'replicas': ['replica-a']}):
+        client = app.test_client()
+        assert client.get('/read').get_json() == {"pinned": False}
+        client.post('/write')
+        assert client.get_cookie(read_your_writes.LAST_WRITE_COOKIE) is not None
+        # A fresh worker knows nothing about user-1's write, only the cookie
+        with patch.object(db_utils, 'replica_router', make_router()):
+            assert client.get('/read').get_json() == {"pinned": True}
+            client.delete_cookie(read_your_writes.LAST_WRITE_COOKIE)
+            assert client.get('/read').get_json() == {"pinned": False}
+
+@requires_two_databases
+def test_reads_go_to_replica_and_writes_to_primary():
+    with patch.object(db_utils, 'replica_router', make_router()):
+        config = db_config([REPLICA_DSN])
+        assert served_by(get_db_connection(config, read_only=True)) == port_of(REPLICA_DSN)
+        assert served_by(get_db_connection(config)) == port_of(PRIMARY_DSN)
+
+@requires_two_databases
+def test_read_your_writes_after_hold():
+    router = make_router()
+    with patch.object(db_utils, 'replica_router', router):
+        config = db_config([REPLICA_DSN])
+        router.note_write('user-1')
+        assert served_by(get_db_connection(config, read_only=True, user_key='user-1')) == port_of(PRIMARY_DSN)
+        assert served_by(get_db_connection(config, read_only=True, user_key='user-2')) == port_of(REPLICA_DSN)
+
+@requires_two_databases
+def test_lagging_or_unreachable_replicas_fall_back_to_primary():
+    with patch.object(db_utils, 'replica_router', make_router(max_lag_seconds=-1)):
+        config = db_config([REPLICA_DSN])
+        assert served_by(get_db_connection(config, read_only=True)) == port_of(PRIMARY_DSN)
+
+    with patch.object(db_utils, 'replica_router', make_router()):
+        config = db_config(["host=localhost port=1 dbname=sena connect_timeout=2", REPLICA_DSN])
+        ports = {served_by(get_db_connection(config, read_only=True)) for _ in range(3)}
+        assert ports == {port_of(REPLICA_DSN)}
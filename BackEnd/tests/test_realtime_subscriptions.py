@@ -0,0 +1,108 @@
+import pytest
+import psycopg2
+from flask import Flask
+from unittest.mock import patch
+from app.migrations import runner
+from app.realtime.subscriptions import PostgresSubscriptions, canonical_filters, filter_room
+from app.routes import desk_routes
+
+def test_equivalent_filters_share_a_room():
+    first = canonical_filters({'location_ids': ['b', 'a'], 'desk_type_ids': '2,1', 'booking_date': '2026-03-02'})
+    second = canonical_filters({'location_ids': ['a', 'b', ''], 'desk_type_ids': [1, 2],
+                                'slot_type_ids': None, 'booking_date': '2026-03-02'})
+    assert first == second
+    assert filter_room(first) == filter_room(second)
+    assert filter_room(first) != filter_room(canonical_filters({'booking_date': '2026-03-02'}))
+    assert canonical_filters("not a dict") == canonical_filters(None)
+
+def test_clients_with_the_same_filters_are_computed_once():
+    app = Flask(__name__)
+    socketio = desk_routes.socketio
+    socketio.init_app(app, async_mode='threading')
+    filters = {'location_ids': ['loc-1'], 'booking_date': '2026-03-02'}
+
+    with patch.object(desk_routes.DeskData, 'get_desk_availability', return_value=({"desks": [1]}, 200)) as availability:
+        clients = [socketio.test_client(app) for _ in range(3)]
+        try:
+            for client in clients[:2]:
+                client.emit('filter_update', filters)
+            for client in clients:
+                client.get_received()
+
+            availability.reset_mock()
+            assert desk_routes.push_desk_updates() == 2
+            assert availability.call_count == 2
+            received = [client.get_received() for client in clients]
+            assert all(len(messages) == 1 and messages[0]['name'] == 'desk_update' for messages in received)
+        finally:
+            for client in clients:
+                client.disconnect()
+    assert desk_routes.subscriptions.active_rooms() == {}
+
+def test_filters_on_one_location_and_date_share_a_topic():
+    app = Flask(__name__)
+    socketio = desk_routes.socketio
+    socketio.init_app(app, async_mode='threading')
+    desks = [
+        {'desk_id': 1, 'desk_type_id': 1, 'rating': 5, 'slots': [{'slot_id': 1}, {'slot_id': 2}]},
+        {'desk_id': 2, 'desk_type_id': 2, 'rating': 4, 'slots': [{'slot_id': 2}]},
+    ]
+    client_filters = [
+        {'location_ids': ['loc-1'], 'booking_date': '2026-03-02'},
+        {'location_ids': ['loc-1'], 'desk_type_ids': ['2'], 'booking_date': '2026-03-02'},
+        {'location_ids': ['loc-1'], 'slot_type_ids': ['1'], 'booking_date': '2026-03-02'},
+    ]
+
+    with patch.object(desk_routes.DeskData, 'get_desk_availability', return_value=({"desks": desks}, 200)) as availability:
+        clients = [socketio.test_client(app) for _ in client_filters]
+        try:
+            for client, filters in zip(clients, client_filters):
+                client.emit('filter_update', filters)
+                client.get_received()
+
+            availability.reset_mock()
+            assert desk_routes.push_desk_updates() == 3
+            availability.assert_called_once_with(location_ids=['loc-1'], booking_date='2026-03-02')
+            received = [client.get_received()[0]['args'][0]['desks'] for client in clients]
+            assert received[0] == desks
+            assert [desk['desk_id'] for desk in received[1]] == [2]
+            assert received[2] == [{**desks[0], 'slots': [{'slot_id': 1}]}]
+            assert desks[0]['slots'] == [{'slot_id': 1}, {'slot_id': 2}]
+        finally:
+            for client in clients:
+                client.disconnect()
+
+@pytest.fixture
+def shared_db(database_dsn, test_db_config):
+    conn = psycopg2.connect(database_dsn)
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_workers_share_subscriptions_and_elect_one_producer(shared_db):
+    first = PostgresSubscriptions(node_id='test-node-a')
+    second = PostgresSubscriptions(node_id='test-node-b', node_timeout_seconds=0)
+    filters = canonical_filters({'booking_date': '2099-01-01'})
+    try:
+        first.subscribe('client-a', filter_room(filters), filters)
+        second.subscribe('client-b', filter_room(filters), filters)
+        second.subscribe('client-c', 'desks:other', canonical_filters(None))
+        assert first.active_rooms() == {filter_room(filters): filters, 'desks:other': canonical_filters(None)}
+
+        assert first.is_producer()
+        assert not second.is_producer()
+        first.close()
+        assert second.is_producer()
+
+        # A node that stopped heartbeating loses its subscriptions, and gets
+        # them back on its next heartbeat
+        second.heartbeat()
+        assert second.active_rooms() == {}
+        second.heartbeat()
+        assert set(PostgresSubscriptions(node_id='test-node-c').active_rooms()) == {filter_room(filters), 'desks:other'}
+    finally:
+        first.close()
+        second.close()
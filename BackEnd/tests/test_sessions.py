@@ -0,0 +1,64 @@
+import pytest
+from flask import Flask
+from unittest.mock import MagicMock, patch
+from app.models.user_model import User
+from app.routes.auth_routes import auth_bp
+from app.utils import sessions
+from app.utils.lru_cache import LRUCache
+
+USER_ID = '7c9e6679-7425-40de-944b-e07fc1f90ae7'
+ROW = (USER_ID, 'ada@example.com', 'Ada', 'Lovelace', None, None, None, True)
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(auth_bp)
+    User._profiles.clear()
+    yield app.test_client()
+    User._profiles.clear()
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_tokens_are_signed_and_expire():
+    token = sessions.issue_token(USER_ID)
+    assert sessions.verify_token(token) == USER_ID
+    assert sessions.verify_token(token[:-2] + ('AA' if not token.endswith('AA') else 'BB')) is None
+    with patch.object(sessions, 'SESSION_TOKEN_TTL_SECONDS', -1):
+        assert sessions.verify_token(token) is None
+
+def test_cached_profile_is_served_without_the_database(client):
+    User.remember_profile(User._row_to_dict(ROW))
+    with patch('app.models.user_model.get_db_connection') as get_db_connection:
+        response = client.get('/api/auth/me', headers=bearer(sessions.issue_token(USER_ID)))
+        get_db_connection.assert_not_called()
+    assert response.status_code == 200
+    assert response.get_json()['email'] == 'ada@example.com'
+
+    assert client.get('/api/auth/me', headers=bearer('forged')).status_code == 401
+
+def test_profile_update_invalidates_the_cached_profile(client):
+    token = sessions.issue_token(USER_ID)
+    conn = MagicMock()
+    conn.cursor.return_value.fetchone.side_effect = [ROW, ROW[:2] + ('Augusta',) + ROW[3:], ROW[:2] + ('Augusta',) + ROW[3:]]
+    with patch('app.models.user_model.get_db_connection', return_value=conn) as get_db_connection:
+        assert client.get('/api/auth/me', headers=bearer(token)).get_json()['first_name'] == 'Ada'
+        assert client.get('/api/auth/me', headers=bearer(token)).get_json()['first_name'] == 'Ada'
+        assert get_db_connection.call_count == 1
+
+        response = client.put('/api/auth/me', headers=bearer(token), json={'first_name': 'Augusta', 'email': 'x@y.z'})
+        assert response.status_code == 200
+        update_sql, update_params = conn.cursor.return_value.execute.call_args_list[-1][0]
+        assert 'email =' not in update_sql and update_params == ('Augusta', USER_ID)
+
+        assert client.get('/api/auth/me', headers=bearer(token)).get_json()['first_name'] == 'Augusta'
+        assert get_db_connection.call_count == 3
+
+def test_lru_cache_is_bounded():
+    cache = LRUCache(max_entries=2, ttl_seconds=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    assert len(cache) == 2
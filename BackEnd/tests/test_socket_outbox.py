@@ -0,0 +1,61 @@
+from flask import Flask
+from unittest.mock import patch
+from app.realtime.outbox import Outbox
+from app.routes import desk_routes
+
+def test_backed_up_client_keeps_only_its_newest_update():
+    depths = {'eio-fast': 0, 'eio-slow': 5}
+    sent = []
+    outbox = Outbox(depths.get, lambda eio_sid, packets: sent.append((eio_sid, packets)),
+                    max_queued_packets=2, slow_client_seconds=60)
+
+    for version in range(3):
+        assert outbox.offer('fast', 'eio-fast', 'desk_update', [f'v{version}'])
+        assert not outbox.offer('slow', 'eio-slow', 'desk_update', [f'v{version}'])
+    assert [packets for eio_sid, packets in sent] == [['v0'], ['v1'], ['v2']]
+    assert outbox.held_count() == 1
+    assert outbox.coalesced == 2
+
+    # Still backed up: nothing goes out, and it isn't slow enough to drop yet
+    sent.clear()
+    assert outbox.retry() == []
+    assert sent == []
+
+    depths['eio-slow'] = 0
+    assert outbox.retry() == []
+    assert sent == [('eio-slow', ['v2'])]
+    assert outbox.held_count() == 0
+
+def test_client_backed_up_for_too_long_is_dropped():
+    outbox = Outbox(lambda eio_sid: 10, lambda eio_sid, packets: None, max_queued_packets=2, slow_client_seconds=0)
+    outbox.offer('slow', 'eio-slow', 'desk_update', ['v0'])
+    assert outbox.retry() == ['slow']
+    assert outbox.dropped == 1
+    outbox.forget('slow')
+    assert outbox.held_count() == 0
+
+def test_push_does_not_wait_for_a_stalled_client():
+    app = Flask(__name__)
+    socketio = desk_routes.socketio
+    socketio.init_app(app, async_mode='threading')
+    outbox = desk_routes.client_manager.outbox
+
+    with patch.object(desk_routes.DeskData, 'get_desk_availability', return_value=({"desks": [1]}, 200)):
+        fast, stalled = socketio.test_client(app), socketio.test_client(app)
+        try:
+            fast.get_received()
+            stalled.get_received()
+            with patch.object(outbox, '_queue_depth',
+                              side_effect=lambda eio_sid: 100 if eio_sid == stalled.eio_sid else 0):
+                desk_routes.push_desk_updates()
+                desk_routes.push_desk_updates()
+                assert len(fast.get_received()) == 2
+                assert stalled.get_received() == []
+                assert outbox.held_count() == 1
+
+            desk_routes.client_manager.retry_held()
+            assert [message['name'] for message in stalled.get_received()] == ['desk_update']
+        finally:
+            fast.disconnect()
+            stalled.disconnect()
+    assert outbox.held_count() == 0
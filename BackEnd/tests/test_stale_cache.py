@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask
+from unittest.mock import patch
+from app.routes.desk_routes import desk_bp
+from app.utils.stale_cache import StaleWhileRevalidateCache, read_cache
+
+@pytest.fixture(autouse=True)
+def clear_read_cache():
+    read_cache.clear()
+    yield
+    read_cache.clear()
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(desk_bp)
+    return app.test_client()
+
+def test_serves_last_good_result_when_loader_fails():
+    cache = StaleWhileRevalidateCache(max_entries=10, max_age_seconds=60, retry_seconds=60)
+
+    result, status_code, stale_age = cache.serve('key', lambda: ({"desks": [1]}, 200))
+    assert (result, status_code, stale_age) == ({"desks": [1]}, 200, None)
+
+    result, status_code, stale_age = cache.serve('key', lambda: ({"error": "down"}, 500))
+    assert result == {"desks": [1]}
+    assert status_code == 200
+    assert stale_age is not None
+
+def test_degraded_reads_skip_the_database():
+    cache = StaleWhileRevalidateCache(max_entries=10, max_age_seconds=60, retry_seconds=60)
+    cache.serve('a', lambda: ({"value": "a"}, 200))
+    cache.serve('b', lambda: ({"value": "b"}, 200))
+    cache.serve('a', lambda: ({"error": "down"}, 500))
+
+    calls = []
+    def loader():
+        calls.append(1)
+        return {"value": "b2"}, 200
+
+    result, _, stale_age = cache.serve('b', loader)
+    assert result == {"value": "b"}
+    assert stale_age is not None
+    assert calls == []
+
+def test_errors_without_cached_result_pass_through():
+    cache = StaleWhileRevalidateCache(max_entries=10, max_age_seconds=60, retry_seconds=60)
+    assert cache.serve('key', lambda: ({"error": "down"}, 500)) == ({"error": "down"}, 500, None)
+    assert cache.serve('key', lambda: ({"error": "bad"}, 400)) == ({"error": "bad"}, 400, None)
+
+def test_entries_are_bounded():
+    cache = StaleWhileRevalidateCache(max_entries=2, max_age_seconds=60, retry_seconds=60)
+    for key in ['a', 'b', 'c']:
+        cache.serve(key, lambda: ({"value": key}, 200))
+    assert cache._get('a') is None
+    assert cache._get('c') is not None
+
+def test_user_bookings_marked_stale_when_database_is_down(client):
+    with patch('app.models.desk_model.DeskData.get_user_bookings') as mock_bookings:
+        mock_bookings.return_value = ({"bookings": [{"booking_id": 1}]}, 200)
+        response = client.get('/api/desks/user-bookings?user_id=u1')
+        assert response.status_code == 200
+        assert 'stale' not in response.get_json()
+
+        mock_bookings.return_value = ({"error": "Database connection failed"}, 500)
+        response = client.get('/api/desks/user-bookings?user_id=u1')
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body['stale'] is True
+        assert body['bookings'] == [{"booking_id": 1}]
+        assert response.headers['Warning'].startswith('110')
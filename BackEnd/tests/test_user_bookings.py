@@ -0,0 +1,61 @@
+import json
+import pytest
+from datetime import datetime, timezone
+from flask import Flask
+from unittest.mock import MagicMock, patch
+from app.models.desk_model import DeskData
+from app.utils import metrics
+from app.routes.desk_routes import desk_bp
+from app.utils.stale_cache import read_cache
+
+@pytest.fixture
+def client():
+    read_cache.clear()
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.register_blueprint(desk_bp)
+    return app.test_client()
+
+def test_cursor_round_trip():
+    updated_at = datetime(2024, 3, 20, 10, 30, tzinfo=timezone.utc)
+    cursor = DeskData.encode_bookings_cursor(updated_at, 42)
+    assert DeskData.decode_bookings_cursor(cursor) == (updated_at, 42)
+
+    with pytest.raises(ValueError):
+        DeskData.decode_bookings_cursor('not-a-cursor')
+
+def test_paging_parameters_select_keyset_page(client):
+    with patch('app.models.desk_model.DeskData.get_user_bookings_page') as mock_page:
+        mock_page.return_value = ({"bookings": [], "next_cursor": None}, 200)
+        response = client.get('/api/desks/user-bookings?user_id=u1&limit=5000&status=held,booked')
+
+        assert response.status_code == 200
+        args, kwargs = mock_page.call_args
+        assert args == ('u1', 200)
+        assert kwargs['statuses'] == ['held', 'booked']
+
+    assert client.get('/api/desks/user-bookings?user_id=u1&limit=0').status_code == 400
+
+def test_stream_returns_one_json_document(client):
+    def stream():
+        yield '{"bookings": ['
+        yield '{"booking_id": 1}, {"booking_id": 2}'
+        yield ']}'
+
+    with patch('app.models.desk_model.DeskData.stream_user_bookings', return_value=(stream(), 200)):
+        response = client.get('/api/desks/user-bookings?user_id=u1&stream=true')
+        assert response.is_streamed
+        assert json.loads(response.data) == {"bookings": [{"booking_id": 1}, {"booking_id": 2}]}
+
+def test_stream_is_timed_until_the_document_ends():
+    conn = MagicMock()
+    conn.cursor.return_value.__iter__.return_value = iter([(1, {}, None, 'booked')])
+    metrics.MODEL_CALL_DURATION.clear()
+    with patch('app.models.desk_model.get_db_connection', return_value=conn):
+        stream, status_code = DeskData.stream_user_bookings('u1')
+    assert status_code == 200
+    assert 'DeskData.stream_user_bookings' not in metrics.render_metrics()
+
+    assert json.loads(''.join(stream))['bookings'][0]['booking_id'] == 1
+    assert 'model_call_duration_seconds_count{call="DeskData.stream_user_bookings"} 1' in metrics.render_metrics()
+    conn.close.assert_called_once()
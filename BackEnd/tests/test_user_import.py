@@ -0,0 +1,102 @@
+import uuid
+import pytest
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from flask import Flask
+from unittest.mock import patch
+from app.config import settings
+from app.migrations import runner
+from app.models.user_model import User
+from app.routes import admin_routes
+from app.routes.admin_routes import admin_bp
+from app.utils import db_utils
+
+# Users are committed so User's own connections see them, and deleted afterwards.
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(admin_bp)
+    with patch.object(settings, 'ADMIN_API_TOKEN', 'admin-secret'):
+        yield app.test_client()
+
+def post_csv(client, body):
+    return client.post('/api/admin/users/import', data=body, content_type='text/csv',
+                       headers={'X-Admin-Token': 'admin-secret'})
+
+def test_header_and_size_are_checked_before_importing(client):
+    with patch('app.models.user_model.get_db_connection') as get_db_connection:
+        response = post_csv(client, b'email,first_name,nickname\nada@example.com,Ada,A\n')
+        assert response.status_code == 400
+        assert response.get_json()['missing'] == ['last_name']
+        assert response.get_json()['unknown'] == ['nickname']
+
+        with patch.object(admin_routes, 'USER_IMPORT_MAX_BYTES', 10):
+            assert post_csv(client, b'email,first_name,last_name\n').status_code == 413
+        get_db_connection.assert_not_called()
+
+@pytest.fixture
+def scratch_db(database_dsn, test_db_config):
+    conn = psycopg2.connect(database_dsn)
+    domain = f"import-{uuid.uuid4().hex[:8]}.example.com"
+    try:
+        cursor = conn.cursor()
+        runner.apply_pending(cursor)
+        conn.commit()
+
+        yield domain
+        cursor.execute("DELETE FROM sena.users WHERE email LIKE %s", (f'%@{domain}',))
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_signup_for_a_taken_email_conflicts(scratch_db):
+    email = f"ada@{scratch_db}"
+    user, status_code = User.create_user(email, 'Ada', 'Lovelace', password_hash='$argon2id$x')
+    assert status_code == 201 and user['email'] == email
+    assert User.create_user(email, 'Ada', 'Byron')[1] == 409
+
+def test_import_reports_duplicates_invalid_rows_and_registered_emails(client, scratch_db):
+    domain = scratch_db
+    assert User.create_user(f"grace@{domain}", 'Grace', 'Hopper')[1] == 201
+    body = '\n'.join([
+        'Email,First_Name,Last_Name,Phone',
+        f' alan@{domain} ,Alan,Turing,555-0100',
+        f'grace@{domain},Grace,Hopper,',
+        'not-an-email,Kurt,Godel,',
+        f'alan@{domain},Alan,Mathison,',
+        f'"emmy@{domain}","Emmy, Amalie",Noether,',
+        f'edsger@{domain},,Dijkstra,',
+    ]).encode()
+
+    # COPY has to work with a wait callback installed, as under eventlet,
+    # and row numbers have to carry across batches
+    psycopg2.extensions.set_wait_callback(psycopg2.extras.wait_select)
+    try:
+        with patch('app.models.user_model.USER_IMPORT_BATCH_BYTES', 64), \
+                patch('app.utils.db_utils.GuardedCursor.copy_expert', autospec=True,
+                      side_effect=db_utils.GuardedCursor.copy_expert) as copy_expert:
+            response = post_csv(client, body)
+        assert copy_expert.call_count > 1
+        assert psycopg2.extensions.get_wait_callback() is psycopg2.extras.wait_select
+    finally:
+        psycopg2.extensions.set_wait_callback(None)
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['rows'] == 6
+    assert report['imported'] == 2
+    assert report['already_registered'] == {'count': 1, 'emails': [f"grace@{domain}"]}
+    assert report['duplicates'] == {'count': 1, 'emails': [{'email': f"alan@{domain}", 'rows': [1, 4]}]}
+    assert report['invalid_emails'] == {'count': 1, 'rows': [{'row': 3, 'email': 'not-an-email'}]}
+    assert report['missing_names'] == {'count': 1, 'rows': [{'row': 6, 'email': f"edsger@{domain}"}]}
+
+    alan, status_code = User.get_user_by_email(f"alan@{domain}")
+    assert status_code == 200 and (alan['last_name'], alan['phone']) == ('Turing', '555-0100')
+    assert User.get_user_by_email(f"emmy@{domain}")[0]['first_name'] == 'Emmy, Amalie'
+
+    with patch('app.models.user_model.USER_IMPORT_BATCH_BYTES', 16):
+        response = post_csv(client, b'email,first_name,last_name\na@b.co,A,B\n\nc@d.co,C,D\ne@f.co,E,F,extra\n')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Malformed CSV at row 3:')
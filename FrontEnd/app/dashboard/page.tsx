@@ -171,7 +171,8 @@ export default function DashboardPage() {
       const fetchUserBookings = async () => {
         try {
           const response = await fetch(
-            `http://localhost:5000/api/desks/user-bookings?user_id=${user.id}`
+            `http://localhost:5000/api/desks/user-bookings?user_id=${user.id}`,
+            { credentials: "include" }
           )
           if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`)
           const data = await response.json()
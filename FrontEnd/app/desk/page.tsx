@@ -91,7 +91,7 @@ interface Desk {
 export default function DeskBookingPage() {
     const { isAuthenticated, isLoading } = useAuth();
     const router = useRouter();
-    const { heldBookingId, setHeldBookingId, releaseHold } = useDeskHold();
+    const { heldBookingId, setHeldBookingId, setHeldBookingDate, releaseHold } = useDeskHold();
 
     const [deskTypes, setDeskTypes] = useState<DeskType[]>([]);
     const [locations, setLocations] = useState<Location[]>([]);
@@ -282,6 +282,7 @@ export default function DeskBookingPage() {
         try {
             const response = await fetch("http://localhost:5000/api/desks/confirm", {
                 method: "POST",
+                credentials: "include", // Keeps this user's reads on the primary after the write
                 headers: {
                     "Content-Type": "application/json",
                 },
@@ -721,6 +722,7 @@ export default function DeskBookingPage() {
         try {
             const holdResponse = await fetch("http://localhost:5000/api/desks/hold", {
                 method: "POST",
+                credentials: "include", // Keeps this user's reads on the primary after the write
                 headers: {
                     "Content-Type": "application/json",
                 },
@@ -740,6 +742,7 @@ export default function DeskBookingPage() {
             const data = await holdResponse.json();
             console.log("Desk held successfully:", data);
             setHeldBookingId(data.booking.booking_id);
+            setHeldBookingDate(data.booking.booking_date);
             setHeldDeskId(deskId);
             setHeldSlotId(slotId);
             toast.success("Desk held for 3 minutes! Please confirm your booking.");
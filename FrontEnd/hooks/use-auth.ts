@@ -1,7 +1,7 @@
 "use client"
 
 import { useState, useEffect, useCallback } from "react"
-import { User, authenticateUser, registerUser } from "@/lib/auth"
+import { User, authenticateUser, fetchCurrentUser, registerUser } from "@/lib/auth"
 import { useRouter } from "next/navigation";
 
 interface UseAuthReturn {
@@ -25,6 +25,19 @@ export function useAuth(): UseAuthReturn {
         const parsedUser: User = JSON.parse(storedUser);
         setUser(parsedUser);
         console.log("Auth hook: User loaded from localStorage:", parsedUser);
+        if (parsedUser.token) {
+          // Served from the backend's profile cache while the session lasts
+          fetchCurrentUser(parsedUser.token).then((currentUser) => {
+            if (currentUser === null) {
+              console.log("Auth hook: Session expired, clearing stored user");
+              setUser(null);
+              localStorage.removeItem("user");
+            } else if (currentUser) {
+              setUser(currentUser);
+              localStorage.setItem("user", JSON.stringify(currentUser));
+            }
+          });
+        }
       } catch (e) {
         console.error("Auth hook: Failed to parse user from localStorage:", e);
         localStorage.removeItem("user"); // Clear invalid data
@@ -3,6 +3,8 @@ import toast from "react-hot-toast";
 
 export const useDeskHold = () => {
     const [heldBookingId, setHeldBookingId] = useState<string | null>(null);
+    // Holds are looked up by id and booking date (YYYY-MM-DD)
+    const [heldBookingDate, setHeldBookingDate] = useState<string | null>(null);
 
     const releaseHold = useCallback(async () => {
         if (heldBookingId) {
@@ -12,11 +14,13 @@ export const useDeskHold = () => {
             try {
                 const response = await fetch(`http://localhost:5000/api/desks/hold`, {
                     method: "DELETE",
+                    credentials: "include",
                     headers: {
                         "Content-Type": "application/json",
                     },
                     body: JSON.stringify({
                         booking_id: bookingIdToRelease,
+                        booking_date: heldBookingDate,
                     }),
                 });
 
@@ -31,7 +35,7 @@ export const useDeskHold = () => {
                 toast.error(`Error releasing held desk: ${error.message}`);
             }
         }
-    }, [heldBookingId]);
+    }, [heldBookingId, heldBookingDate]);
 
     // Add a beforeunload event listener to release the hold when the user closes the tab/browser
     useEffect(() => {
@@ -51,5 +55,5 @@ export const useDeskHold = () => {
         };
     }, [heldBookingId, releaseHold]);
 
-    return { heldBookingId, setHeldBookingId, releaseHold };
+    return { heldBookingId, setHeldBookingId, setHeldBookingDate, releaseHold };
 }; 
\ No newline at end of file
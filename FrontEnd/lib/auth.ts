@@ -3,6 +3,7 @@ export interface User {
   email: string;
   name: string | null;
   phone: string | null;
+  token?: string;
 }
 
 export async function authenticateUser(email: string, password: string): Promise<User | null> {
@@ -31,13 +32,40 @@ export async function authenticateUser(email: string, password: string): Promise
     }
     const userName = data.user.first_name && data.user.last_name ? `${data.user.first_name} ${data.user.last_name}` : data.user.email; // Fallback to email if name parts are missing
 
-    return { id: data.user.id, email: data.user.email, name: userName, phone: data.user.phone || null };
+    return { id: data.user.id, email: data.user.email, name: userName, phone: data.user.phone || null, token: data.token };
   } catch (error) {
     console.error("Authentication error:", error);
     return null;
   }
 }
 
+// Refresh the signed-in user's profile with their session token. Returns null
+// when the token is no longer valid, undefined when the check itself failed.
+export async function fetchCurrentUser(token: string): Promise<User | null | undefined> {
+  try {
+    const response = await fetch("http://localhost:5000/api/auth/me", {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+    });
+
+    if (response.status === 401 || response.status === 403) {
+      return null;
+    }
+    if (!response.ok) {
+      console.error("Fetching current user failed:", response.statusText);
+      return undefined;
+    }
+
+    const data = await response.json();
+    const userName = data.first_name && data.last_name ? `${data.first_name} ${data.last_name}` : data.email;
+    return { id: data.id, email: data.email, name: userName, phone: data.phone || null, token };
+  } catch (error) {
+    console.error("Fetching current user error:", error);
+    return undefined;
+  }
+}
+
 export async function registerUser(userData: { email: string; password: string; first_name: string; last_name: string; phone?: string; }): Promise<User | null> {
   try {
     const response = await fetch("http://localhost:5000/api/auth/signup", {